@@ -1,4 +1,6 @@
 import logging
+import re
+from typing import Final, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
@@ -7,15 +9,42 @@ from starlette.responses import Response
 from starlette.types import ASGIApp
 
 from app.factory.services import create_services
-from app.services.postgres import SQLSessionContext
+from app.services.cache import AdminUserCache, UserCache
+from app.services.counter import CachedCount
+from app.services.postgres import SessionIntent, SQLSessionContext, connection_holder
 
 logger = logging.getLogger(__name__)
 
+# Cookie браузера, который недавно изменял данные: его запросы читают с основного сервера
+PRIMARY_COOKIE: Final[str] = "db_primary"
+_READ_METHODS: Final[frozenset[str]] = frozenset({"GET", "HEAD", "OPTIONS"})
+# Идентификаторы в пути заменяются, чтобы статистика пула группировалась по страницам
+_PATH_ID: Final[re.Pattern[str]] = re.compile(r"/\d+(?=/|$)")
+
 
 class DBSessionMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: ASGIApp, session_pool: async_sessionmaker[AsyncSession]) -> None:
+    """
+    Открывает ``SQLSessionContext`` на запрос. Если передан ``replica_session_pool``,
+    читающие запросы (списки и карточки админ-панели) выполняются на реплике,
+    а изменяющие - на основном сервере. После изменения запросы того же браузера
+    ``read_your_writes_window`` секунд тоже идут на основной сервер.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        session_pool: async_sessionmaker[AsyncSession],
+        replica_session_pool: Optional[async_sessionmaker[AsyncSession]] = None,
+        user_cache: Optional[UserCache] = None,
+        admin_cache: Optional[AdminUserCache] = None,
+        user_count: Optional[CachedCount] = None,
+    ) -> None:
         super().__init__(app)
         self.session_pool = session_pool
+        self.replica_session_pool = replica_session_pool
+        self.user_cache = user_cache
+        self.admin_cache = admin_cache
+        self.user_count = user_count
 
     async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
         # Исключаем запросы для статики
@@ -23,15 +52,38 @@ class DBSessionMiddleware(BaseHTTPMiddleware):
         if path.startswith("/admin/statics/"):
             return await call_next(request)
 
-        async with SQLSessionContext(self.session_pool) as repository:
+        token = connection_holder.set(f"{request.method} {_PATH_ID.sub('/{id}', path)}")
+        try:
+            return await self._dispatch(request, call_next)
+        finally:
+            connection_holder.reset(token)
+
+    async def _dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        reads = request.method in _READ_METHODS
+        intent = SessionIntent.WRITE
+        if reads and PRIMARY_COOKIE not in request.cookies:
+            intent = SessionIntent.READ
+        async with SQLSessionContext(
+            self.session_pool,
+            replica_pool=self.replica_session_pool,
+            intent=intent,
+        ) as repository:
             # Сессия нужная для работы встроенных методов по формированию views
             request.state.session = repository.session
             services = create_services(
                 repository=repository,
                 config=request.app.state.config,
+                user_cache=self.user_cache,
+                admin_cache=self.admin_cache,
+                user_count=self.user_count,
             )
             # Сохраняем сервисы как отдельные атрибуты
             request.state.user_service = services["user_service"]
             request.state.admin_user_service = services["admin_user_service"]
 
-            return await call_next(request)
+            response = await call_next(request)
+        if not reads and self.replica_session_pool is not None:
+            window = request.app.state.config.admin.read_your_writes_window
+            if window > 0:
+                response.set_cookie(PRIMARY_COOKIE, "1", max_age=window, httponly=True)
+        return response
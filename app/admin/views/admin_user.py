@@ -146,6 +146,15 @@ class AdminUserView(BaseModelView):
         #   потому что не смог найти созданный объект.
         return admin_user
 
+    async def after_edit(self, request: Request, obj: Any) -> None:
+        # Изменения (например, блокировка) должны сразу действовать во всех процессах
+        admin_user_service: AdminUserService = request.state.admin_user_service
+        await admin_user_service.invalidate(obj.username)
+
+    async def after_delete(self, request: Request, obj: Any) -> None:
+        admin_user_service: AdminUserService = request.state.admin_user_service
+        await admin_user_service.invalidate(obj.username)
+
     def can_create(self, request: Request) -> bool:
         return self.is_super_admin(request)
 
@@ -1,10 +1,11 @@
 import logging
-from typing import Any, get_args
+from typing import Any, Union, get_args
 
 from pydantic import ValidationError
 from starlette.requests import Request
 from starlette_admin import (
     BooleanField,
+    DateTimeField,
     EnumField,
     IntegerField,
     StringField,
@@ -12,7 +13,10 @@ from starlette_admin import (
 from starlette_admin.helpers import pydantic_error_to_form_validation_errors
 
 from app.admin.views.base import BaseModelView
+from app.models.config import AppConfig
 from app.models.dto.user import UserEditDto, UserCreateDto
+from app.services.postgres import CountMode
+from app.services.user import UserService
 from app.utils.custom_types import AllowedLanguages
 
 logger: logging.Logger = logging.getLogger(__name__)
@@ -50,6 +54,16 @@ class UserView(BaseModelView):
             label="Language",
             choices=get_args(AllowedLanguages),
         ),
+        DateTimeField(
+            name="last_seen_at",
+            label="Last seen",
+            read_only=True,
+        ),
+        IntegerField(
+            name="message_count",
+            label="Messages",
+            read_only=True,
+        ),
     ]
 
     ## Akeeper 17.10.2025
@@ -73,6 +87,30 @@ class UserView(BaseModelView):
 
     ## ~Akeeper
 
+    async def count(
+        self,
+        request: Request,
+        where: Union[dict[str, Any], str, None] = None,
+    ) -> int:
+        # Без фильтров большая таблица не пересчитывается целиком на каждой странице:
+        # выше порога пагинация строится по оценке планировщика
+        if not where:
+            config: AppConfig = request.app.state.config
+            user_service: UserService = request.state.user_service
+            estimate = await user_service.count(mode=CountMode.ESTIMATE)
+            if estimate >= config.admin.count_estimate_threshold:
+                return estimate
+        return await super().count(request, where)
+
+    async def after_edit(self, request: Request, obj: Any) -> None:
+        # Отредактированный пользователь больше не должен отдаваться из кэша бота
+        user_service: UserService = request.state.user_service
+        await user_service.invalidate(obj.telegram_id)
+
+    async def after_delete(self, request: Request, obj: Any) -> None:
+        user_service: UserService = request.state.user_service
+        await user_service.invalidate(obj.telegram_id)
+
     def can_create(self, request: Request) -> bool:
         return self.is_super_admin(request)
 
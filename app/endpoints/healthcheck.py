@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
 
 from app.models.dto.healthcheck import HealthcheckResponse
 
@@ -10,6 +11,11 @@ async def handle_liveness() -> HealthcheckResponse:
     return HealthcheckResponse.alive(service="bot")
 
 
-@router.get(path="/readiness")
-async def handle_readiness() -> HealthcheckResponse:
-    return HealthcheckResponse.ready(service="bot", ready=True)
+@router.get(path="/readiness", response_model=HealthcheckResponse)
+async def handle_readiness(request: Request) -> JSONResponse:
+    # Во время завершения работы экземпляр исключается из балансировки
+    response = HealthcheckResponse.ready(
+        service="bot",
+        ready=request.app.state.accepting_updates,
+    )
+    return JSONResponse(content=response.model_dump(), status_code=response.get_status_code())
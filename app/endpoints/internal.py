@@ -0,0 +1,64 @@
+import secrets
+from typing import Annotated, Any, Optional, cast
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from pydantic import SecretStr
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.services.postgres import get_pool_monitor
+
+
+async def verify_internal_token(
+    request: Request,
+    x_internal_token: Annotated[Optional[str], Header()] = None,
+) -> None:
+    token: Optional[SecretStr] = request.app.state.config.sql_alchemy.pool_monitor_token
+    if token is None or not token.get_secret_value():
+        # Без настроенного токена служебные данные процесса не выдаются вовсе
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    if not secrets.compare_digest(x_internal_token or "", token.get_secret_value()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+
+# Служебные данные процесса, доступны только с токеном ``ALCHEMY_POOL_MONITOR_TOKEN``
+router: APIRouter = APIRouter(
+    prefix="/internal",
+    include_in_schema=False,
+    dependencies=[Depends(verify_internal_token)],
+)
+
+# Имя пула в ответе и атрибут app.state с его пулом сессий
+_POOLS: dict[str, str] = {"primary": "session_pool", "replica": "replica_session_pool"}
+
+
+def _engines(request: Request) -> dict[str, AsyncEngine]:
+    engines: dict[str, AsyncEngine] = {}
+    for name, attribute in _POOLS.items():
+        session_pool: Optional[async_sessionmaker[AsyncSession]] = getattr(
+            request.app.state, attribute, None
+        )
+        if session_pool is not None:
+            engines[name] = session_pool.kw["bind"]
+    return engines
+
+
+@router.get(path="/db/pool")
+async def handle_pool_stats(request: Request) -> dict[str, Any]:
+    """Статистика пулов соединений этого процесса (с воркерами - обслужившего запрос)"""
+    stats: dict[str, Any] = {}
+    for name, engine in _engines(request).items():
+        monitor = get_pool_monitor(engine)
+        if monitor is not None:
+            stats[name] = monitor.snapshot(cast(QueuePool, engine.sync_engine.pool))
+    return stats
+
+
+@router.post(path="/db/pool/reset")
+async def handle_pool_stats_reset(request: Request) -> dict[str, Any]:
+    """Сбрасывает накопленную статистику, например перед нагрузочным тестом"""
+    for engine in _engines(request).values():
+        monitor = get_pool_monitor(engine)
+        if monitor is not None:
+            monitor.reset()
+    return {"ok": True}
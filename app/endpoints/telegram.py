@@ -1,88 +1,376 @@
 import asyncio
+import logging
 import secrets
-from typing import Annotated, Any, Optional
+from functools import partial
+from typing import Annotated, Any, Final, Optional, Sequence
 
+import msgspec
 from aiogram import Bot, Dispatcher
 from aiogram.methods import TelegramMethod
-from aiogram.types import Update
-from fastapi import APIRouter, Body, Header, HTTPException, status
+from aiogram.types import InputFile, Update
+from fastapi import APIRouter, Header, Request, Response, status
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.telegram.dedup import BotUpdateIdIndex
+from app.telegram.journal import JournalRecord, UpdateJournal
+from app.telegram.scheduler import UpdateScheduler, get_update_key
+
+logger: Final[logging.Logger] = logging.getLogger(name=__name__)
+
+SECRET_TOKEN_HEADER: Final[bytes] = b"x-telegram-bot-api-secret-token"
+
+
+def get_bot_path(path: str, bot: Bot, multi_bot: bool) -> str:
+    """Путь webhook, на который Telegram доставляет обновления бота"""
+    if not multi_bot:
+        return path
+    return f"{path}/{bot.id}"
 
 
 class TelegramRequestHandler:
     dispatcher: Dispatcher
     bot: Bot
+    bots: dict[int, Bot]
+    path: str
     secret_token: Optional[str]
-    _feed_update_tasks: set[asyncio.Task[Any]]
+    scheduler: UpdateScheduler
+    update_index: Optional[BotUpdateIdIndex]
+    reply_timeout: Optional[float]
+    journal: Optional[UpdateJournal]
+    accepting_updates: bool
 
     def __init__(
         self,
         dispatcher: Dispatcher,
-        bot: Bot,
+        bots: Sequence[Bot],
         path: str,
+        scheduler: UpdateScheduler,
         secret_token: Optional[str] = None,
+        update_index: Optional[BotUpdateIdIndex] = None,
+        reply_timeout: Optional[float] = None,
+        journal: Optional[UpdateJournal] = None,
     ) -> None:
         """
         Базовый обработчик для приема входящих webhook запросов от Telegram
-        и передачи их в Dispatcher
+        и передачи их в Dispatcher.
+
+        Один обработчик обслуживает все боты процесса: единственный бот принимает
+        обновления на ``path``, а при нескольких ботах каждый получает свой путь
+        ``{path}/{bot_id}``, по которому бот находится в индексе ``routes``.
+
+        Тело запроса не валидируется до ответа Telegram: оно только декодируется
+        через msgspec, а сборка ``Update`` выполняется в фоне. Обновления передаются
+        в ``UpdateScheduler`` с ключом чата, при переполнении очереди Telegram
+        получает 503 и повторяет доставку позже. Повторные доставки уже принятых
+        обновлений отбрасываются по ``update_index`` до постановки в очередь.
+
+        После начала завершения работы (``accepting_updates = False``) новые обновления
+        не принимаются: Telegram получает 503 и доставит их следующему экземпляру.
+
+        Если задан ``reply_timeout``, запрос ждет обработки обновления указанное
+        количество секунд, и метод, возвращенный обработчиком, отправляется прямо
+        в теле ответа webhook без отдельного запроса к Bot API.
+
+        Если задан ``journal``, принятое обновление записывается в журнал до ответа
+        Telegram и отмечается выполненным после обработки. Обновления, не обработанные
+        из-за падения процесса, повторяются при следующем запуске через ``replay``.
         """
+        if not bots:
+            raise ValueError("At least one bot is required")
         self.dispatcher = dispatcher
-        self.bot = bot
+        self.bot = bots[0]
+        self.bots = {bot.id: bot for bot in bots}
+        self.path = path
+        self.routes: dict[str, Bot] = {self.bot_path(bot): bot for bot in bots}
         self.secret_token = secret_token
         self.router: APIRouter = APIRouter(
             on_startup=(self.startup,),
             on_shutdown=(self.shutdown,),
             include_in_schema=False,
         )
-        self.router.add_api_route(path=path, endpoint=self.handle, methods=["POST"])
-        self._feed_update_tasks = set()
+        self.router.add_api_route(
+            path=path if len(self.bots) == 1 else f"{path}/{{bot_id}}",
+            endpoint=self.handle,
+            methods=["POST"],
+        )
+        self.scheduler = scheduler
+        self.update_index = update_index
+        self.reply_timeout = reply_timeout
+        self.journal = journal
+        self.accepting_updates = True
 
     async def startup(self) -> None:
+        self.scheduler.start()
         await self.dispatcher.emit_startup(
             dispatcher=self.dispatcher,
             bot=self.bot,
+            bots=list(self.bots.values()),
             **self.dispatcher.workflow_data,
         )
 
     async def shutdown(self) -> None:
         if self.dispatcher.get("shutdown_completed"):
             return
+        await self.scheduler.stop()
         await self.dispatcher.emit_shutdown(
             dispatcher=self.dispatcher,
             bot=self.bot,
+            bots=list(self.bots.values()),
             **self.dispatcher.workflow_data,
         )
         self.dispatcher["shutdown_completed"] = True
 
     async def close(self) -> None:
-        await self.bot.session.close()
+        for bot in self.bots.values():
+            await bot.session.close()
+
+    def bot_path(self, bot: Bot) -> str:
+        return get_bot_path(path=self.path, bot=bot, multi_bot=len(self.bots) > 1)
+
+    def resolve_bot(self, path: str) -> Optional[Bot]:
+        return self.routes.get(path)
 
     def verify_secret(self, telegram_secret_token: str) -> bool:
         if self.secret_token:
             return secrets.compare_digest(telegram_secret_token, self.secret_token)
         return True
 
-    async def _feed_update(self, update: Update) -> None:
-        result = await self.dispatcher.feed_update(
-            bot=self.bot,
+    @staticmethod
+    def build_reply(bot: Bot, result: TelegramMethod[Any]) -> Optional[bytes]:
+        """
+        Сериализует метод в тело ответа webhook.
+        Методы с загружаемыми файлами так отправить нельзя, для них возвращается ``None``.
+        """
+        files: dict[str, InputFile] = {}
+        payload: dict[str, Any] = {"method": result.__api_method__}
+        for key, value in result.model_dump(warnings=False).items():
+            value = bot.session.prepare_value(
+                value,
+                bot=bot,
+                files=files,
+                _dumps_json=False,
+            )
+            if value is not None:
+                payload[key] = value
+        if files:
+            return None
+        return msgspec.json.encode(payload)
+
+    async def replay(self, records: list[JournalRecord]) -> None:
+        """Повторно ставит в очередь необработанные обновления из журнала прошлого запуска"""
+        replayed = 0
+        for record in records:
+            bot = self.bots.get(record.bot_id)
+            if bot is None:
+                continue
+            data = msgspec.json.decode(record.payload, type=dict[str, Any])
+            if self.update_index is not None:
+                self.update_index[bot.id].add(record.update_id)
+            await self.scheduler.submit(
+                partial(self._feed_update, bot=bot, data=data),
+                key=get_update_key(data),
+            )
+            replayed += 1
+        if replayed:
+            logger.info("Replayed %d updates from journal", replayed)
+
+    async def _dispatch_update(self, bot: Bot, data: dict[str, Any]) -> Any:
+        try:
+            update = Update.model_validate(data, context={"bot": bot})
+        except ValidationError:
+            logger.exception("Failed to validate webhook update, update skipped")
+            return None
+        return await self.dispatcher.feed_update(
+            bot=bot,
             update=update,
             dispatcher=self.dispatcher,
         )
-        if isinstance(result, TelegramMethod):
-            await self.dispatcher.silent_call_request(bot=self.bot, result=result)
 
-    async def _handle_request_background(self, update: Update) -> None:
-        feed_update_task: asyncio.Task[Any] = asyncio.create_task(self._feed_update(update=update))
-        self._feed_update_tasks.add(feed_update_task)
-        feed_update_task.add_done_callback(self._feed_update_tasks.discard)
-
-    async def handle(
+    async def _feed_update(
         self,
-        update: Annotated[Update, Body()],
-        x_telegram_bot_api_secret_token: Annotated[str, Header()],
+        bot: Bot,
+        data: dict[str, Any],
+        reply: Optional[asyncio.Future[Optional[bytes]]] = None,
     ) -> None:
-        if not self.verify_secret(x_telegram_bot_api_secret_token):
-            raise HTTPException(
+        result: Any = None
+        cancelled = False
+        try:
+            result = await self._dispatch_update(bot=bot, data=data)
+        except asyncio.CancelledError:
+            # Прерванное обновление остается в журнале и будет повторено после перезапуска
+            cancelled = True
+            raise
+        finally:
+            if self.journal is not None and not cancelled:
+                self.journal.done(bot_id=bot.id, update_id=data.get("update_id", 0))
+            # Webhook запрос не должен ждать до дедлайна, если обработка упала
+            if reply is not None and not reply.done() and not isinstance(result, TelegramMethod):
+                reply.set_result(None)
+        if not isinstance(result, TelegramMethod):
+            return
+        if reply is not None and not reply.done():
+            # Webhook запрос еще ждет ответа: метод уйдет в его теле
+            body = self.build_reply(bot=bot, result=result)
+            reply.set_result(body)
+            if body is not None:
+                return
+        await self.dispatcher.silent_call_request(bot=bot, result=result)
+
+    def _is_duplicate(self, bot: Bot, update_id: Optional[int]) -> bool:
+        if self.update_index is None or update_id is None:
+            return False
+        index = self.update_index[bot.id]
+        if not index.is_duplicate(update_id):
+            return False
+        logger.warning(
+            "Duplicate update id=%d for bot id=%d dropped (total duplicates: %d)",
+            update_id,
+            bot.id,
+            index.duplicates,
+        )
+        return True
+
+    def _submit_update(
+        self,
+        bot: Bot,
+        data: dict[str, Any],
+        body: bytes,
+        reply: Optional[asyncio.Future[Optional[bytes]]] = None,
+    ) -> Optional[Response]:
+        """
+        Ставит обновление в очередь.
+        Возвращает готовый ответ, если обновление не было поставлено в очередь.
+        """
+        update_id: Optional[int] = data.get("update_id")
+        if self._is_duplicate(bot=bot, update_id=update_id):
+            return Response(status_code=status.HTTP_200_OK)
+        job = partial(self._feed_update, bot=bot, data=data, reply=reply)
+        if not self.scheduler.submit_nowait(job, key=get_update_key(data)):
+            logger.warning(
+                "Update queue is full (%d), update rejected",
+                self.scheduler.queue_size,
+            )
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"detail": "Update queue is full"},
+                headers={"Retry-After": "1"},
+            )
+        # Обновление считается полученным только после постановки в очередь,
+        # иначе повторная доставка после 503 была бы отброшена
+        if self.update_index is not None and update_id is not None:
+            self.update_index[bot.id].add(update_id)
+        if self.journal is not None:
+            self.journal.append(bot_id=bot.id, update_id=update_id or 0, payload=body)
+        return None
+
+    async def _wait_reply(
+        self,
+        reply: asyncio.Future[Optional[bytes]],
+        timeout: float,
+    ) -> Optional[bytes]:
+        try:
+            return await asyncio.wait_for(asyncio.shield(reply), timeout=timeout)
+        except asyncio.TimeoutError:
+            if reply.done():
+                return reply.result()
+            # Обработчик не успел: метод будет отправлен отдельным запросом
+            reply.cancel()
+            return None
+
+    async def process(self, bot: Bot, body: bytes, secret_token: Optional[str]) -> Response:
+        """Обрабатывает тело webhook запроса и возвращает ответ для Telegram."""
+        if not self.verify_secret(secret_token or ""):
+            return JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid secret token",
+                content={"detail": "Invalid secret token"},
+            )
+        if not self.accepting_updates:
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"detail": "Service is shutting down"},
+                headers={"Retry-After": "5"},
+            )
+        try:
+            data = msgspec.json.decode(body, type=dict[str, Any])
+        except msgspec.DecodeError:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"detail": "Malformed update"},
+            )
+
+        if self.reply_timeout is None:
+            # Валидация Update выполняется в фоне, ответ Telegram уходит сразу
+            response = self._submit_update(bot=bot, data=data, body=body)
+            return response or Response(status_code=status.HTTP_200_OK)
+
+        reply: asyncio.Future[Optional[bytes]] = asyncio.get_running_loop().create_future()
+        response = self._submit_update(bot=bot, data=data, body=body, reply=reply)
+        if response is not None:
+            return response
+        reply_body = await self._wait_reply(reply=reply, timeout=self.reply_timeout)
+        if reply_body is None:
+            return Response(status_code=status.HTTP_200_OK)
+        return Response(content=reply_body, media_type="application/json")
+
+    async def handle(
+        self,
+        request: Request,
+        x_telegram_bot_api_secret_token: Annotated[Optional[str], Header()] = None,
+    ) -> Response:
+        bot = self.resolve_bot(request.url.path)
+        if bot is None:
+            return JSONResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                content={"detail": "Unknown bot"},
             )
-        await self._handle_request_background(update=update)
+        return await self.process(
+            bot=bot,
+            body=await request.body(),
+            secret_token=x_telegram_bot_api_secret_token,
+        )
+
+
+class TelegramWebhookMiddleware:
+    """
+    Чистое ASGI middleware для приема webhook запросов Telegram.
+
+    Должно быть добавлено последним (самым внешним): запросы на пути webhook ботов
+    обрабатываются сразу ``TelegramRequestHandler``, минуя сессии, CORS и сессию БД
+    админ-панели, остальные запросы передаются дальше без изменений.
+    """
+
+    def __init__(self, app: ASGIApp, handler: TelegramRequestHandler) -> None:
+        self.app = app
+        self.handler = handler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            return await self.app(scope, receive, send)
+        bot = self.handler.resolve_bot(scope["path"])
+        if bot is None:
+            return await self.app(scope, receive, send)
+
+        secret_token: Optional[str] = None
+        for name, value in scope["headers"]:
+            if name == SECRET_TOKEN_HEADER:
+                secret_token = value.decode("latin-1")
+                break
+
+        response = await self.handler.process(
+            bot=bot,
+            body=await self._read_body(receive),
+            secret_token=secret_token,
+        )
+        await response(scope, receive, send)
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        chunks: list[bytes] = []
+        more_body = True
+        while more_body:
+            message: Message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        return b"".join(chunks)
@@ -1,14 +1,16 @@
 from .admin import setup_admin
 from .app_config import create_app_config
 from .services import create_services
-from .session_pool import create_session_pool
-from .telegram import create_bot, create_dispatcher
+from .session_pool import create_replica_session_pool, create_session_pool
+from .telegram import create_bot, create_bots, create_dispatcher
 
 __all__ = [
     "create_app_config",
+    "create_replica_session_pool",
     "create_session_pool",
     "setup_admin",
     "create_services",
     "create_bot",
+    "create_bots",
     "create_dispatcher",
 ]
@@ -29,6 +29,10 @@ class CustomAdmin(Admin):
             auth_provider: Optional[BaseAuthProvider] = None,
             middlewares: Optional[Sequence[Middleware]] = None,
             session_pool=None,
+            replica_session_pool=None,
+            user_cache=None,
+            admin_cache=None,
+            user_count=None,
     ) -> None:
         super(Admin, self).__init__(
             title=title,
@@ -45,7 +49,14 @@ class CustomAdmin(Admin):
         self.middlewares = [] if self.middlewares is None else list(self.middlewares)
         self.middlewares.insert(
             0,
-            Middleware(DBSessionMiddleware, session_pool=session_pool),
+            Middleware(
+                DBSessionMiddleware,
+                session_pool=session_pool,
+                replica_session_pool=replica_session_pool,
+                user_cache=user_cache,
+                admin_cache=admin_cache,
+                user_count=user_count,
+            ),
         )
 
     def mount_to(
@@ -76,6 +87,10 @@ def setup_admin(app: FastAPI, config: AppConfig) -> FastAPI:
         auth_provider=CustomAuthProvider(allow_paths=["/login"]),
         config=config,
         session_pool=session_pool,
+        replica_session_pool=app.state.replica_session_pool,
+        user_cache=app.state.user_cache,
+        admin_cache=app.state.admin_cache,
+        user_count=app.state.user_count,
         middlewares=[
             Middleware(
                 SessionMiddleware,
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from typing import Any, TypedDict
+from typing import Any, Optional, TypedDict
 
 from app.models.config import AppConfig
+from app.services.activity import UserActivityBuffer
+from app.services.cache import AdminUserCache, UserCache
+from app.services.counter import CachedCount
 from app.services.postgres.repositories.base import BaseRepository
 from app.services.user import AdminUserService, UserService
 
@@ -15,14 +18,26 @@ class Services(TypedDict):
 def create_services(
     repository: BaseRepository,
     config: AppConfig,
+    user_cache: Optional[UserCache] = None,
+    admin_cache: Optional[AdminUserCache] = None,
+    user_activity: Optional[UserActivityBuffer] = None,
+    user_count: Optional[CachedCount] = None,
 ) -> Services:
     service_kwargs: dict[str, Any] = {
         "repository": repository,
         "config": config,
     }
 
-    user_service: UserService = UserService(**service_kwargs)
-    admin_user_service: AdminUserService = AdminUserService(**service_kwargs)
+    user_service: UserService = UserService(
+        **service_kwargs,
+        user_cache=user_cache,
+        user_activity=user_activity,
+        user_count=user_count,
+    )
+    admin_user_service: AdminUserService = AdminUserService(
+        **service_kwargs,
+        admin_cache=admin_cache,
+    )
 
     return Services(
         user_service=user_service,
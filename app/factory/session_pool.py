@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Any, Optional
+
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -8,20 +10,47 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from app.models.config import AppConfig
+from app.services.postgres import (
+    MonitoredQueuePool,
+    WriteTrackingSession,
+    setup_pool_monitor,
+)
 
 
-def get_engine(config: AppConfig) -> AsyncEngine:
-    return create_async_engine(
-        url=config.postgres.build_url(),
+def get_engine(config: AppConfig, replica: bool = False, **kwargs: Any) -> AsyncEngine:
+    if config.sql_alchemy.pool_monitor:
+        kwargs.setdefault("poolclass", MonitoredQueuePool)
+    engine = create_async_engine(
+        url=config.postgres.build_url(replica=replica),
         echo=config.sql_alchemy.echo,
         echo_pool=config.sql_alchemy.echo_pool,
         pool_size=config.sql_alchemy.pool_size,
         max_overflow=config.sql_alchemy.max_overflow,
         pool_timeout=config.sql_alchemy.pool_timeout,
         pool_recycle=config.sql_alchemy.pool_recycle,
+        **kwargs,
+    )
+    if config.sql_alchemy.pool_monitor:
+        setup_pool_monitor(engine)
+    return engine
+
+
+def create_session_pool(
+    config: AppConfig,
+    replica: bool = False,
+) -> async_sessionmaker[AsyncSession]:
+    # Транзакции без записи не фиксируются, а откатываются (см. ``SQLSessionContext``)
+    return async_sessionmaker(
+        get_engine(config, replica=replica),
+        sync_session_class=WriteTrackingSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
     )
 
 
-def create_session_pool(config: AppConfig) -> async_sessionmaker[AsyncSession]:
-    engine = get_engine(config)
-    return async_sessionmaker(engine, expire_on_commit=False, autocommit=False, autoflush=False)
+def create_replica_session_pool(config: AppConfig) -> Optional[async_sessionmaker[AsyncSession]]:
+    """Пул сессий реплики со своим пулом соединений, ``None``, если реплика не задана"""
+    if config.postgres.replica_host is None:
+        return None
+    return create_session_pool(config=config, replica=True)
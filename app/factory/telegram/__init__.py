@@ -1,5 +1,5 @@
-from .bot import create_bot
+from .bot import create_bot, create_bots
 from .dispatcher import create_dispatcher
 from .fastapi import setup_fastapi
 
-__all__ = ["create_bot", "create_dispatcher", "setup_fastapi"]
+__all__ = ["create_bot", "create_bots", "create_dispatcher", "setup_fastapi"]
@@ -1,19 +1,40 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from aiogram import Bot
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.base import BaseSession
 from aiogram.enums import ParseMode
 
 if TYPE_CHECKING:
     from app.models.config import AppConfig
 
 
-def create_bot(config: AppConfig) -> Bot:
+def create_bot(
+    config: AppConfig,
+    token: Optional[str] = None,
+    session: Optional[BaseSession] = None,
+) -> Bot:
     return Bot(
-        token=config.telegram.bot_token.get_secret_value(),
+        token=token or config.telegram.bot_token.get_secret_value(),
+        session=session,
         default=DefaultBotProperties(
             parse_mode=ParseMode.HTML,
         ),
     )
+
+
+def create_bots(config: AppConfig) -> list[Bot]:
+    """
+    Создает всех ботов из конфигурации: основного и дополнительных.
+    Боты используют одну HTTP сессию и общий пул соединений aiohttp.
+
+    :return: Список ботов, первый из них - основной
+    """
+    session: AiohttpSession = AiohttpSession()
+    return [
+        create_bot(config=config, token=token, session=session)
+        for token in config.telegram.bot_tokens
+    ]
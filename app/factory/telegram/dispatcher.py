@@ -1,32 +1,115 @@
 from __future__ import annotations
 
-from aiogram import Bot, Dispatcher
+from typing import Optional
+
+from aiogram import Bot
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.factory.session_pool import create_session_pool
+from app.factory.session_pool import create_replica_session_pool, create_session_pool
 from app.models.config import AppConfig
+from app.services.activity import UserActivityBuffer
+from app.services.cache import ADMIN_USER_CACHE, USER_CACHE, AdminUserCache, UserCache
+from app.services.counter import CachedCount
+from app.services.postgres import CacheInvalidationBus
+from app.telegram.dedup import BotUpdateIdIndex
+from app.telegram.dispatcher import SchedulingDispatcher
 from app.telegram.handlers import main
-from app.telegram.middlewares import DBSessionMiddleware, UserMiddleware
+from app.telegram.journal import UpdateJournal
+from app.telegram.middlewares import (
+    DBSessionMiddleware,
+    DBSessionModeMiddleware,
+    DeduplicationMiddleware,
+    UserMiddleware,
+)
+from app.telegram.scheduler import UpdateScheduler
 
 
-def create_dispatcher(bot: Bot, config: AppConfig) -> Dispatcher:
+def create_dispatcher(bot: Bot, config: AppConfig) -> SchedulingDispatcher:
     """
     Создает и настраивает Dispatcher с установленными middleware и роутерами
 
     :return: Настроенный ``Dispatcher``
     """
     session_pool: async_sessionmaker[AsyncSession] = create_session_pool(config=config)
+    replica_session_pool: Optional[async_sessionmaker[AsyncSession]] = create_replica_session_pool(
+        config=config
+    )
+    update_scheduler: UpdateScheduler = UpdateScheduler(
+        lanes=config.telegram.update_lanes,
+        queue_size=config.telegram.update_queue_size,
+    )
+    update_index: BotUpdateIdIndex = BotUpdateIdIndex(
+        capacity=config.telegram.update_dedup_capacity,
+    )
+    user_cache: Optional[UserCache] = None
+    if config.common.user_cache_capacity > 0:
+        user_cache = UserCache(
+            capacity=config.common.user_cache_capacity,
+            ttl=config.common.user_cache_ttl,
+        )
+    admin_cache: Optional[AdminUserCache] = None
+    if config.common.admin_cache_capacity > 0:
+        admin_cache = AdminUserCache(
+            capacity=config.common.admin_cache_capacity,
+            ttl=config.common.admin_cache_ttl,
+        )
+    invalidation_bus: Optional[CacheInvalidationBus] = None
+    if user_cache is not None or admin_cache is not None:
+        invalidation_bus = CacheInvalidationBus(url=config.postgres.build_url())
+        if user_cache is not None:
+            invalidation_bus.register(USER_CACHE, user_cache)
+        if admin_cache is not None:
+            invalidation_bus.register(ADMIN_USER_CACHE, admin_cache)
+    user_activity: Optional[UserActivityBuffer] = None
+    if config.common.user_activity_tracking:
+        user_activity = UserActivityBuffer(
+            session_pool=session_pool,
+            flush_interval=config.common.user_activity_flush_interval,
+            batch_size=config.common.user_activity_batch_size,
+        )
+    user_count: Optional[CachedCount] = None
+    if config.common.user_count_ttl > 0:
+        user_count = CachedCount(
+            # Фоновый пересчет не нагружает основной сервер, если есть реплика
+            session_pool=replica_session_pool or session_pool,
+            count=lambda repository: repository.users.count(),
+            ttl=config.common.user_count_ttl,
+        )
+    update_journal: Optional[UpdateJournal] = None
+    if config.telegram.update_journal_path:
+        update_journal = UpdateJournal(
+            path=config.telegram.update_journal_path,
+            segment_size=config.telegram.update_journal_segment_size,
+            fsync_interval=config.telegram.update_journal_fsync_interval,
+        )
 
     # noinspection PyArgumentList
-    dispatcher: Dispatcher = Dispatcher(
+    dispatcher: SchedulingDispatcher = SchedulingDispatcher(
+        update_scheduler=update_scheduler,
+        update_journal=update_journal,
         name="main_dispatcher",
         config=config,
         session_pool=session_pool,
     )
 
     dispatcher.workflow_data["session_pool"] = session_pool
+    dispatcher.workflow_data["replica_session_pool"] = replica_session_pool
+    dispatcher.workflow_data["update_scheduler"] = update_scheduler
+    dispatcher.workflow_data["update_index"] = update_index
+    dispatcher.workflow_data["update_journal"] = update_journal
+    dispatcher.workflow_data["user_cache"] = user_cache
+    dispatcher.workflow_data["admin_cache"] = admin_cache
+    dispatcher.workflow_data["invalidation_bus"] = invalidation_bus
+    dispatcher.workflow_data["user_activity"] = user_activity
+    dispatcher.workflow_data["user_count"] = user_count
     dispatcher.include_routers(main.router)
+    if not config.telegram.use_webhook:
+        # В webhook режиме дубликаты отсекаются endpoint до постановки в очередь
+        dispatcher.update.outer_middleware(DeduplicationMiddleware(update_index))
     dispatcher.update.outer_middleware(DBSessionMiddleware())
-    dispatcher.update.outer_middleware(UserMiddleware())
+    # Пользователь загружается только для событий, у которых нашелся обработчик:
+    # остальные обновления не обращаются к БД и не занимают соединение из пула
+    UserMiddleware().setup_inner(router=dispatcher)
+    DBSessionModeMiddleware().setup_inner(router=dispatcher)
 
     return dispatcher
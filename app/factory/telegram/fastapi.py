@@ -4,13 +4,23 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.admin.middlewares import DBSessionMiddleware
-from app.endpoints import healthcheck
+from app.endpoints import healthcheck, internal
 from app.models.config import AppConfig
 
 
-def setup_fastapi(app: FastAPI, dispatcher: Dispatcher, bot: Bot, config: AppConfig) -> FastAPI:
+def setup_fastapi(
+    app: FastAPI,
+    dispatcher: Dispatcher,
+    bots: list[Bot],
+    config: AppConfig,
+) -> FastAPI:
     app.add_middleware(
-        DBSessionMiddleware, session_pool=dispatcher.workflow_data.get("session_pool")
+        DBSessionMiddleware,
+        session_pool=dispatcher.workflow_data.get("session_pool"),
+        replica_session_pool=dispatcher.workflow_data.get("replica_session_pool"),
+        user_cache=dispatcher.workflow_data.get("user_cache"),
+        admin_cache=dispatcher.workflow_data.get("admin_cache"),
+        user_count=dispatcher.workflow_data.get("user_count"),
     )
     app.add_middleware(
         SessionMiddleware,
@@ -27,9 +37,13 @@ def setup_fastapi(app: FastAPI, dispatcher: Dispatcher, bot: Bot, config: AppCon
         allow_headers=config.middleware.cors_allow_headers,
     )
     app.include_router(healthcheck.router)
+    if config.sql_alchemy.pool_monitor:
+        app.include_router(internal.router)
     for key, value in dispatcher.workflow_data.items():
         setattr(app.state, key, value)
     app.state.dispatcher = dispatcher
-    app.state.bot = bot
+    app.state.bot = bots[0]
+    app.state.bots = bots
+    app.state.accepting_updates = True
     app.state.shutdown_completed = False
     return app
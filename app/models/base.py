@@ -1,7 +1,8 @@
-from typing import Any
+from operator import attrgetter, itemgetter
+from typing import Any, ClassVar, Mapping, Optional, Self
 
 from pydantic import BaseModel as _BaseModel
-from pydantic import ConfigDict, PrivateAttr
+from pydantic import ConfigDict
 
 
 class PydanticModel(_BaseModel):
@@ -12,13 +13,89 @@ class PydanticModel(_BaseModel):
     )
 
 
-class ActiveRecordModel(PydanticModel):
-    __updated: dict[str, Any] = PrivateAttr(default_factory=dict)
+class ActiveRecordModel:
+    """
+    Легкая DTO на ``__slots__`` для горячих путей: создается из строки БД без валидации,
+    pydantic (``PydanticModel``) остается на границах доверия, например в формах админ-панели.
+
+    Поля - ``__slots__`` подкласса в порядке аргументов его ``__init__``, который
+    в конце вызывает ``_commit``. Изменения отслеживаются сравнением со значениями,
+    запомненными при создании: присваивание атрибута ничего не стоит, а ``model_state``
+    содержит только поля, значение которых действительно изменилось.
+    """
+
+    # Поле -> атрибут модели SQLAlchemy и колонка, если их имена отличаются
+    __aliases__: ClassVar[dict[str, str]] = {}
+    # Вычисляются для каждого подкласса
+    __fields__: ClassVar[tuple[str, ...]]
+    __columns__: ClassVar[tuple[str, ...]]
+    _get_values: ClassVar["attrgetter[Any]"]
+
+    _snapshot: tuple[Any, ...]
+
+    __slots__ = ("_snapshot",)
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.__fields__ = tuple(cls.__dict__.get("__slots__", ()))
+        cls.__columns__ = tuple(cls.__aliases__.get(name, name) for name in cls.__fields__)
+        cls._get_values = attrgetter(*cls.__fields__)
+
+    def __init__(self, *args: Any) -> None:
+        # Подклассы объявляют собственный ``__init__`` с аргументами-полями
+        for name, value in zip(self.__fields__, args, strict=True):
+            setattr(self, name, value)
+        self._commit()
+
+    def _commit(self) -> None:
+        """Запоминает текущие значения полей как исходные"""
+        self._snapshot = self._get_values(self)
+
+    @classmethod
+    def from_attributes(cls, obj: Any) -> Self:
+        """DTO из объекта с атрибутами-полями, например модели SQLAlchemy"""
+        return cls(*attrgetter(*cls.__columns__)(obj))
+
+    @classmethod
+    def from_mapping(cls, row: Mapping[str, Any]) -> Self:
+        """DTO из строки результата с колонками-полями, например ``asyncpg.Record``"""
+        return cls(*itemgetter(*cls.__columns__)(row))
 
     @property
     def model_state(self) -> dict[str, Any]:
-        return self.__updated
+        values = zip(self.__fields__, self._get_values(self), self._snapshot)
+        return {
+            name: value
+            for name, value, initial in values
+            if value is not initial and value != initial
+        }
+
+    def model_dump(self, *, by_alias: bool = False) -> dict[str, Any]:
+        names = self.__columns__ if by_alias else self.__fields__
+        return dict(zip(names, self._get_values(self)))
+
+    def model_copy(self, *, update: Optional[dict[str, Any]] = None) -> Self:
+        # Копия наследует изменения оригинала, а поля из ``update`` не считаются измененными
+        copied = type(self)(*self._get_values(self))
+        snapshot = self._snapshot
+        if update:
+            for name, value in update.items():
+                setattr(copied, name, value)
+            snapshot = tuple(
+                update.get(name, initial) for name, initial in zip(self.__fields__, snapshot)
+            )
+        copied._snapshot = snapshot
+        return copied
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        values: tuple[Any, ...] = self._get_values(self)
+        other_values: tuple[Any, ...] = self._get_values(other)
+        return values == other_values
 
-    def __setattr__(self, name: str, value: Any) -> None:
-        super().__setattr__(name, value)
-        self.__updated[name] = value
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name}={value!r}" for name, value in zip(self.__fields__, self._get_values(self))
+        )
+        return f"{type(self).__name__}({fields})"
@@ -2,4 +2,9 @@ from .base import EnvSettings
 
 
 class AdminConfig(EnvSettings, env_prefix="ADMIN_"):
-    pass
+    # Начиная с этой оценки числа строк списки пользователей в админ-панели
+    # показывают оценку планировщика вместо точного count(*)
+    count_estimate_threshold: int = 100000
+    # Сколько секунд после изменения через админ-панель запросы того же браузера читают
+    # с основного сервера, а не с реплики, чтобы администратор сразу видел свои изменения
+    read_your_writes_window: int = 10
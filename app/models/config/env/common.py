@@ -3,3 +3,18 @@ from .base import EnvSettings
 
 class CommonConfig(EnvSettings, env_prefix="COMMON_"):
     log_level: str = "INFO"
+    # Размер кэша пользователей в памяти процесса. 0 - кэш отключен
+    user_cache_capacity: int = 10000
+    # Время жизни записи в кэше пользователей, сек.
+    user_cache_ttl: float = 300
+    # Размер и время жизни записи кэша администраторов. 0 - кэш отключен
+    admin_cache_capacity: int = 100
+    admin_cache_ttl: float = 60
+    # Отложенная пакетная запись активности пользователей (last_seen_at, счетчик сообщений,
+    # изменения профиля): интервал записи, сек., и размер пачки, при котором она пишется раньше
+    user_activity_tracking: bool = True
+    user_activity_flush_interval: float = 5
+    user_activity_batch_size: int = 1000
+    # Время, сек., через которое кэшированное число пользователей (CountMode.CACHED)
+    # пересчитывается в фоне, 0 - всегда считать точно
+    user_count_ttl: float = 60
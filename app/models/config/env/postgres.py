@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import SecretStr
 from sqlalchemy import URL
 
@@ -11,13 +13,23 @@ class PostgresConfig(EnvSettings, env_prefix="POSTGRES_"):
     port: int
     user: str
     data: str
+    # Реплика для чтения (потоковая репликация) с той же БД и учетными данными.
+    # Не задана - все запросы выполняются на основном сервере
+    replica_host: Optional[str] = None
+    # Порт реплики, по умолчанию как у основного сервера
+    replica_port: Optional[int] = None
 
-    def build_url(self) -> URL:
+    def build_url(self, replica: bool = False) -> URL:
+        host, port = self.host, self.port
+        if replica:
+            if self.replica_host is None:
+                raise ValueError("Postgres replica is not configured")
+            host, port = self.replica_host, self.replica_port or self.port
         return URL.create(
             drivername="postgresql+asyncpg",
             username=self.user,
             password=self.password.get_secret_value(),
-            host=self.host,
-            port=self.port,
+            host=host,
+            port=port,
             database=self.db,
         )
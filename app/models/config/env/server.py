@@ -5,6 +5,8 @@ class ServerConfig(EnvSettings, env_prefix="SERVER_"):
     port: int
     host: str
     url: str
+    # Количество процессов webhook сервера, разделяющих один сокет
+    workers: int = 1
 
     def build_url(self, path: str) -> str:
         return f"{self.url}{path}"
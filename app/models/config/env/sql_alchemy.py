@@ -1,3 +1,7 @@
+from typing import Optional
+
+from pydantic import SecretStr
+
 from .base import EnvSettings
 
 
@@ -8,3 +12,13 @@ class SQLAlchemyConfig(EnvSettings, env_prefix="ALCHEMY_"):
     max_overflow: int = 25
     pool_timeout: int = 10
     pool_recycle: int = 3600
+    # Частые выборки пользователей по id, telegram_id и администраторов по username
+    # читаются драйвером asyncpg сразу в DTO, без ORM. Такие запросы не проходят через
+    # события движка (в том числе echo) и не видят не записанные в БД изменения сессии
+    raw_lookups: bool = False
+    # Статистика пула соединений: ожидание и удержание соединений, пиковая загрузка
+    # и обработчики, дольше всех удерживавшие соединение (``/internal/db/pool``)
+    pool_monitor: bool = False
+    # Токен доступа к ``/internal/db/pool`` в заголовке ``X-Internal-Token``.
+    # Без него статистика не выдается (404)
+    pool_monitor_token: Optional[SecretStr] = None
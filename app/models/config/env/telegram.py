@@ -1,15 +1,49 @@
+from typing import Optional
+
 from pydantic import SecretStr
 
-from app.utils.custom_types import StringList
+from app.utils.custom_types import ListSecretStr, SecretStringList, StringList
 
 from .base import EnvSettings
 
 
 class TelegramConfig(EnvSettings, env_prefix="TELEGRAM_"):
     bot_token: SecretStr
+    # Токены дополнительных ботов, обслуживаемых тем же процессом
+    extra_bot_tokens: SecretStringList = ListSecretStr([])
     locales: StringList
     drop_pending_updates: bool
     use_webhook: bool
     reset_webhook: bool
     webhook_path: str
     webhook_secret: SecretStr
+    # Сколько секунд webhook запрос ждет ответа обработчика, чтобы вернуть метод
+    # в теле ответа. None - ответ Telegram отправляется сразу
+    webhook_reply_timeout: Optional[float] = None
+
+    # Обработка обновлений: количество параллельных очередей (lanes) и их общая емкость
+    update_lanes: int = 25
+    update_queue_size: int = 1000
+
+    # Количество последних update_id, по которым отбрасываются повторные доставки
+    update_dedup_capacity: int = 10000
+
+    # Сколько секунд при завершении работы ждать обработки уже принятых обновлений
+    update_drain_timeout: float = 8.0
+
+    # Каталог журнала обновлений для повторной обработки после падения. None - журнал отключен
+    update_journal_path: Optional[str] = None
+    # Размер сегмента журнала в байтах, после которого начинается новый сегмент
+    update_journal_segment_size: int = 16 * 1024 * 1024
+    # Интервал в секундах, с которым журнал сбрасывается на диск (fsync)
+    update_journal_fsync_interval: float = 0.05
+
+    # Polling только в одной реплике, выбранной через advisory блокировку Postgres
+    polling_leader_election: bool = False
+    # Как часто резервная реплика пытается стать ведущей и ведущая проверяет блокировку, сек.
+    polling_leader_interval: float = 2.0
+
+    @property
+    def bot_tokens(self) -> list[str]:
+        """Токены всех ботов процесса, первым идет основной бот"""
+        return [token.get_secret_value() for token in (self.bot_token, *self.extra_bot_tokens)]
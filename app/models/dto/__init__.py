@@ -1,3 +1,3 @@
-from .user import AdminUserDto, UserDto
+from .user import AdminUserDto, UserDto, UserImportRecord
 
-__all__ = ["AdminUserDto", "UserDto"]
+__all__ = ["AdminUserDto", "UserDto", "UserImportRecord"]
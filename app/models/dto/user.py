@@ -1,7 +1,7 @@
-from typing import Optional
+from datetime import datetime
+from typing import NamedTuple, Optional
 
 import bcrypt
-from pydantic import Field
 
 from app.models.base import ActiveRecordModel, PydanticModel
 from app.utils.custom_types import Str8, Str5, AllowedLanguages, EntityId
@@ -11,14 +11,41 @@ class AdminUserDto(ActiveRecordModel):
     user_id: int
     name: str
     username: str
-    password_hash: str = Field(..., alias="password")
-    is_blocked: bool = False
+    password_hash: str
+    is_blocked: bool
 
     ## Akeeper 16.10.2025
-    is_super_admin: bool = False
+    is_super_admin: bool
 
     ## ~Akeeper
 
+    __aliases__ = {"password_hash": "password"}
+    __slots__ = (
+        "user_id",
+        "name",
+        "username",
+        "password_hash",
+        "is_blocked",
+        "is_super_admin",
+    )
+
+    def __init__(
+        self,
+        user_id: int,
+        name: str,
+        username: str,
+        password_hash: str,
+        is_blocked: bool = False,
+        is_super_admin: bool = False,
+    ) -> None:
+        self.user_id = user_id
+        self.name = name
+        self.username = username
+        self.password_hash = password_hash
+        self.is_blocked = is_blocked
+        self.is_super_admin = is_super_admin
+        self._commit()
+
     def check_password(self, password: str) -> bool:
         """
         Проверка, соответствует ли предоставленный пароль сохраненному хешу.
@@ -51,9 +78,46 @@ class UserDto(ActiveRecordModel):
     telegram_id: int
     name: str
     language: str
-    username: Optional[str] = None
-    language_code: Optional[str] = None
-    bot_blocked: bool = False
+    username: Optional[str]
+    language_code: Optional[str]
+    bot_blocked: bool
+    last_seen_at: Optional[datetime]
+    message_count: int
+
+    __slots__ = (
+        "user_id",
+        "telegram_id",
+        "name",
+        "language",
+        "username",
+        "language_code",
+        "bot_blocked",
+        "last_seen_at",
+        "message_count",
+    )
+
+    def __init__(
+        self,
+        user_id: int,
+        telegram_id: int,
+        name: str,
+        language: str,
+        username: Optional[str] = None,
+        language_code: Optional[str] = None,
+        bot_blocked: bool = False,
+        last_seen_at: Optional[datetime] = None,
+        message_count: int = 0,
+    ) -> None:
+        self.user_id = user_id
+        self.telegram_id = telegram_id
+        self.name = name
+        self.language = language
+        self.username = username
+        self.language_code = language_code
+        self.bot_blocked = bot_blocked
+        self.last_seen_at = last_seen_at
+        self.message_count = message_count
+        self._commit()
 
 
 ## Akeeper 17.10.2025
@@ -69,3 +133,14 @@ class UserEditDto(PydanticModel):
     name: Str5
     bot_blocked: bool
 ## ~Akeeper
+
+
+class UserImportRecord(NamedTuple):
+    """Пользователь для массового импорта, порядок полей совпадает с колонками COPY"""
+
+    telegram_id: int
+    name: str
+    language: str
+    username: Optional[str] = None
+    language_code: Optional[str] = None
+    bot_blocked: bool = False
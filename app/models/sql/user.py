@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 
 import bcrypt
@@ -40,7 +41,7 @@ class AdminUser(Base, TimestampMixin):
         return f"{self.name}"
 
     def dto(self) -> AdminUserDto:
-        return AdminUserDto.model_validate(self)
+        return AdminUserDto.from_attributes(self)
 
     @validates("username")
     def validate_username(self, key: str, username: str) -> str:
@@ -77,9 +78,12 @@ class User(Base, TimestampMixin):
     language: Mapped[str] = mapped_column(String(length=2))
     language_code: Mapped[Optional[str]] = mapped_column()
     bot_blocked: Mapped[bool] = mapped_column(default=False)
+    # Обновляются пакетами из UserActivityBuffer
+    last_seen_at: Mapped[Optional[datetime]] = mapped_column()
+    message_count: Mapped[int] = mapped_column(default=0, server_default="0")
 
     def dto(self) -> UserDto:
-        return UserDto.model_validate(self)
+        return UserDto.from_attributes(self)
 
     def __str__(self) -> str:
         return f"{self.__class__.__name__}(user_id={self.user_id}, name={self.name})"
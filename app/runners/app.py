@@ -10,10 +10,10 @@ from aiogram import Bot, Dispatcher
 from fastapi import FastAPI
 from uvicorn import server
 
-from app.endpoints.telegram import TelegramRequestHandler
+from app.endpoints.telegram import TelegramRequestHandler, TelegramWebhookMiddleware
 from app.factory.admin import setup_admin
 from app.factory.telegram import setup_fastapi
-from app.runners.lifespan import emit_aiogram_shutdown
+from app.runners.lifespan import start_graceful_shutdown
 from app.runners.polling import polling_lifespan, polling_startup
 from app.runners.webhook import webhook_shutdown, webhook_startup, webhook_lifespan
 
@@ -21,51 +21,79 @@ if TYPE_CHECKING:
     from app.models.config import AppConfig
 
 
-# noinspection PyProtectedMember
 def handle_sigterm(*_: Any, app: FastAPI) -> None:
-    if app.state.is_polling:
-        app.state.dispatcher._signal_stop_polling(sig=signal.SIGTERM)
-        app.state.shutdown_completed = True
-    else:
-        asyncio.create_task(emit_aiogram_shutdown(app=app))
+    """
+    Сначала завершает обработку обновлений (с ожиданием уже принятых),
+    и только после этого останавливает HTTP сервер.
+    """
+
+    def stop_server(_: asyncio.Task[None]) -> None:
+        app.state.server.should_exit = True
+
+    start_graceful_shutdown(app=app).add_done_callback(stop_server)
 
 
 def run_app(app: FastAPI, config: AppConfig) -> None:
     server.HANDLED_SIGNALS = (signal.SIGINT,)  # type: ignore
     signal.signal(signal.SIGTERM, partial(handle_sigterm, app=app))
-    return uvicorn.run(
-        app=app,
-        host=config.server.host,
-        port=config.server.port,
-        access_log=False,
-        log_config=None,
-        forwarded_allow_ips="*",
+    app.state.server = uvicorn.Server(
+        config=uvicorn.Config(
+            app=app,
+            host=config.server.host,
+            port=config.server.port,
+            access_log=False,
+            log_config=None,
+            forwarded_allow_ips="*",
+        ),
     )
+    app.state.server.run()
 
 
-def run_polling(dispatcher: Dispatcher, bot: Bot, config: AppConfig) -> None:
+def run_polling(dispatcher: Dispatcher, bots: list[Bot], config: AppConfig) -> None:
     dispatcher.workflow_data.update(is_polling=True)
     app: FastAPI = FastAPI(lifespan=polling_lifespan)
-    setup_fastapi(app=app, bot=bot, dispatcher=dispatcher, config=config)
+    setup_fastapi(app=app, bots=bots, dispatcher=dispatcher, config=config)
     setup_admin(app=app, config=config)
     dispatcher.startup.register(polling_startup)
     return run_app(app=app, config=config)
 
 
-def run_webhook(dispatcher: Dispatcher, bot: Bot, config: AppConfig) -> None:
-    dispatcher.workflow_data.update(is_polling=False)
+def create_webhook_app(
+    dispatcher: Dispatcher,
+    bots: list[Bot],
+    config: AppConfig,
+    manage_webhook: bool = True,
+) -> FastAPI:
+    """
+    Собирает приложение webhook режима.
+
+    :param manage_webhook: Регистрировать и удалять webhook при запуске и остановке.
+        Отключается в процессах-воркерах, где этим занимается управляющий процесс
+    """
+    dispatcher.workflow_data.update(is_polling=False, manage_webhook=manage_webhook)
     app: FastAPI = FastAPI(lifespan=webhook_lifespan)
-    setup_fastapi(app=app, bot=bot, dispatcher=dispatcher, config=config)
+    setup_fastapi(app=app, bots=bots, dispatcher=dispatcher, config=config)
     setup_admin(app=app, config=config)
     handler: TelegramRequestHandler = TelegramRequestHandler(
         dispatcher=dispatcher,
-        bot=bot,
+        bots=bots,
         path=config.telegram.webhook_path,
+        scheduler=dispatcher["update_scheduler"],
         secret_token=config.telegram.webhook_secret.get_secret_value(),
+        update_index=dispatcher["update_index"],
+        reply_timeout=config.telegram.webhook_reply_timeout,
+        journal=dispatcher["update_journal"],
     )
     app.state.tg_webhook_handler = handler
     app.include_router(handler.router)
+    # Добавляется последним, чтобы webhook запросы не проходили через остальные middleware
+    app.add_middleware(TelegramWebhookMiddleware, handler=handler)
     dispatcher.startup.register(webhook_startup)
     dispatcher.shutdown.register(webhook_shutdown)
     dispatcher.workflow_data.update(app=app)
+    return app
+
+
+def run_webhook(dispatcher: Dispatcher, bots: list[Bot], config: AppConfig) -> None:
+    app: FastAPI = create_webhook_app(dispatcher=dispatcher, bots=bots, config=config)
     return run_app(app=app, config=config)
@@ -1,22 +1,129 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Final
+from typing import TYPE_CHECKING, Final, Optional
 
+from aiogram import Bot, Dispatcher
 from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 from app.endpoints.telegram import TelegramRequestHandler
+from app.services.activity import UserActivityBuffer
+from app.services.counter import CachedCount
+from app.services.postgres import CacheInvalidationBus
+from app.telegram.journal import UpdateJournal
+from app.telegram.scheduler import UpdateScheduler
+
+if TYPE_CHECKING:
+    from app.models.config import AppConfig
 
 logger: Final[logging.Logger] = logging.getLogger(name=__name__)
 
 
-async def close_sessions() -> None:
+async def close_sessions(session_pool: async_sessionmaker[AsyncSession]) -> None:
     """Закрывает соединения при завершении работы"""
+    engine: AsyncEngine = session_pool.kw["bind"]
+    await engine.dispose()
     logger.info("Closed all existing connections")
 
 
-async def emit_aiogram_shutdown(app: FastAPI) -> None:
-    handler: TelegramRequestHandler = app.state.tg_webhook_handler
-    await handler.shutdown()
-    logger.info("Aiogram shutdown completed")
+async def start_cache_invalidation(app: FastAPI) -> None:
+    """Подписывает кэши процесса на инвалидацию из остальных процессов"""
+    bus: Optional[CacheInvalidationBus] = getattr(app.state, "invalidation_bus", None)
+    if bus is not None:
+        await bus.start()
+
+
+def start_user_activity(app: FastAPI) -> None:
+    """Запускает периодическую запись активности пользователей"""
+    user_activity: Optional[UserActivityBuffer] = getattr(app.state, "user_activity", None)
+    if user_activity is not None:
+        user_activity.start()
+
+
+async def drain_updates(scheduler: UpdateScheduler, timeout: float) -> None:
+    """Дожидается обработки уже принятых обновлений, но не дольше ``timeout`` секунд"""
+    logger.info(
+        "Draining %d in-flight updates (timeout: %.1fs)",
+        scheduler.unfinished,
+        timeout,
+    )
+    unfinished = await scheduler.drain(timeout=timeout)
+    if unfinished:
+        logger.warning("Drain deadline exceeded, %d updates were not processed", unfinished)
+    else:
+        logger.info("All in-flight updates processed")
+
+
+async def close_background_services(app: FastAPI) -> None:
+    """
+    Останавливает фоновые службы процесса, включенные в настройках: шину инвалидации
+    кэшей, запись активности и подсчет пользователей, затем закрывает пулы БД
+    """
+    bus: Optional[CacheInvalidationBus] = getattr(app.state, "invalidation_bus", None)
+    if bus is not None:
+        await bus.stop()
+    user_activity: Optional[UserActivityBuffer] = getattr(app.state, "user_activity", None)
+    if user_activity is not None:
+        await user_activity.stop()
+    user_count: Optional[CachedCount] = getattr(app.state, "user_count", None)
+    if user_count is not None:
+        await user_count.stop()
+    await close_sessions(session_pool=app.state.session_pool)
+    replica_session_pool: Optional[async_sessionmaker[AsyncSession]] = getattr(
+        app.state, "replica_session_pool", None
+    )
+    if replica_session_pool is not None:
+        await close_sessions(session_pool=replica_session_pool)
+
+
+# noinspection PyProtectedMember
+async def graceful_shutdown(app: FastAPI) -> None:
+    """
+    Корректное завершение работы бота:
+    прекращает прием обновлений (readiness отвечает 503), дожидается обработки
+    принятых обновлений и закрывает журнал обновлений, затем останавливает aiogram,
+    записывает накопленную активность пользователей и закрывает сессию бота и пул БД.
+    """
+    config: AppConfig = app.state.config
+    dispatcher: Dispatcher = app.state.dispatcher
+    bots: list[Bot] = app.state.bots
+    handler: Optional[TelegramRequestHandler] = getattr(app.state, "tg_webhook_handler", None)
+    journal: Optional[UpdateJournal] = getattr(app.state, "update_journal", None)
+
+    app.state.accepting_updates = False
+    if handler is not None:
+        handler.accepting_updates = False
+    if dispatcher._running_lock.locked():
+        await dispatcher.stop_polling()
+    polling_task: Optional[asyncio.Task[None]] = getattr(app.state, "polling_task", None)
+    if polling_task is not None:
+        # Резервная реплика перестает ждать блокировку, ведущая отпускает ее
+        polling_task.cancel()
+        await asyncio.gather(polling_task, return_exceptions=True)
+
+    await drain_updates(
+        scheduler=app.state.update_scheduler,
+        timeout=config.telegram.update_drain_timeout,
+    )
+    if journal is not None:
+        # Не обработанные до дедлайна обновления остаются в журнале до следующего запуска
+        await journal.close()
+
+    if handler is not None:
+        await handler.shutdown()
+        logger.info("Aiogram shutdown completed")
+    for bot in bots:
+        await bot.session.close()
+    await close_background_services(app)
     app.state.shutdown_completed = True
+
+
+def start_graceful_shutdown(app: FastAPI) -> asyncio.Task[None]:
+    """Запускает завершение работы один раз, повторные вызовы возвращают ту же задачу"""
+    task: Optional[asyncio.Task[None]] = getattr(app.state, "shutdown_task", None)
+    if task is None:
+        task = asyncio.create_task(graceful_shutdown(app=app))
+        app.state.shutdown_task = task
+    return task
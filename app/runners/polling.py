@@ -2,29 +2,147 @@ from __future__ import annotations
 
 import asyncio
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING, AsyncGenerator
+from typing import TYPE_CHECKING, AsyncGenerator, Callable, Optional
 
 from aiogram import Bot, Dispatcher, loggers
+from aiogram.types import Update
 from fastapi import FastAPI
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.runners.lifespan import (
+    start_cache_invalidation,
+    start_graceful_shutdown,
+    start_user_activity,
+)
+from app.services.postgres import AdvisoryLock
+from app.telegram.dispatcher import SchedulingDispatcher
+from app.telegram.journal import JOURNAL_REPLAY_KEY, UpdateJournal
+from app.telegram.scheduler import UpdateScheduler
 
 if TYPE_CHECKING:
     from app.models.config import AppConfig
 
 
-async def polling_startup(bots: list[Bot], config: AppConfig) -> None:
+async def polling_startup(
+    bots: list[Bot],
+    config: AppConfig,
+    dispatcher: SchedulingDispatcher,
+    update_journal: Optional[UpdateJournal] = None,
+) -> None:
     for bot in bots:
         await bot.delete_webhook(drop_pending_updates=config.telegram.drop_pending_updates)
     if config.telegram.drop_pending_updates:
         loggers.dispatcher.info("Updates skipped successfully")
+    if update_journal is not None:
+        await replay_journal(dispatcher=dispatcher, bots=bots, journal=update_journal)
+
+
+async def replay_journal(
+    dispatcher: SchedulingDispatcher,
+    bots: list[Bot],
+    journal: UpdateJournal,
+) -> None:
+    """Повторно ставит в очередь обновления, не обработанные при прошлом запуске"""
+    bots_by_id: dict[int, Bot] = {bot.id: bot for bot in bots}
+    replayed = 0
+    for record in await journal.open():
+        bot = bots_by_id.get(record.bot_id)
+        if bot is None:
+            continue
+        update = Update.model_validate_json(record.payload, context={"bot": bot})
+        await dispatcher.schedule_update(bot, update, **{JOURNAL_REPLAY_KEY: True})
+        replayed += 1
+    if replayed:
+        loggers.dispatcher.info("Replayed %d updates from journal", replayed)
+
+
+async def start_polling(dispatcher: Dispatcher, bots: list[Bot]) -> None:
+    # Обновления обрабатываются в UpdateScheduler (см. ``SchedulingDispatcher``),
+    # поэтому polling только ставит их в очередь.
+    # Сессия бота закрывается после обработки принятых обновлений в graceful_shutdown
+    await dispatcher.start_polling(
+        *bots,
+        handle_signals=False,
+        handle_as_tasks=False,
+        close_bot_session=False,
+    )
 
 
 # noinspection PyProtectedMember
+async def poll_as_leader(
+    dispatcher: Dispatcher,
+    bots: list[Bot],
+    lock: AdvisoryLock,
+    interval: float,
+    is_running: Callable[[], bool],
+) -> None:
+    """
+    Запускает polling, только пока реплика удерживает advisory блокировку.
+
+    Резервные реплики раз в ``interval`` секунд пытаются получить блокировку, в том числе
+    после ошибок соединения с БД. Ведущая с тем же интервалом проверяет соединение
+    с блокировкой и при его потере останавливает polling, чтобы не конкурировать
+    за обновления с новой ведущей. Завершается, только когда ``is_running`` ложно.
+    """
+    while True:
+        try:
+            acquired = await lock.acquire()
+        except (DBAPIError, OSError) as e:
+            loggers.dispatcher.error("Failed to acquire polling leadership: %s", e)
+            acquired = False
+        if not acquired:
+            await asyncio.sleep(interval)
+            continue
+
+        loggers.dispatcher.info("Polling leadership acquired")
+        polling = asyncio.create_task(start_polling(dispatcher=dispatcher, bots=bots))
+        lost = False
+        try:
+            while not polling.done():
+                await asyncio.wait({polling}, timeout=interval)
+                if not polling.done() and not await lock.check(timeout=interval):
+                    loggers.dispatcher.warning("Polling leadership lost, polling stopped")
+                    lost = True
+                    break
+        finally:
+            if dispatcher._running_lock.locked():
+                await dispatcher.stop_polling()
+            else:
+                polling.cancel()
+            await asyncio.gather(polling, return_exceptions=True)
+            await lock.release()
+        if lost:
+            continue
+        if not is_running():
+            # Polling остановлен при завершении работы
+            return
+        error = None if polling.cancelled() else polling.exception()
+        loggers.dispatcher.error("Polling stopped unexpectedly, leadership released: %r", error)
+        await asyncio.sleep(interval)
+
+
 @asynccontextmanager
 async def polling_lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    config: AppConfig = app.state.config
     dispatcher: Dispatcher = app.state.dispatcher
-    bot: Bot = app.state.bot
+    bots: list[Bot] = app.state.bots
+    scheduler: UpdateScheduler = app.state.update_scheduler
 
-    asyncio.create_task(dispatcher.start_polling(bot, handle_signals=False))
+    scheduler.start()
+    await start_cache_invalidation(app=app)
+    start_user_activity(app=app)
+    if config.telegram.polling_leader_election:
+        engine: AsyncEngine = app.state.session_pool.kw["bind"]
+        polling = poll_as_leader(
+            dispatcher=dispatcher,
+            bots=bots,
+            lock=AdvisoryLock(engine=engine, key=bots[0].id),
+            interval=config.telegram.polling_leader_interval,
+            is_running=lambda: bool(app.state.accepting_updates),
+        )
+    else:
+        polling = start_polling(dispatcher=dispatcher, bots=bots)
+    app.state.polling_task = asyncio.create_task(polling)
     yield
-    if dispatcher._running_lock.locked():
-        await dispatcher.stop_polling()
+    await start_graceful_shutdown(app=app)
@@ -1,54 +1,89 @@
 from __future__ import annotations
 
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING, AsyncGenerator
+from typing import TYPE_CHECKING, AsyncGenerator, Optional
 
 from aiogram import Bot, Dispatcher, loggers
 from aiogram.methods import SetWebhook
 from fastapi import FastAPI
 
-from app.endpoints.telegram import TelegramRequestHandler
+from app.endpoints.telegram import TelegramRequestHandler, get_bot_path
+from app.runners.lifespan import (
+    start_cache_invalidation,
+    start_graceful_shutdown,
+    start_user_activity,
+)
+from app.telegram.journal import UpdateJournal
 
 if TYPE_CHECKING:
     from app.models.config import AppConfig
 
 
+async def set_webhooks(dispatcher: Dispatcher, bots: list[Bot], config: AppConfig) -> None:
+    allowed_updates: list[str] = dispatcher.resolve_used_update_types()
+    for bot in bots:
+        path: str = get_bot_path(
+            path=config.telegram.webhook_path,
+            bot=bot,
+            multi_bot=len(bots) > 1,
+        )
+        url: str = config.server.build_url(path=path)
+        method: SetWebhook = SetWebhook(
+            url=url,
+            allowed_updates=allowed_updates,
+            secret_token=config.telegram.webhook_secret.get_secret_value(),
+            drop_pending_updates=config.telegram.drop_pending_updates,
+        )
+
+        if not await bot(method):
+            raise RuntimeError(f"Failed to set bot id={bot.id} webhook on url '{url}'")
+
+        loggers.webhook.info("Bot id=%d webhook successfully set on url '%s'", bot.id, url)
+
+
+async def delete_webhooks(bots: list[Bot], config: AppConfig) -> None:
+    if not config.telegram.reset_webhook:
+        return
+    for bot in bots:
+        if await bot.delete_webhook():
+            loggers.webhook.info("Dropped bot id=%d webhook.", bot.id)
+        else:
+            loggers.webhook.error("Failed to drop bot id=%d webhook.", bot.id)
+
+
 async def webhook_startup(
     dispatcher: Dispatcher,
-    bot: Bot,
+    bots: list[Bot],
     config: AppConfig,
+    app: FastAPI,
+    update_journal: Optional[UpdateJournal] = None,
+    manage_webhook: bool = True,
 ) -> None:
-    url: str = config.server.build_url(path=config.telegram.webhook_path)
-    method: SetWebhook = SetWebhook(
-        url=url,
-        allowed_updates=dispatcher.resolve_used_update_types(),
-        secret_token=config.telegram.webhook_secret.get_secret_value(),
-        drop_pending_updates=config.telegram.drop_pending_updates,
-    )
-
-    if not await bot(method):
-        raise RuntimeError(f"Failed to set main bot webhook on url '{url}'")
-
-    loggers.webhook.info("Main bot webhook successfully set on url '%s'", url)
+    if update_journal is not None:
+        handler: TelegramRequestHandler = app.state.tg_webhook_handler
+        await handler.replay(records=await update_journal.open())
+    # В режиме нескольких процессов webhook регистрирует управляющий процесс
+    if manage_webhook:
+        await set_webhooks(dispatcher=dispatcher, bots=bots, config=config)
 
 
 async def webhook_shutdown(
-    bot: Bot,
+    bots: list[Bot],
     config: AppConfig,
+    manage_webhook: bool = True,
 ) -> None:
-    if not config.telegram.reset_webhook:
-        return
-    if await bot.delete_webhook():
-        loggers.webhook.info("Dropped main bot webhook.")
-    else:
-        loggers.webhook.error("Failed to drop main bot webhook.")
-    await bot.session.close()
+    if manage_webhook:
+        await delete_webhooks(bots=bots, config=config)
+    for bot in bots:
+        await bot.session.close()
 
 
 @asynccontextmanager
 async def webhook_lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     handler: TelegramRequestHandler = app.state.tg_webhook_handler
 
+    await start_cache_invalidation(app=app)
+    start_user_activity(app=app)
     await handler.startup()
     yield
-    await handler.shutdown()
+    await start_graceful_shutdown(app=app)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Final, Optional
+
+import uvicorn
+from aiogram import Bot, Dispatcher
+from fastapi import FastAPI
+
+from app.factory import create_app_config
+from app.factory.telegram import create_bots, create_dispatcher
+from app.runners.app import create_webhook_app
+from app.runners.webhook import delete_webhooks, set_webhooks
+from app.utils.logging import setup_logger
+
+if TYPE_CHECKING:
+    from app.models.config import AppConfig
+
+logger: Final[logging.Logger] = logging.getLogger(name=__name__)
+
+WORKER_APP_FACTORY: Final[str] = "app.runners.workers:create_worker_app"
+
+# Блокировка каталога журнала удерживается все время жизни процесса-воркера
+_journal_lock: Optional[BinaryIO] = None
+
+
+def claim_journal_slot(path: Path, workers: int) -> Path:
+    """
+    Выбирает свободный каталог журнала ``worker-<номер>`` для текущего процесса.
+
+    Каталог закрепляется блокировкой файла, которая снимается при завершении процесса,
+    поэтому перезапущенный воркер получает журнал упавшего и повторяет его обновления.
+    """
+    global _journal_lock
+
+    path.mkdir(parents=True, exist_ok=True)
+    for slot in range(workers):
+        lock = (path / f"worker-{slot}.lock").open("wb")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            continue
+        _journal_lock = lock
+        return path / f"worker-{slot}"
+    raise RuntimeError(f"No free update journal slot in '{path}'")
+
+
+def create_worker_app() -> FastAPI:
+    """
+    Фабрика приложения для процесса-воркера webhook.
+
+    Вызывается uvicorn в каждом процессе после его запуска, поэтому пул соединений БД
+    (``get_engine``), HTTP сессия ботов и планировщик обновлений у каждого воркера свои.
+    """
+    config: AppConfig = create_app_config()
+    setup_logger(config=config, level=config.common.log_level)
+    if config.telegram.update_journal_path:
+        config.telegram.update_journal_path = str(
+            claim_journal_slot(
+                path=Path(config.telegram.update_journal_path),
+                workers=config.server.workers,
+            )
+        )
+    bots: list[Bot] = create_bots(config=config)
+    dispatcher: Dispatcher = create_dispatcher(bot=bots[0], config=config)
+    return create_webhook_app(
+        dispatcher=dispatcher,
+        bots=bots,
+        config=config,
+        manage_webhook=False,
+    )
+
+
+async def _set_webhooks(dispatcher: Dispatcher, bots: list[Bot], config: AppConfig) -> None:
+    try:
+        await set_webhooks(dispatcher=dispatcher, bots=bots, config=config)
+    finally:
+        for bot in bots:
+            await bot.session.close()
+
+
+async def _delete_webhooks(bots: list[Bot], config: AppConfig) -> None:
+    try:
+        await delete_webhooks(bots=bots, config=config)
+    finally:
+        for bot in bots:
+            await bot.session.close()
+
+
+def run_webhook_workers(dispatcher: Dispatcher, bots: list[Bot], config: AppConfig) -> None:
+    """
+    Запускает webhook сервер в ``config.server.workers`` процессах.
+
+    Управляющий процесс uvicorn открывает сокет и запускает воркеры, которые принимают
+    соединения с общего сокета и перезапускаются при падении. Webhook регистрируется
+    и удаляется только управляющим процессом, воркеры этим не занимаются.
+    """
+    asyncio.run(_set_webhooks(dispatcher=dispatcher, bots=bots, config=config))
+    logger.info("Starting %d webhook workers", config.server.workers)
+    try:
+        uvicorn.run(
+            WORKER_APP_FACTORY,
+            factory=True,
+            workers=config.server.workers,
+            host=config.server.host,
+            port=config.server.port,
+            access_log=False,
+            log_config=None,
+            forwarded_allow_ips="*",
+        )
+    finally:
+        asyncio.run(_delete_webhooks(bots=bots, config=config))
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.services.postgres import SQLSessionContext, connection_holder
+from app.utils.time import datetime_now
+
+logger = logging.getLogger(__name__)
+
+
+class UserActivity:
+    """Накопленные изменения одного пользователя"""
+
+    user_id: int
+    last_seen_at: datetime
+    messages: int
+    profile: Optional[tuple[str, Optional[str], Optional[str]]]
+
+    __slots__ = ("user_id", "last_seen_at", "messages", "profile")
+
+    def __init__(self, user_id: int, last_seen_at: datetime) -> None:
+        self.user_id = user_id
+        self.last_seen_at = last_seen_at
+        self.messages = 0
+        # name, username, language_code, если профиль в Telegram изменился
+        self.profile = None
+
+    def merge(self, other: UserActivity) -> None:
+        self.last_seen_at = max(self.last_seen_at, other.last_seen_at)
+        self.messages += other.messages
+        if other.profile is not None:
+            self.profile = other.profile
+
+
+class UserActivityBuffer:
+    """
+    Буфер отложенной записи активности пользователей (write-behind).
+
+    Изменения по одному ``user_id`` объединяются в памяти и записываются раз в
+    ``flush_interval`` секунд или при накоплении ``batch_size`` пользователей, по одному
+    ``UPDATE ... FROM (VALUES ...)`` на пачку. При ошибке записи изменения возвращаются
+    в буфер до следующей попытки, при остановке записывается все накопленное.
+    """
+
+    flush_interval: float
+    batch_size: int
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        flush_interval: float,
+        batch_size: int,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("Activity batch size must be positive")
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._session_pool = session_pool
+        self._pending: dict[int, UserActivity] = {}
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _add(self, activity: UserActivity) -> None:
+        pending = self._pending.get(activity.user_id)
+        if pending is None:
+            self._pending[activity.user_id] = activity
+        else:
+            pending.merge(activity)
+        if len(self._pending) >= self.batch_size:
+            self._full.set()
+
+    def touch(self, user_id: int, message: bool = False) -> None:
+        """Отмечает обращение пользователя, ``message`` - входящее сообщение"""
+        activity = UserActivity(user_id=user_id, last_seen_at=datetime_now())
+        activity.messages = int(message)
+        self._add(activity)
+
+    def update_profile(
+        self,
+        user_id: int,
+        name: str,
+        username: Optional[str],
+        language_code: Optional[str],
+    ) -> None:
+        activity = UserActivity(user_id=user_id, last_seen_at=datetime_now())
+        activity.profile = (name, username, language_code)
+        self._add(activity)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает периодическую запись и записывает все накопленное"""
+        if self._task is not None:
+            # Под блокировкой задача не может быть прервана посреди записи пачки
+            async with self._lock:
+                self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        if self._pending:
+            logger.error("Lost activity of %d users on shutdown", len(self._pending))
+
+    def _restore(self, batch: list[UserActivity]) -> None:
+        # Изменения, пришедшие во время записи, новее и применяются поверх невыполненных
+        for activity in batch:
+            newer = self._pending.get(activity.user_id)
+            if newer is not None:
+                activity.merge(newer)
+            self._pending[activity.user_id] = activity
+
+    async def flush(self) -> bool:
+        """:return: Удалось ли записать все накопленное"""
+        async with self._lock:
+            self._full.clear()
+            pending, self._pending = self._pending, {}
+            batch = list(pending.values())
+            for start in range(0, len(batch), self.batch_size):
+                chunk = batch[start : start + self.batch_size]
+                try:
+                    async with SQLSessionContext(session_pool=self._session_pool) as repository:
+                        await repository.users.apply_activity(chunk)
+                except Exception as e:
+                    logger.error("Failed to write activity of %d users: %s", len(chunk), e)
+                    self._restore(batch[start:])
+                    return False
+            if batch:
+                logger.debug("Activity of %d users written", len(batch))
+            return True
+
+    async def _run(self) -> None:
+        connection_holder.set(type(self).__name__)
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            if not await self.flush():
+                # Следующая попытка не раньше чем через интервал, даже если буфер полон
+                await asyncio.sleep(self.flush_interval)
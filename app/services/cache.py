@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Callable, Final, Generic, Hashable, Optional, TypeVar
+
+from app.models.dto import AdminUserDto, UserDto
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Кэш фиксированного размера с вытеснением давно не использованных записей (LRU)
+    и ограниченным временем жизни записи (TTL).
+
+    Рассчитан на один event loop: операции синхронные и не требуют блокировок.
+    """
+
+    capacity: int
+    ttl: float
+    hits: int
+    misses: int
+    evictions: int
+
+    __slots__ = ("capacity", "ttl", "hits", "misses", "evictions", "_clock", "_entries")
+
+    def __init__(
+        self,
+        capacity: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if capacity < 1:
+            raise ValueError("Cache capacity must be positive")
+        self.capacity = capacity
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: K) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Пользователи бота по telegram_id
+UserCache = LRUCache[int, UserDto]
+# Администраторы по username
+AdminUserCache = LRUCache[str, AdminUserDto]
+
+# Имена кэшей в сообщениях инвалидации
+USER_CACHE: Final[str] = "user"
+ADMIN_USER_CACHE: Final[str] = "admin_user"
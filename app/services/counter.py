@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.services.postgres import Repository, SQLSessionContext, connection_holder
+
+logger = logging.getLogger(__name__)
+
+
+class CachedCount:
+    """
+    Точный счетчик, который пересчитывается в фоне не чаще раза в ``ttl`` секунд.
+
+    Устаревшее значение отдается сразу, а пересчет идет отдельной задачей в своей
+    сессии, поэтому ждать подсчета приходится только при первом обращении.
+    """
+
+    ttl: float
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        count: Callable[[Repository], Awaitable[int]],
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self._session_pool = session_pool
+        self._count = count
+        self._clock = clock
+        self._value: Optional[int] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def get(self) -> int:
+        if self._value is None:
+            async with self._lock:
+                if self._value is None:
+                    await self.refresh()
+            return self._value  # type: ignore[return-value]
+        if self._expires_at <= self._clock() and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._refresh_in_background())
+        return self._value
+
+    async def refresh(self) -> int:
+        async with SQLSessionContext(session_pool=self._session_pool) as repository:
+            value = await self._count(repository)
+        self._value = value
+        self._expires_at = self._clock() + self.ttl
+        return value
+
+    def invalidate(self) -> None:
+        """Следующее обращение запустит пересчет"""
+        self._expires_at = 0.0
+
+    async def _refresh_in_background(self) -> None:
+        # Задача скопировала контекст запроса, соединение пересчета приписывается ей самой
+        connection_holder.set(type(self).__name__)
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error("Failed to refresh cached count: %s", e)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
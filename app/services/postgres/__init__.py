@@ -1,3 +1,30 @@
-from .context import Repository, SQLSessionContext
+from .context import Repository, SessionIntent, SQLSessionContext
+from .invalidation import CacheInvalidationBus, notify_invalidation
+from .lock import AdvisoryLock
+from .pool import (
+    MonitoredQueuePool,
+    PoolMonitor,
+    connection_holder,
+    get_pool_monitor,
+    setup_pool_monitor,
+)
+from .repositories.base import CountMode
+from .transaction import WRITES_OPTION, SessionMode, WriteTrackingSession
 
-__all__ = ["SQLSessionContext", "Repository"]
+__all__ = [
+    "AdvisoryLock",
+    "CacheInvalidationBus",
+    "CountMode",
+    "MonitoredQueuePool",
+    "PoolMonitor",
+    "SQLSessionContext",
+    "Repository",
+    "SessionIntent",
+    "SessionMode",
+    "WRITES_OPTION",
+    "WriteTrackingSession",
+    "connection_holder",
+    "get_pool_monitor",
+    "notify_invalidation",
+    "setup_pool_monitor",
+]
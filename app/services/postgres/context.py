@@ -1,27 +1,116 @@
 import logging
+from enum import StrEnum
 from types import TracebackType
-from typing import Optional
+from typing import Optional, cast
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from .repositories import Repository
+from .transaction import SessionMode, has_writes, mode_engine
 
 logger = logging.getLogger(__name__)
 
 
+class SessionIntent(StrEnum):
+    # Запись и чтение, которое должно видеть последние изменения: основной сервер
+    WRITE = "write"
+    # Чтение, допускающее отставание реплики: списки админ-панели, аналитика
+    READ = "read"
+
+
 class SQLSessionContext:
+    """
+    Контекст сессии БД на время обработки одного события.
+
+    Сессия не занимает соединение из пула до первого запроса. Если запросов не было,
+    транзакция не начиналась и при выходе в БД ничего не отправляется. Транзакция,
+    в которой ничего не записывалось (см. ``WriteTrackingSession``), при выходе
+    не фиксируется, а откатывается при закрытии сессии.
+
+    Если передан ``replica_pool``, сессия с намерением ``SessionIntent.READ`` выполняет
+    запросы на реплике, остальные - на основном сервере. Запись на реплике отклоняется БД.
+    """
+
     _session_pool: async_sessionmaker[AsyncSession]
+    _replica_pool: Optional[async_sessionmaker[AsyncSession]]
     _session: Optional[AsyncSession]
+    _mode: SessionMode
+    _intent: SessionIntent
 
-    __slots__ = ("_session_pool", "_session")
+    __slots__ = ("_session_pool", "_replica_pool", "_session", "_mode", "_intent")
 
-    def __init__(self, session_pool: async_sessionmaker[AsyncSession]) -> None:
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        mode: SessionMode = SessionMode.READ_WRITE,
+        replica_pool: Optional[async_sessionmaker[AsyncSession]] = None,
+        intent: SessionIntent = SessionIntent.WRITE,
+    ) -> None:
         self._session_pool = session_pool
+        self._replica_pool = replica_pool
         self._session = None
+        self._mode = mode
+        self._intent = intent
+
+    @property
+    def mode(self) -> SessionMode:
+        return self._mode
+
+    @property
+    def intent(self) -> SessionIntent:
+        return self._intent
+
+    @property
+    def on_replica(self) -> bool:
+        return self._replica_pool is not None and self._intent == SessionIntent.READ
+
+    @property
+    def _pool(self) -> async_sessionmaker[AsyncSession]:
+        if self.on_replica:
+            return cast(async_sessionmaker[AsyncSession], self._replica_pool)
+        return self._session_pool
+
+    async def set_intent(self, intent: SessionIntent) -> None:
+        """
+        Переключает сессию между репликой и основным сервером, например чтобы после
+        записи прочитать свои изменения (read-your-writes).
+
+        Начатая работа фиксируется, загруженные объекты перечитываются при следующем
+        обращении уже с нового сервера.
+        """
+        on_replica = self.on_replica
+        self._intent = intent
+        if self._session is None or self.on_replica == on_replica:
+            return
+        if self._session.in_transaction():
+            await self._session.commit()
+        self._session.expire_all()
+        self._bind()
+
+    async def set_mode(self, mode: SessionMode) -> None:
+        """
+        Переключает режим транзакций сессии.
+
+        Начатая работа фиксируется, следующие транзакции выполняются уже в новом режиме.
+        """
+        if self._session is None or mode == self._mode:
+            return
+        if self._session.in_transaction():
+            await self._session.commit()
+        self._mode = mode
+        self._bind()
+
+    def _bind(self) -> None:
+        session = cast(AsyncSession, self._session)
+        engine = mode_engine(self._pool.kw["bind"], self._mode)
+        session.bind = engine
+        session.sync_session.bind = engine.sync_engine
 
     async def __aenter__(self) -> Repository:
-        self._session = self._session_pool()
+        self._session = self._pool()
         await self._session.__aenter__()
+        if self._mode != SessionMode.READ_WRITE:
+            self._bind()
         logger.debug(f"Async session: {self._session.sync_session.hash_key} initialized!")
         return Repository(session=self._session)
 
@@ -33,6 +122,10 @@ class SQLSessionContext:
     ) -> None:
         if self._session is None:
             return
+        if not self._session.in_transaction():
+            await self._session.close()
+            self._session = None
+            return
 
         try:
             if exc_type is not None:
@@ -40,8 +133,9 @@ class SQLSessionContext:
                     f"Async session: {self._session.sync_session.hash_key} rollback due to exception!"
                 )
                 await self._session.rollback()
-            else:
+            elif has_writes(self._session.sync_session):
                 await self._session.commit()
+            # Транзакция без записи откатывается при закрытии сессии, без COMMIT
         except Exception as e:
             logger.exception(f"Error during session finalization: {e}")
             await self._session.rollback()
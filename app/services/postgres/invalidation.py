@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Final, Hashable, Iterable, Optional
+
+import asyncpg
+import msgspec
+from sqlalchemy import URL, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.cache import LRUCache
+
+from .transaction import WRITES_OPTION
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL: Final[str] = "cache_invalidation"
+# Размер payload NOTIFY ограничен 8000 байт, ключи отправляются частями
+_KEYS_PER_NOTIFY: Final[int] = 500
+
+
+class Invalidation(msgspec.Struct, frozen=True):
+    cache: str
+    keys: list[Any]
+
+
+async def notify_invalidation(
+    session: AsyncSession,
+    cache: str,
+    keys: Iterable[Hashable],
+) -> None:
+    """
+    Сообщает всем процессам, что записи ``keys`` кэша ``cache`` устарели.
+
+    NOTIFY транзакционный: внутри открытой транзакции сообщение уходит при ее фиксации
+    и не уходит при откате, поэтому другие процессы не перечитают еще не записанные данные.
+    """
+    keys = list(keys)
+    for start in range(0, len(keys), _KEYS_PER_NOTIFY):
+        payload = msgspec.json.encode(
+            Invalidation(cache=cache, keys=keys[start : start + _KEYS_PER_NOTIFY])
+        )
+        await session.execute(
+            select(func.pg_notify(INVALIDATION_CHANNEL, payload.decode())),
+            execution_options={WRITES_OPTION: True},
+        )
+
+
+class CacheInvalidationBus:
+    """
+    Шина инвалидации кэшей процесса через LISTEN/NOTIFY Postgres.
+
+    Держит одно выделенное соединение asyncpg с LISTEN и удаляет из локальных кэшей
+    записи, о которых сообщили ``notify_invalidation`` любого процесса, в том числе
+    текущего. После (пере)подключения кэши очищаются целиком: сообщения, отправленные
+    без слушателя, не доставляются.
+    """
+
+    caches: dict[str, LRUCache[Any, Any]]
+
+    def __init__(self, url: URL, reconnect_interval: float = 1.0) -> None:
+        self.caches = {}
+        self._dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self._reconnect_interval = reconnect_interval
+        self._task: Optional[asyncio.Task[None]] = None
+        self._connected = asyncio.Event()
+
+    def register(self, name: str, cache: LRUCache[Any, Any]) -> None:
+        self.caches[name] = cache
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    async def start(self, timeout: float = 10.0) -> None:
+        """Запускает слушателя и ждет первого подключения не дольше ``timeout`` секунд"""
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._listen())
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Cache invalidation listener is not connected yet")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def _clear(self) -> None:
+        for cache in self.caches.values():
+            cache.clear()
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            invalidation = msgspec.json.decode(payload, type=Invalidation)
+        except msgspec.DecodeError:
+            logger.warning("Malformed cache invalidation payload: %r", payload)
+            return
+        cache = self.caches.get(invalidation.cache)
+        if cache is None:
+            return
+        for key in invalidation.keys:
+            cache.invalidate(key)
+
+    async def _listen(self) -> None:
+        while True:
+            connection: Optional[asyncpg.Connection] = None
+            try:
+                connection = await asyncpg.connect(self._dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(INVALIDATION_CHANNEL, self._on_notification)
+                self._clear()
+                self._connected.set()
+                logger.info("Listening for cache invalidations")
+                await lost.wait()
+                logger.warning("Cache invalidation listener disconnected")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Cache invalidation listener failed: %s", e)
+            finally:
+                self._connected.clear()
+                if connection is not None and not connection.is_closed():
+                    await asyncio.shield(connection.close())
+            await asyncio.sleep(self._reconnect_interval)
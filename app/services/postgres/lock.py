@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+class AdvisoryLock:
+    """
+    Сессионная advisory блокировка Postgres на выделенном соединении.
+
+    Блокировка принадлежит соединению: пока оно открыто, никто другой ее не получит,
+    а при разрыве соединения или падении процесса сервер снимает ее сам.
+    Соединение работает в autocommit, чтобы не держать открытую транзакцию.
+    """
+
+    _engine: AsyncEngine
+    _key: int
+    _connection: Optional[AsyncConnection]
+
+    __slots__ = ("_engine", "_key", "_connection")
+
+    def __init__(self, engine: AsyncEngine, key: int) -> None:
+        self._engine = engine
+        self._key = key
+        self._connection = None
+
+    @property
+    def held(self) -> bool:
+        return self._connection is not None
+
+    async def acquire(self) -> bool:
+        """Пытается получить блокировку без ожидания"""
+        if self._connection is not None:
+            return True
+        connection = await self._engine.connect()
+        try:
+            connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            acquired = await connection.scalar(select(func.pg_try_advisory_lock(self._key)))
+        except BaseException:
+            await connection.close()
+            raise
+        if not acquired:
+            await connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    async def check(self, timeout: float) -> bool:
+        """
+        Проверяет, что соединение с блокировкой живо.
+        Если соединение оборвалось или не ответило за ``timeout`` секунд, блокировка считается
+        потерянной: другой процесс может получить ее, как только сервер закроет соединение.
+        """
+        if self._connection is None:
+            return False
+        try:
+            await asyncio.wait_for(self._connection.scalar(select(1)), timeout=timeout)
+        except (DBAPIError, OSError, asyncio.TimeoutError):
+            logger.exception("Advisory lock %d connection is lost", self._key)
+            await self._discard()
+            return False
+        return True
+
+    async def release(self) -> None:
+        connection = self._connection
+        if connection is None:
+            return
+        try:
+            await connection.scalar(select(func.pg_advisory_unlock(self._key)))
+        except (DBAPIError, OSError):
+            await self._discard()
+            return
+        self._connection = None
+        await connection.close()
+
+    async def _discard(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        # Соединение с неизвестным состоянием блокировки не возвращается в пул
+        await connection.invalidate()
+        await connection.close()
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import bisect
+import heapq
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Final, Optional, cast
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import (
+    AsyncAdaptedQueuePool,
+    ConnectionPoolEntry,
+    PoolProxiedConnection,
+    QueuePool,
+)
+
+from app.utils.time import datetime_now
+
+logger = logging.getLogger(__name__)
+
+# Кто сейчас работает с БД: middleware, обработчик или фоновая задача.
+# Соединение приписывается тому, кто его вернул в пул, то есть дольше всех его держал
+connection_holder: ContextVar[str] = ContextVar("connection_holder", default="-")
+
+# Границы интервалов гистограмм в секундах
+BUCKETS: Final[tuple[float, ...]] = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# Сколько самых долгих удержаний соединения хранится с подробностями
+SLOWEST_HOLDS: Final[int] = 20
+# Предел числа различных владельцев в статистике, остальные учитываются как "other"
+MAX_HOLDERS: Final[int] = 500
+
+
+class Histogram:
+    """Гистограмма длительностей с фиксированными интервалами, как у Prometheus"""
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def snapshot(self) -> dict[str, Any]:
+        # Накопленные значения: сколько наблюдений не дольше границы интервала
+        buckets: dict[str, int] = {}
+        total = 0
+        for bound, count in zip((*map(str, BUCKETS), "+Inf"), self.counts):
+            total += count
+            buckets[bound] = total
+        return {"count": self.count, "sum": self.sum, "max": self.max, "buckets": buckets}
+
+
+class HolderStats:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+
+class PoolMonitor:
+    """
+    Статистика пула соединений процесса: ожидание соединения из пула (включая открытие
+    нового), время его удержания, пиковые значения занятых соединений и overflow,
+    а также владельцы (``connection_holder``), дольше всех удерживавшие соединения.
+    """
+
+    wait: Histogram
+    hold: Histogram
+    timeouts: int
+    peak_checked_out: int
+    peak_overflow: int
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.wait = Histogram()
+        self.hold = Histogram()
+        self.timeouts = 0
+        self.peak_checked_out = 0
+        self.peak_overflow = 0
+        self._holders: dict[str, HolderStats] = {}
+        # Куча (время, момент, кто взял, кто вернул) с самыми долгими удержаниями
+        self._slowest: list[tuple[float, str, str, str]] = []
+        # Соединения, занятые сейчас: кто и когда их взял
+        self._active: dict[int, tuple[float, str]] = {}
+
+    def checkout(self, record: ConnectionPoolEntry) -> None:
+        self._active[id(record)] = (time.perf_counter(), connection_holder.get())
+
+    def checkin(self, record: ConnectionPoolEntry) -> None:
+        active = self._active.pop(id(record), None)
+        if active is None:
+            # Соединение взято до сброса статистики
+            return
+        started, acquired_by = active
+        held = time.perf_counter() - started
+        self.hold.observe(held)
+        holder = connection_holder.get()
+        stats = self._holders.get(holder)
+        if stats is None:
+            if len(self._holders) >= MAX_HOLDERS:
+                holder = "other"
+            stats = self._holders.setdefault(holder, HolderStats())
+        stats.observe(held)
+        item = (held, datetime_now().isoformat(), acquired_by, holder)
+        if len(self._slowest) < SLOWEST_HOLDS:
+            heapq.heappush(self._slowest, item)
+        elif held > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def current_holders(self, limit: int = 10) -> list[dict[str, Any]]:
+        """Соединения, которые сейчас заняты дольше всех"""
+        now = time.perf_counter()
+        held = heapq.nsmallest(limit, self._active.values())
+        return [{"holder": holder, "held": now - started} for started, holder in held]
+
+    def snapshot(self, pool: QueuePool) -> dict[str, Any]:
+        holders = sorted(self._holders.items(), key=lambda item: item[1].max, reverse=True)
+        return {
+            "pool": {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": max(self.peak_overflow, 0),
+                "timeouts": self.timeouts,
+            },
+            "wait": self.wait.snapshot(),
+            "hold": self.hold.snapshot(),
+            "holders": {
+                holder: {"count": stats.count, "total": stats.total, "max": stats.max}
+                for holder, stats in holders
+            },
+            "slowest": [
+                {"held": held, "at": at, "acquired_by": acquired_by, "released_by": released_by}
+                for held, at, acquired_by, released_by in sorted(self._slowest, reverse=True)
+            ],
+            "current": self.current_holders(),
+        }
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул ``create_async_engine`` с замером времени получения соединения.
+    При исчерпании пула в лог пишутся соединения, которые заняты дольше всех.
+    """
+
+    monitor: PoolMonitor
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.monitor = PoolMonitor()
+
+    def recreate(self) -> MonitoredQueuePool:
+        pool = cast(MonitoredQueuePool, super().recreate())
+        pool.monitor = self.monitor
+        return pool
+
+    def connect(self) -> PoolProxiedConnection:
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.monitor.timeouts += 1
+            logger.warning(
+                "Connection pool exhausted (%s), longest holders: %s",
+                self.status(),
+                self.monitor.current_holders(limit=5),
+            )
+            raise
+        finally:
+            monitor = self.monitor
+            monitor.wait.observe(time.perf_counter() - started)
+            monitor.peak_checked_out = max(monitor.peak_checked_out, self.checkedout())
+            monitor.peak_overflow = max(monitor.peak_overflow, self.overflow())
+
+
+def setup_pool_monitor(engine: AsyncEngine) -> PoolMonitor:
+    """Подключает сбор статистики к пулу движка, созданного с ``MonitoredQueuePool``"""
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, MonitoredQueuePool):
+        raise TypeError("Engine pool must be MonitoredQueuePool")
+    monitor = pool.monitor
+
+    # Слушатели и монитор переходят в пул, пересозданный после dispose()
+    @event.listens_for(pool, "checkout")
+    def _checkout(
+        dbapi_connection: Any,
+        record: ConnectionPoolEntry,
+        proxy: PoolProxiedConnection,
+    ) -> None:
+        monitor.checkout(record)
+
+    @event.listens_for(pool, "checkin")
+    def _checkin(dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+        monitor.checkin(record)
+
+    return monitor
+
+
+def get_pool_monitor(engine: AsyncEngine) -> Optional[PoolMonitor]:
+    pool = engine.sync_engine.pool
+    return pool.monitor if isinstance(pool, MonitoredQueuePool) else None
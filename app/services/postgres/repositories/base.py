@@ -1,17 +1,108 @@
 from __future__ import annotations
 
-from typing import Any, Optional, TypeVar, Union, cast
+import json
+from enum import StrEnum
+from typing import Any, Final, Iterator, Optional, Sequence, TypeVar, Union, cast
 
-from sqlalchemy import ColumnExpressionArgument, delete, select, update
+from sqlalchemy import (
+    Column,
+    ColumnElement,
+    ColumnExpressionArgument,
+    Select,
+    Table,
+    any_,
+    delete,
+    func,
+    literal,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg
+from sqlalchemy.engine import Dialect
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import InstrumentedAttribute
 
+from app.models.base import ActiveRecordModel
+
 T = TypeVar("T", bound=Any)
 ColumnClauseType = Union[
     type[T],
     InstrumentedAttribute[T],
 ]
 
+# Оценка числа строк по статистике таблицы, масштабированная на ее текущий размер,
+# как это делает планировщик. NULL, если таблица еще не анализировалась
+_ESTIMATE_ROWS: Final = text(
+    """
+    SELECT (
+        CASE WHEN c.reltuples < 0 THEN NULL
+             WHEN c.relpages = 0 THEN 0
+             ELSE c.reltuples / c.relpages
+        END * (pg_relation_size(c.oid) / current_setting('block_size')::int)
+    )::bigint
+    FROM pg_class c
+    WHERE c.oid = to_regclass(:table)
+    """
+)
+
+
+def asyncpg_dialect() -> Dialect:
+    """Диалект asyncpg для компиляции запросов вне соединения"""
+    return PGDialect_asyncpg()  # type: ignore[no-untyped-call]
+
+
+class RawStatement:
+    """
+    Запрос, скомпилированный в SQL asyncpg один раз при импорте, для выполнения
+    напрямую драйвером. Подготовленный запрос кэшируется asyncpg на соединении.
+    """
+
+    sql: str
+    params: tuple[str, ...]
+
+    __slots__ = ("sql", "params")
+
+    def __init__(self, query: Select[Any]) -> None:
+        compiled = query.compile(dialect=asyncpg_dialect())
+        self.sql = compiled.string
+        self.params = tuple(compiled.positiontup or ())
+
+
+def dto_columns(table: Table, dto: type[ActiveRecordModel]) -> list[Column[Any]]:
+    """Колонки таблицы, из которых собирается ``dto``, в порядке его полей"""
+    return [table.c[name] for name in dto.__columns__]
+
+
+# Предел числа параметров одного запроса в протоколе Postgres
+MAX_PARAMETERS: Final[int] = 32767
+# Значений в одном массиве ``= ANY($1)``. Параметр всегда один, размер пачки ограничивает
+# объем запроса и ответа и число строк, блокируемых одним изменением
+ANY_CHUNK_SIZE: Final[int] = 10000
+
+
+def any_of(column: Any, values: Sequence[Any]) -> ColumnElement[bool]:
+    """
+    ``column = ANY($1)``: список передается одним параметром-массивом, а не параметром
+    на каждое значение, как в ``IN``, и запрос не зависит от длины списка
+    """
+    return cast(ColumnElement[bool], column == any_(literal(list(values), ARRAY(column.type))))
+
+
+def chunked(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+class CountMode(StrEnum):
+    # count(*) по таблице, точно, но читает ее целиком
+    EXACT = "exact"
+    # Оценка планировщика без чтения таблицы, погрешность зависит от свежести статистики
+    ESTIMATE = "estimate"
+    # Точное значение, обновляемое в фоне не чаще раза в TTL (``CachedCount``)
+    CACHED = "cached"
+
 
 # noinspection PyTypeChecker
 class BaseRepository:
@@ -20,6 +111,26 @@ class BaseRepository:
     def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
+    async def _driver_connection(self) -> Any:
+        """Соединение драйвера (asyncpg) сессии для операций вне SQLAlchemy, например COPY"""
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        return raw_connection.driver_connection
+
+    async def _fetch_row(self, statement: RawStatement, **params: Any) -> Optional[Any]:
+        """
+        Выполняет запрос драйвером в обход SQLAlchemy: без построения и компиляции
+        запроса, событий движка и объектов ORM. Изменения сессии, еще не записанные
+        в БД, не видны.
+
+        :return: ``asyncpg.Record`` или ``None``
+        """
+        driver_connection = await self._driver_connection()
+        return await driver_connection.fetchrow(
+            statement.sql,
+            *(params[name] for name in statement.params),
+        )
+
     async def _get(
         self,
         model: ColumnClauseType[T],
@@ -38,6 +149,60 @@ class BaseRepository:
     ) -> list[T]:
         return list(await self.session.scalars(select(model).where(*conditions)))
 
+    async def _get_many_by(
+        self,
+        model: ColumnClauseType[T],
+        key: InstrumentedAttribute[Any],
+        values: Sequence[Any],
+    ) -> list[T]:
+        """Строки, у которых ``key`` входит в ``values``, по запросу на ``ANY_CHUNK_SIZE``"""
+        result: list[T] = []
+        for chunk in chunked(values, ANY_CHUNK_SIZE):
+            result.extend(await self._get_many(model, any_of(key, chunk)))
+        return result
+
+    async def _count(
+        self,
+        model: ColumnClauseType[T],
+        *conditions: ColumnExpressionArgument[Any],
+        mode: CountMode = CountMode.EXACT,
+    ) -> int:
+        if mode == CountMode.ESTIMATE:
+            return await self._estimate_count(model, *conditions)
+        query = select(func.count()).select_from(model).where(*conditions)
+        return cast(int, await self.session.scalar(query))
+
+    async def _estimate_count(
+        self,
+        model: ColumnClauseType[T],
+        *conditions: ColumnExpressionArgument[Any],
+    ) -> int:
+        """
+        Оценка числа строк без чтения таблицы: по статистике ``pg_class`` для всей таблицы
+        и по плану запроса (``EXPLAIN``) для условий или еще не анализированной таблицы.
+        """
+        if not conditions:
+            connection = await self.session.connection()
+            table = connection.dialect.identifier_preparer.format_table(model.__table__)
+            rows = await self.session.scalar(_ESTIMATE_ROWS, {"table": table})
+            if rows is not None:
+                return cast(int, rows)
+        return await self._explain_rows(select(1).select_from(model).where(*conditions))
+
+    async def _explain_rows(self, query: Select[Any]) -> int:
+        """Число строк результата ``query`` по оценке планировщика"""
+        connection = await self.session.connection()
+        compiled = query.compile(dialect=connection.dialect)
+        params = compiled.construct_params()
+        result = await connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled.string}",
+            tuple(params[name] for name in compiled.positiontup or ()),
+        )
+        plan = result.scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
     async def _update(
         self,
         model: ColumnClauseType[T],
@@ -1,16 +1,129 @@
-from typing import Any, Optional, cast
+from itertools import chain
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    BinaryIO,
+    Callable,
+    Final,
+    Literal,
+    Optional,
+    Sequence,
+    TypeAlias,
+    Union,
+    cast,
+)
 
-from sqlalchemy import select
-from sqlalchemy.sql.functions import count
+from aiogram.types import User as AiogramUser
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    ColumnElement,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    bindparam,
+    case,
+    column,
+    delete,
+    exists,
+    false,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    union_all,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.schema import CreateTable, DropTable
 
+from app.models.dto import AdminUserDto, UserDto, UserImportRecord
 from app.models.sql import AdminUser, User
-from .base import BaseRepository
+from app.models.sql.mixins.timestamp import NowFunc
+
+from ..transaction import WRITES_OPTION
+from .base import (
+    ANY_CHUNK_SIZE,
+    MAX_PARAMETERS,
+    BaseRepository,
+    CountMode,
+    RawStatement,
+    any_of,
+    asyncpg_dialect,
+    chunked,
+    dto_columns,
+)
+
+if TYPE_CHECKING:
+    from app.services.activity import UserActivity
+
+ExportFormat: TypeAlias = Literal["csv", "ndjson"]
+# Файл, путь или корутина, получающая данные COPY частями
+ExportOutput: TypeAlias = Union[str, BinaryIO, Callable[[bytes], Awaitable[Any]]]
+
+EXPORT_COLUMNS: Final[tuple[str, ...]] = (
+    "user_id",
+    *UserImportRecord._fields,
+    "last_seen_at",
+    "message_count",
+    "created_at",
+)
+_IMPORT_TABLE: Final[str] = "user_import"
+
+# Запросы частых выборок строятся один раз: SQLAlchemy находит их в кэше компиляции
+# без повторного построения запроса и вычисления его ключа
+_ADMIN_BY_USERNAME: Final = select(AdminUser).where(AdminUser.username == bindparam("username"))
+_USER_BY_ID: Final = select(User).where(User.user_id == bindparam("user_id"))
+_USER_BY_TG_ID: Final = select(User).where(User.telegram_id == bindparam("telegram_id"))
+
+# Те же выборки для чтения строк драйвером сразу в DTO (SQLAlchemyConfig.raw_lookups)
+_RAW_ADMIN_BY_USERNAME: Final = RawStatement(
+    select(*dto_columns(cast(Table, AdminUser.__table__), AdminUserDto)).where(
+        AdminUser.username == bindparam("username")
+    )
+)
+_RAW_USER_BY_ID: Final = RawStatement(
+    select(*dto_columns(cast(Table, User.__table__), UserDto)).where(
+        User.user_id == bindparam("user_id")
+    )
+)
+_RAW_USER_BY_TG_ID: Final = RawStatement(
+    select(*dto_columns(cast(Table, User.__table__), UserDto)).where(
+        User.telegram_id == bindparam("telegram_id")
+    )
+)
+
+
+def _update_changed(stmt: Insert, fields: Sequence[str]) -> Insert:
+    """
+    ``ON CONFLICT (telegram_id) DO UPDATE`` только для строк, в которых ``fields``
+    действительно изменились: остальные не перезаписываются и не попадают в RETURNING
+    """
+    table = User.__table__
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.telegram_id],
+        set_={**{field: stmt.excluded[field] for field in fields}, "updated_at": NowFunc},
+        where=or_(*(table.c[field].is_distinct_from(stmt.excluded[field]) for field in fields)),
+    )
 
 
 class AdminUsersRepository(BaseRepository):
     async def get_by_username(self, username: str) -> Optional[AdminUser]:
-        stmt = select(AdminUser).where(AdminUser.username == username)
-        return await self.session.scalar(stmt)
+        return cast(
+            Optional[AdminUser],
+            await self.session.scalar(_ADMIN_BY_USERNAME, {"username": username}),
+        )
+
+    async def get_dto_by_username(self, username: str) -> Optional[AdminUserDto]:
+        row = await self._fetch_row(_RAW_ADMIN_BY_USERNAME, username=username)
+        return None if row is None else AdminUserDto.from_mapping(row)
 
     ## Akeeper 16.10.2025
     async def get_one_or_none(self, **filter_by):
@@ -31,17 +144,165 @@ class AdminUsersRepository(BaseRepository):
 # noinspection PyTypeChecker
 class UsersRepository(BaseRepository):
     async def get(self, user_id: int) -> Optional[User]:
-        return await self._get(User, User.user_id == user_id)
+        return cast(Optional[User], await self.session.scalar(_USER_BY_ID, {"user_id": user_id}))
 
-    async def get_many(self, ids: list[int]) -> list[User | None]:
-        return await self._get_many(User, User.user_id.in_(ids))
+    async def get_dto(self, user_id: int) -> Optional[UserDto]:
+        row = await self._fetch_row(_RAW_USER_BY_ID, user_id=user_id)
+        return None if row is None else UserDto.from_mapping(row)
+
+    async def get_many(self, ids: Sequence[int]) -> list[User]:
+        return await self._get_many_by(User, User.user_id, ids)
+
+    async def get_many_by_tg_ids(self, telegram_ids: Sequence[int]) -> list[User]:
+        return await self._get_many_by(User, User.telegram_id, telegram_ids)
 
     async def get_by_tg_id(self, telegram_id: int) -> Optional[User]:
-        return await self._get(User, User.telegram_id == telegram_id)
+        return cast(
+            Optional[User],
+            await self.session.scalar(_USER_BY_TG_ID, {"telegram_id": telegram_id}),
+        )
+
+    async def get_dto_by_tg_id(self, telegram_id: int) -> Optional[UserDto]:
+        row = await self._fetch_row(_RAW_USER_BY_TG_ID, telegram_id=telegram_id)
+        return None if row is None else UserDto.from_mapping(row)
 
     async def get_all(self) -> list[User]:
         return await self._get_many(User)
 
+    @staticmethod
+    def _filters(
+        bot_blocked: Optional[bool] = None,
+        language: Optional[str] = None,
+    ) -> list[ColumnElement[bool]]:
+        conditions: list[ColumnElement[bool]] = []
+        if bot_blocked is not None:
+            conditions.append(User.bot_blocked.is_(bot_blocked))
+        if language is not None:
+            conditions.append(User.language == language)
+        return conditions
+
+    async def iter_chunks(
+        self,
+        chunk_size: int = 1000,
+        bot_blocked: Optional[bool] = None,
+        language: Optional[str] = None,
+    ) -> AsyncIterator[list[User]]:
+        """
+        Перебирает пользователей пачками по ``chunk_size`` в порядке ``user_id``.
+
+        Каждая пачка читается отдельным запросом по первичному ключу после последнего
+        прочитанного ``user_id`` (keyset), без OFFSET и без открытой транзакции
+        или курсора на все время перебора. Сессия держит прочитанные объекты по слабым
+        ссылкам, поэтому память не растет с размером таблицы.
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be positive")
+        query = (
+            select(User)
+            .where(*self._filters(bot_blocked=bot_blocked, language=language))
+            .order_by(User.user_id)
+            .limit(chunk_size)
+        )
+        last_id: Optional[int] = None
+        while True:
+            page = query if last_id is None else query.where(User.user_id > last_id)
+            users = list(await self.session.scalars(page))
+            if not users:
+                return
+            yield users
+            if len(users) < chunk_size:
+                return
+            last_id = users[-1].user_id
+
+    async def upsert_from_telegram(
+        self,
+        aiogram_user: AiogramUser,
+        language: str,
+    ) -> tuple[User, bool]:
+        """
+        Регистрирует пользователя или обновляет его профиль из Telegram одним запросом.
+
+        Строка перезаписывается, только если поля профиля действительно изменились.
+        Иначе существующая строка читается в том же запросе, поэтому обычное обращение
+        известного пользователя ничего не пишет в БД. Одновременные первые обновления
+        от одного пользователя не конфликтуют на уникальном ``telegram_id``.
+
+        :param language: Язык нового пользователя, у существующего не меняется
+        :return: Пользователь и признак того, что он был создан
+        """
+        table = User.__table__
+        values = {
+            "name": aiogram_user.full_name,
+            "username": aiogram_user.username,
+            "language_code": aiogram_user.language_code,
+        }
+        stmt = insert(User).values(telegram_id=aiogram_user.id, language=language, **values)
+        upsert = (
+            _update_changed(stmt, fields=list(values))
+            # Строка, вставленная без конфликта, еще не имеет xmax
+            .returning(*table.c, literal_column("xmax = 0", Boolean).label("created"))
+            .cte("upsert")
+        )
+        existing = select(*table.c, false().label("created")).where(
+            table.c.telegram_id == aiogram_user.id,
+            ~exists(select(upsert.c.user_id)),
+        )
+        query = select(User, literal_column("created", Boolean)).from_statement(
+            union_all(select(upsert), existing)
+        )
+        result = await self.session.execute(
+            query,
+            execution_options={WRITES_OPTION: True, "populate_existing": True},
+        )
+        row = result.one_or_none()
+        if row is None:
+            # Строку вставила параллельная транзакция после снимка, с которым выполнялся запрос
+            user = cast(User, await self.get_by_tg_id(telegram_id=aiogram_user.id))
+            return user, False
+        return row[0], row[1]
+
+    async def apply_activity(self, activity: Sequence["UserActivity"]) -> None:
+        """
+        Записывает накопленную активность ``UPDATE ... FROM (VALUES ...)``,
+        по запросу на пачку в пределах ``MAX_PARAMETERS``
+        """
+        columns = (
+            column("user_id", Integer),
+            column("last_seen_at", DateTime(timezone=True)),
+            column("messages", Integer),
+            column("profile", Boolean),
+            column("name", String),
+            column("username", String),
+            column("language_code", String),
+        )
+        table = cast(Table, User.__table__)
+        # Еще один параметр - часовой пояс в NowFunc
+        for chunk in chunked(activity, (MAX_PARAMETERS - 1) // len(columns)):
+            rows = values(*columns, name="activity").data(
+                [
+                    (item.user_id, item.last_seen_at, item.messages, item.profile is not None)
+                    + (item.profile or (None, None, None))
+                    for item in chunk
+                ]
+            )
+
+            def profile_field(field: str) -> Any:
+                return case((rows.c.profile, rows.c[field]), else_=table.c[field])
+
+            stmt = (
+                update(table)
+                .where(table.c.user_id == rows.c.user_id)
+                .values(
+                    last_seen_at=func.greatest(table.c.last_seen_at, rows.c.last_seen_at),
+                    message_count=table.c.message_count + rows.c.messages,
+                    name=profile_field("name"),
+                    username=profile_field("username"),
+                    language_code=profile_field("language_code"),
+                    updated_at=case((rows.c.profile, NowFunc), else_=table.c.updated_at),
+                )
+            )
+            await self.session.execute(stmt)
+
     async def update(self, user_id: int, **data: Any) -> Optional[User]:
         return await self._update(
             model=User,
@@ -50,8 +311,149 @@ class UsersRepository(BaseRepository):
             **data,
         )
 
-    async def count(self) -> int:
-        return cast(int, await self.session.scalar(select(count(User.user_id))))
+    async def bulk_update(self, user_ids: Sequence[int], **data: Any) -> list[User]:
+        """
+        Присваивает ``data`` всем пользователям из ``user_ids``
+        одним ``UPDATE ... WHERE user_id = ANY($1)`` на ``ANY_CHUNK_SIZE`` пользователей
+
+        :return: Измененные пользователи
+        """
+        if not data:
+            return await self.get_many(user_ids)
+        result: list[User] = []
+        for chunk in chunked(user_ids, ANY_CHUNK_SIZE):
+            stmt = update(User).where(any_of(User.user_id, chunk)).values(**data)
+            result.extend(await self.session.scalars(stmt.returning(User)))
+        return result
+
+    async def bulk_upsert(self, records: Sequence[UserImportRecord]) -> list[tuple[User, bool]]:
+        """
+        Создает или обновляет пользователей многострочным ``INSERT ... ON CONFLICT``,
+        по запросу на пачку в пределах ``MAX_PARAMETERS``. Как и при импорте, существующие
+        пользователи перезаписываются, только если поля изменились, из повторов одного
+        ``telegram_id`` применяется последний.
+
+        :return: Созданные или измененные пользователи и признак создания
+        """
+        table = cast(Table, User.__table__)
+        fields = UserImportRecord._fields
+        updated_fields = [field for field in fields if field != "telegram_id"]
+        # Одна строка не может быть изменена дважды в одном ON CONFLICT
+        unique = list({record.telegram_id: record for record in records}.values())
+        result: list[tuple[User, bool]] = []
+        # Еще один параметр - часовой пояс в NowFunc
+        for chunk in chunked(unique, (MAX_PARAMETERS - 1) // len(fields)):
+            stmt = insert(table).values([record._asdict() for record in chunk])
+            upsert = _update_changed(stmt, fields=updated_fields).returning(
+                *table.c, literal_column("xmax = 0", Boolean).label("created")
+            )
+            query = select(User, literal_column("created", Boolean)).from_statement(upsert)
+            rows = await self.session.execute(
+                query, execution_options={WRITES_OPTION: True, "populate_existing": True}
+            )
+            result.extend((user, created) for user, created in rows)
+        return result
+
+    async def count(
+        self,
+        mode: CountMode = CountMode.EXACT,
+        bot_blocked: Optional[bool] = None,
+        language: Optional[str] = None,
+    ) -> int:
+        """Число пользователей, ``CountMode.CACHED`` кэшируется уровнем выше и здесь точное"""
+        conditions = self._filters(bot_blocked=bot_blocked, language=language)
+        return await self._count(User, *conditions, mode=mode)
+
+    async def delete(self, user_id: int) -> Optional[int]:
+        """:return: ``telegram_id`` удаленного пользователя"""
+        stmt = delete(User).where(User.user_id == user_id).returning(User.telegram_id)
+        return cast(Optional[int], await self.session.scalar(stmt))
+
+    async def bulk_delete(self, user_ids: Sequence[int]) -> list[User]:
+        """
+        Удаляет пользователей одним ``DELETE ... WHERE user_id = ANY($1)``
+        на ``ANY_CHUNK_SIZE`` пользователей
+
+        :return: Удаленные пользователи
+        """
+        result: list[User] = []
+        for chunk in chunked(user_ids, ANY_CHUNK_SIZE):
+            stmt = delete(User).where(any_of(User.user_id, chunk)).returning(User)
+            result.extend(await self.session.scalars(stmt))
+        return result
+
+    async def import_batch(self, records: Sequence[UserImportRecord]) -> list[tuple[int, bool]]:
+        """
+        Загружает пачку пользователей через COPY во временную таблицу и переносит ее
+        в ``users.user`` одним ``INSERT ... ON CONFLICT``. Существующие пользователи
+        перезаписываются, только если поля действительно изменились, из повторов одного
+        ``telegram_id`` в пачке применяется последний.
+
+        :return: ``telegram_id`` созданных или измененных пользователей и признак создания
+        """
+        table = cast(Table, User.__table__)
+        fields = UserImportRecord._fields
+        staging = Table(
+            _IMPORT_TABLE,
+            MetaData(),
+            *(Column(field, table.c[field].type) for field in fields),
+            Column("position", BigInteger),
+            prefixes=["TEMPORARY"],
+        )
+        # Первая запись открывает транзакцию, временная таблица живет только в ней
+        await self.session.execute(CreateTable(staging))
+        driver_connection = await self._driver_connection()
+        await driver_connection.copy_records_to_table(
+            _IMPORT_TABLE,
+            records=[(*record, position) for position, record in enumerate(records)],
+            columns=staging.c.keys(),
+        )
+        stmt = insert(table).from_select(
+            fields,
+            select(*(staging.c[field] for field in fields))
+            .distinct(staging.c.telegram_id)
+            .order_by(staging.c.telegram_id, staging.c.position.desc()),
+        )
+        updated_fields = [field for field in fields if field != "telegram_id"]
+        upsert = _update_changed(stmt, fields=updated_fields).returning(
+            table.c.telegram_id, literal_column("xmax = 0", Boolean)
+        )
+        result = await self.session.execute(upsert)
+        changed = [(telegram_id, created) for telegram_id, created in result]
+        await self.session.execute(DropTable(staging))
+        return changed
+
+    async def export(
+        self,
+        output: ExportOutput,
+        fmt: ExportFormat = "csv",
+        bot_blocked: Optional[bool] = None,
+        language: Optional[str] = None,
+    ) -> int:
+        """
+        Выгружает пользователей через ``COPY ... TO STDOUT`` в порядке ``user_id``:
+        CSV с заголовком или по одному JSON-объекту в строке (NDJSON).
+        Данные передаются в ``output`` частями по мере чтения.
 
-    async def delete(self, user_id: int) -> None:
-        return await self._delete(User, User.user_id == user_id)
+        :return: Число выгруженных пользователей
+        """
+        table = User.__table__
+        columns = [table.c[name] for name in EXPORT_COLUMNS]
+        if fmt == "ndjson":
+            pairs = chain.from_iterable((literal(col.name), col) for col in columns)
+            query = select(func.json_build_object(*pairs))
+        else:
+            query = select(*columns)
+        query = query.where(*self._filters(bot_blocked=bot_blocked, language=language))
+        query = query.order_by(table.c.user_id)
+        # COPY не принимает параметры, значения фильтров подставляются в текст запроса
+        sql = str(query.compile(dialect=asyncpg_dialect(), compile_kwargs={"literal_binds": True}))
+        if fmt == "ndjson":
+            # JSON не содержит управляющих символов, поэтому CSV с такими кавычками
+            # и разделителем выводит строки как есть, без экранирования
+            options: dict[str, Any] = {"format": "csv", "quote": "\x01", "delimiter": "\x02"}
+        else:
+            options = {"format": "csv", "header": True}
+        driver_connection = await self._driver_connection()
+        status: str = await driver_connection.copy_from_query(sql, output=output, **options)
+        return int(status.rsplit(maxsplit=1)[-1])
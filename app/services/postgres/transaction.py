@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from enum import StrEnum
+from typing import Any, Final
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import ORMExecuteState, Session, SessionTransaction, UOWTransaction
+
+# Ключ ``info`` сессии: в текущей транзакции что-то записывалось в БД
+WRITES_KEY: Final[str] = "writes"
+# Опция выполнения для SELECT с побочными эффектами (``pg_notify``, INSERT в CTE и т.п.):
+# такой запрос считается записью, и транзакция с ним фиксируется
+WRITES_OPTION: Final[str] = "writes"
+
+
+class SessionMode(StrEnum):
+    # Обычная транзакция, фиксируется, только если в ней что-то записывалось
+    READ_WRITE = "read_write"
+    # Транзакция ``BEGIN READ ONLY``, запись отклоняется БД
+    READ_ONLY = "read_only"
+    # Каждый запрос фиксируется сам по себе
+    AUTOCOMMIT = "autocommit"
+
+
+# Опции соединения для режимов, отличных от обычного
+_MODE_OPTIONS: Final[dict[SessionMode, dict[str, Any]]] = {
+    SessionMode.READ_ONLY: {"postgresql_readonly": True},
+    SessionMode.AUTOCOMMIT: {"isolation_level": "AUTOCOMMIT"},
+}
+
+
+class WriteTrackingSession(Session):
+    """
+    Сессия, которая отмечает в ``info`` (``WRITES_KEY``) запись в БД: flush,
+    INSERT/UPDATE/DELETE и прочие запросы, кроме SELECT без ``WRITES_OPTION``.
+    Отметка сбрасывается при завершении транзакции.
+    """
+
+
+@event.listens_for(WriteTrackingSession, "after_flush")
+def _after_flush(session: Session, flush_context: UOWTransaction) -> None:
+    session.info[WRITES_KEY] = True
+
+
+@event.listens_for(WriteTrackingSession, "do_orm_execute")
+def _do_orm_execute(orm_execute_state: ORMExecuteState) -> None:
+    state = orm_execute_state
+    if not state.is_select or state.execution_options.get(WRITES_OPTION):
+        state.session.info[WRITES_KEY] = True
+
+
+@event.listens_for(WriteTrackingSession, "after_transaction_end")
+def _after_transaction_end(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(WRITES_KEY, None)
+
+
+def has_writes(session: Session) -> bool:
+    """Записывалось ли что-то в текущей транзакции или ждет записи при фиксации"""
+    return bool(session.info.get(WRITES_KEY) or session.new or session.dirty or session.deleted)
+
+
+def mode_engine(engine: AsyncEngine, mode: SessionMode) -> AsyncEngine:
+    """
+    Движок с тем же пулом соединений, выполняющий транзакции в режиме ``mode``.
+    Опции действуют на время использования соединения и сбрасываются при возврате в пул
+    """
+    options = _MODE_OPTIONS.get(mode)
+    if options is None:
+        return engine
+    return engine.execution_options(**options)
@@ -1,15 +1,47 @@
-from typing import Any, Optional
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Iterable, Optional, Sequence
 
 from aiogram.types import User as AiogramUser
 
-from app.models.dto import AdminUserDto, UserDto
+from app.models.config import AppConfig
+from app.models.dto import AdminUserDto, UserDto, UserImportRecord
 from app.models.sql import User, AdminUser
+from app.services.postgres import CountMode, Repository, notify_invalidation
+from app.services.postgres.repositories.user import ExportFormat, ExportOutput
+from .activity import UserActivityBuffer
 from .base import BaseService
+from .cache import ADMIN_USER_CACHE, USER_CACHE, AdminUserCache, UserCache
+from .counter import CachedCount
 from ..admin.auth import hash_password
 from ..models.dto.user import AdminUserCreateWithPwdDto
 
 
 class AdminUserService(BaseService):
+    """
+    Сервис администраторов.
+
+    Если передан ``admin_cache``, администраторы по ``username`` (проверка сессии
+    на каждый запрос админ-панели) читаются из кэша процесса.
+    """
+
+    admin_cache: Optional[AdminUserCache]
+
+    def __init__(
+        self,
+        repository: Repository,
+        config: AppConfig,
+        admin_cache: Optional[AdminUserCache] = None,
+    ) -> None:
+        super().__init__(repository=repository, config=config)
+        self.admin_cache = admin_cache
+
+    async def invalidate(self, username: str) -> None:
+        """Удаляет администратора из кэша этого и остальных процессов"""
+        if self.admin_cache is None:
+            return
+        self.admin_cache.invalidate(username)
+        await notify_invalidation(self.session, cache=ADMIN_USER_CACHE, keys=[username])
+
     ## Akeeper 16.10.2025
     async def create(self, data: AdminUserCreateWithPwdDto) -> AdminUserDto:
         _data = data
@@ -32,10 +64,21 @@ class AdminUserService(BaseService):
     ## ~Akeeper
 
     async def get_by_username(self, username: str) -> AdminUserDto | None:
-        obj = await self.repository.admin_users.get_by_username(username=username)
-        if obj is None:
+        if self.admin_cache is not None:
+            cached = self.admin_cache.get(username)
+            if cached is not None:
+                return cached.model_copy()
+        admin_user: Optional[AdminUserDto]
+        if self.config.sql_alchemy.raw_lookups:
+            admin_user = await self.repository.admin_users.get_dto_by_username(username=username)
+        else:
+            obj = await self.repository.admin_users.get_by_username(username=username)
+            admin_user = None if obj is None else obj.dto()
+        if admin_user is None:
             return None
-        return obj.dto()
+        if self.admin_cache is not None:
+            self.admin_cache.set(username, admin_user.model_copy())
+        return admin_user
 
     async def update_password(self, username: str, new_password: str) -> bool:
         """Обновляет пароль админа по username."""
@@ -46,6 +89,7 @@ class AdminUserService(BaseService):
                 password=hashed_password,
             )
             if updated_admin:
+                await self.invalidate(username)
                 self.logger.info(f"Password updated successfully for admin: {username}")
                 return True
             return False
@@ -55,6 +99,59 @@ class AdminUserService(BaseService):
 
 
 class UserService(BaseService):
+    """
+    Сервис пользователей бота.
+
+    Если передан ``user_cache``, пользователи по ``telegram_id`` читаются из общего для
+    процесса кэша, а изменения через сервис удаляют устаревшие записи из него
+    и из кэшей остальных процессов (``CacheInvalidationBus``).
+    Кэш хранит свои экземпляры ``UserDto`` и отдает их копии.
+    """
+
+    user_cache: Optional[UserCache]
+    user_activity: Optional[UserActivityBuffer]
+    user_count: Optional[CachedCount]
+
+    def __init__(
+        self,
+        repository: Repository,
+        config: AppConfig,
+        user_cache: Optional[UserCache] = None,
+        user_activity: Optional[UserActivityBuffer] = None,
+        user_count: Optional[CachedCount] = None,
+    ) -> None:
+        super().__init__(repository=repository, config=config)
+        self.user_cache = user_cache
+        self.user_activity = user_activity
+        self.user_count = user_count
+
+    def _cached(self, telegram_id: int) -> Optional[UserDto]:
+        if self.user_cache is None:
+            return None
+        user = self.user_cache.get(telegram_id)
+        return None if user is None else user.model_copy()
+
+    def _cache(self, user: UserDto) -> UserDto:
+        if self.user_cache is not None:
+            self.user_cache.set(user.telegram_id, user.model_copy())
+        return user
+
+    async def invalidate(self, telegram_id: int) -> None:
+        """
+        Удаляет пользователя из кэша этого и остальных процессов.
+
+        Внутри транзакции остальные процессы получают сообщение после ее фиксации,
+        текущий тоже: запись, прочитанная из БД до фиксации, удаляется повторно.
+        """
+        await self.invalidate_many([telegram_id])
+
+    async def invalidate_many(self, telegram_ids: Sequence[int]) -> None:
+        if self.user_cache is None or not telegram_ids:
+            return
+        for telegram_id in telegram_ids:
+            self.user_cache.invalidate(telegram_id)
+        await notify_invalidation(self.session, cache=USER_CACHE, keys=list(telegram_ids))
+
     async def create(
         self,
         aiogram_user: AiogramUser,
@@ -72,37 +169,217 @@ class UserService(BaseService):
         await self.session.flush()
         return db_user.dto()
 
+    async def upsert_from_telegram(
+        self,
+        aiogram_user: AiogramUser,
+        language: str = "en",
+    ) -> tuple[UserDto, bool]:
+        """
+        Регистрирует пользователя или обновляет его профиль, возвращает признак создания.
+        Известный пользователь берется из кэша без обращения к БД, изменения его профиля
+        записываются позже через ``user_activity``, если он передан.
+        """
+        cached = self._cached(aiogram_user.id)
+        if cached is not None:
+            name = aiogram_user.full_name
+            username = aiogram_user.username
+            language_code = aiogram_user.language_code
+            if (cached.name, cached.username, cached.language_code) == (
+                name,
+                username,
+                language_code,
+            ):
+                return cached, False
+            if self.user_activity is not None:
+                self.user_activity.update_profile(
+                    user_id=cached.user_id,
+                    name=name,
+                    username=username,
+                    language_code=language_code,
+                )
+                update = {"name": name, "username": username, "language_code": language_code}
+                return self._cache(cached.model_copy(update=update)), False
+        user, created = await self.repository.users.upsert_from_telegram(
+            aiogram_user=aiogram_user,
+            language=language,
+        )
+        return self._cache(user.dto()), created
+
     async def get(self, user_id: int) -> Optional[UserDto]:
+        if self.config.sql_alchemy.raw_lookups:
+            return await self.repository.users.get_dto(user_id=user_id)
         user = await self.repository.users.get(user_id=user_id)
         if user is None:
             return None
         return user.dto()
 
     async def get_by_tg_id(self, telegram_id: int) -> Optional[UserDto]:
-        user = await self.repository.users.get_by_tg_id(telegram_id=telegram_id)
-        if user is None:
+        cached = self._cached(telegram_id)
+        if cached is not None:
+            return cached
+        if self.config.sql_alchemy.raw_lookups:
+            user = await self.repository.users.get_dto_by_tg_id(telegram_id=telegram_id)
+            return None if user is None else self._cache(user)
+        db_user = await self.repository.users.get_by_tg_id(telegram_id=telegram_id)
+        if db_user is None:
             return None
-        return user.dto()
+        return self._cache(db_user.dto())
+
+    async def get_many_by_tg_ids(self, telegram_ids: Iterable[int]) -> list[UserDto]:
+        """
+        Пользователи по списку ``telegram_id``, ненайденные пропускаются, порядок не сохраняется.
+        Пользователи из кэша не запрашиваются из БД, но прочитанные из БД не кэшируются,
+        чтобы массовые выборки не вытесняли из кэша активных пользователей.
+        """
+        users: list[UserDto] = []
+        missing: list[int] = []
+        for telegram_id in dict.fromkeys(telegram_ids):
+            cached = self._cached(telegram_id)
+            if cached is None:
+                missing.append(telegram_id)
+            else:
+                users.append(cached)
+        if missing:
+            db_users = await self.repository.users.get_many_by_tg_ids(missing)
+            users.extend(user.dto() for user in db_users)
+        return users
 
     async def get_all(self) -> list[UserDto] | None:
-        """Получить всех пользователей."""
+        """Получить всех пользователей. Для больших таблиц используйте ``iter_all``."""
         users = await self.repository.users.get_all()
         if not users:
             return None
         return [user.dto() for user in users]
 
-    async def count(self) -> int:
-        return await self.repository.users.count()
+    async def iter_all(
+        self,
+        chunk_size: int = 1000,
+        bot_blocked: Optional[bool] = None,
+        language: Optional[str] = None,
+    ) -> AsyncIterator[UserDto]:
+        """
+        Перебирает пользователей, не загружая таблицу целиком:
+        в памяти одновременно не больше ``chunk_size`` строк.
+        """
+        async for users in self.repository.users.iter_chunks(
+            chunk_size=chunk_size,
+            bot_blocked=bot_blocked,
+            language=language,
+        ):
+            for user in users:
+                yield user.dto()
+
+    async def import_users(
+        self,
+        records: Iterable[UserImportRecord],
+        batch_size: int = 10000,
+        on_progress: Optional[Callable[[int, int], Any]] = None,
+    ) -> tuple[int, int]:
+        """
+        Массовый импорт пользователей пачками по ``batch_size`` через COPY.
+        Каждая пачка фиксируется своей транзакцией, измененные пользователи
+        удаляются из кэшей всех процессов бота.
+
+        :param on_progress: Вызывается после каждой пачки с числом созданных
+            и обновленных пользователей на текущий момент
+        :return: Число созданных и обновленных пользователей
+        """
+        if batch_size < 1:
+            raise ValueError("Import batch size must be positive")
+        created = updated = 0
+        iterator = iter(records)
+        while batch := list(islice(iterator, batch_size)):
+            changed = await self.repository.users.import_batch(batch)
+            stale = [telegram_id for telegram_id, is_new in changed if not is_new]
+            if stale:
+                if self.user_cache is not None:
+                    for telegram_id in stale:
+                        self.user_cache.invalidate(telegram_id)
+                await notify_invalidation(self.session, cache=USER_CACHE, keys=stale)
+            await self.session.commit()
+            created += len(changed) - len(stale)
+            updated += len(stale)
+            if on_progress is not None:
+                on_progress(created, updated)
+        return created, updated
+
+    async def export_users(
+        self,
+        output: ExportOutput,
+        fmt: ExportFormat = "csv",
+        bot_blocked: Optional[bool] = None,
+        language: Optional[str] = None,
+    ) -> int:
+        """Выгрузка пользователей в CSV или NDJSON, возвращает их число"""
+        return await self.repository.users.export(
+            output=output,
+            fmt=fmt,
+            bot_blocked=bot_blocked,
+            language=language,
+        )
+
+    async def count(
+        self,
+        mode: CountMode = CountMode.EXACT,
+        bot_blocked: Optional[bool] = None,
+        language: Optional[str] = None,
+    ) -> int:
+        """
+        Число пользователей с выбранной точностью.
+        ``CountMode.CACHED`` без фильтров берет значение из ``user_count``,
+        без него или с фильтрами считает точно.
+        """
+        if mode == CountMode.CACHED:
+            if self.user_count is not None and bot_blocked is None and language is None:
+                return await self.user_count.get()
+            mode = CountMode.EXACT
+        return await self.repository.users.count(
+            mode=mode,
+            bot_blocked=bot_blocked,
+            language=language,
+        )
 
     async def update(self, user: UserDto, **data: Any) -> Optional[UserDto]:
         for key, value in data.items():
             setattr(user, key, value)
         user_db = await self.repository.users.update(user_id=user.user_id, **user.model_state)
+        await self.invalidate(user.telegram_id)
         if user_db is None:
             self.logger.error(f"User: {user.user_id} not found for updated!")
             return None
         self.logger.info(f"User: {user.user_id} was updated")
         return user_db.dto()
 
+    async def bulk_update(self, user_ids: Sequence[int], **data: Any) -> list[UserDto]:
+        """
+        Массовое изменение одинаковых полей, например ``bot_blocked`` после рассылки.
+
+        :return: Измененные пользователи
+        """
+        users = await self.repository.users.bulk_update(user_ids, **data)
+        await self.invalidate_many([user.telegram_id for user in users])
+        self.logger.info(f"Users updated: {len(users)}")
+        return [user.dto() for user in users]
+
+    async def bulk_upsert(self, records: Sequence[UserImportRecord]) -> list[UserDto]:
+        """
+        Создает или обновляет пользователей в текущей транзакции,
+        для больших объемов используйте ``import_users``.
+
+        :return: Созданные или измененные пользователи
+        """
+        changed = await self.repository.users.bulk_upsert(records)
+        await self.invalidate_many([user.telegram_id for user, created in changed if not created])
+        return [user.dto() for user, _ in changed]
+
+    async def bulk_delete(self, user_ids: Sequence[int]) -> list[UserDto]:
+        """:return: Удаленные пользователи"""
+        users = await self.repository.users.bulk_delete(user_ids)
+        await self.invalidate_many([user.telegram_id for user in users])
+        self.logger.info(f"Users deleted: {len(users)}")
+        return [user.dto() for user in users]
+
     async def delete(self, user_id: int) -> None:
-        return await self.repository.users.delete(user_id=user_id)
+        telegram_id = await self.repository.users.delete(user_id=user_id)
+        if telegram_id is not None:
+            await self.invalidate(telegram_id)
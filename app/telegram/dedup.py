@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from collections import deque
+
+
+class UpdateIdIndex:
+    """
+    Индекс недавно полученных ``update_id`` фиксированного размера.
+
+    Хранит последние ``capacity`` идентификаторов в кольцевом буфере и множестве,
+    поэтому проверка и добавление выполняются за O(1), а память не растет.
+    """
+
+    capacity: int
+    duplicates: int
+
+    __slots__ = ("capacity", "duplicates", "_order", "_seen")
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("Update index capacity must be positive")
+        self.capacity = capacity
+        self.duplicates = 0
+        self._order: deque[int] = deque()
+        self._seen: set[int] = set()
+
+    def __contains__(self, update_id: int) -> bool:
+        return update_id in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def add(self, update_id: int) -> None:
+        if update_id in self._seen:
+            return
+        if len(self._order) >= self.capacity:
+            self._seen.discard(self._order.popleft())
+        self._order.append(update_id)
+        self._seen.add(update_id)
+
+    def is_duplicate(self, update_id: int) -> bool:
+        """Проверяет обновление и учитывает его в счетчике дубликатов."""
+        if update_id in self._seen:
+            self.duplicates += 1
+            return True
+        return False
+
+
+class BotUpdateIdIndex:
+    """
+    Индексы недавно полученных ``update_id`` по ботам.
+
+    Идентификаторы обновлений уникальны только в пределах одного бота,
+    поэтому при обслуживании нескольких ботов у каждого свой ``UpdateIdIndex``.
+    """
+
+    capacity: int
+
+    __slots__ = ("capacity", "_indexes")
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("Update index capacity must be positive")
+        self.capacity = capacity
+        self._indexes: dict[int, UpdateIdIndex] = {}
+
+    def __getitem__(self, bot_id: int) -> UpdateIdIndex:
+        index = self._indexes.get(bot_id)
+        if index is None:
+            index = self._indexes[bot_id] = UpdateIdIndex(capacity=self.capacity)
+        return index
+
+    @property
+    def duplicates(self) -> int:
+        return sum(index.duplicates for index in self._indexes.values())
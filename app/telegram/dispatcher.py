@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+from typing import Any, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.types import Update
+
+from app.telegram.journal import JOURNAL_REPLAY_KEY, UpdateJournal
+from app.telegram.scheduler import UpdateScheduler
+
+
+class SchedulingDispatcher(Dispatcher):
+    """
+    Dispatcher, который в polling режиме передает обновления в ``UpdateScheduler``
+    до входа в конвейер aiogram, как это делает webhook endpoint.
+
+    Весь ``feed_update`` (middleware ошибок, FSM и остальные, обработчик) выполняется
+    в очереди планировщика, поэтому роутеры ошибок срабатывают, а блокировка FSM
+    удерживается на время обработчика. Используется с ``handle_as_tasks=False``:
+    цикл polling ждет только постановки обновления в очередь, поэтому переполненная
+    очередь естественным образом притормаживает получение обновлений.
+
+    Если задан ``update_journal``, обновление записывается в журнал до постановки
+    в очередь и отмечается выполненным после обработки.
+    """
+
+    update_scheduler: UpdateScheduler
+    update_journal: Optional[UpdateJournal]
+
+    def __init__(
+        self,
+        *,
+        update_scheduler: UpdateScheduler,
+        update_journal: Optional[UpdateJournal] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.update_scheduler = update_scheduler
+        self.update_journal = update_journal
+
+    async def schedule_update(self, bot: Bot, update: Update, **kwargs: Any) -> None:
+        """Ставит обновление в очередь, ожидая места в ней"""
+        context = UserContextMiddleware.resolve_event_context(update)
+        key = context.chat.id if context.chat else context.user.id if context.user else None
+        journal = self.update_journal
+        if journal is not None and not kwargs.get(JOURNAL_REPLAY_KEY):
+            journal.append(
+                bot_id=bot.id,
+                update_id=update.update_id,
+                payload=update.model_dump_json(exclude_unset=True, by_alias=True).encode(),
+            )
+        await self.update_scheduler.submit(
+            partial(self._process_scheduled, bot=bot, update=update, kwargs=kwargs),
+            key=key,
+        )
+
+    async def _process_update(
+        self,
+        bot: Bot,
+        update: Update,
+        call_answer: bool = True,
+        **kwargs: Any,
+    ) -> bool:
+        # Вызывается циклом polling aiogram для каждого полученного обновления
+        await self.schedule_update(bot, update, **kwargs)
+        return True
+
+    async def _process_scheduled(self, bot: Bot, update: Update, kwargs: dict[str, Any]) -> None:
+        cancelled = False
+        try:
+            await super()._process_update(bot, update, **kwargs)
+        except asyncio.CancelledError:
+            # Прерванное обновление остается в журнале и будет повторено после перезапуска
+            cancelled = True
+            raise
+        finally:
+            if self.update_journal is not None and not cancelled:
+                self.update_journal.done(bot_id=bot.id, update_id=update.update_id)
@@ -19,11 +19,12 @@ async def handle_start(
     message: Message,
     user: UserDto,
 ) -> Any:
-    await message.answer(
+    logger.info(f"User {user.telegram_id} started the bot")
+    # Метод возвращается без await: в webhook режиме он может уйти в теле ответа
+    return message.answer(
         f"Привет, {user.name}!\n\n"
         f"Твой Telegram ID: {user.telegram_id}\n"
         f"Твой ID в базе данных: {user.user_id}\n"
         f"Язык: {user.language}\n\n"
         f"Ты успешно зарегистрирован в базе данных!"
     )
-    logger.info(f"User {user.telegram_id} started the bot")
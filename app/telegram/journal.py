@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import BinaryIO, Final, Iterator, NamedTuple, Optional
+
+logger: Final[logging.Logger] = logging.getLogger(name=__name__)
+
+SEGMENT_PREFIX: Final[str] = "journal-"
+SEGMENT_SUFFIX: Final[str] = ".log"
+
+# Ключ данных, которым помечаются обновления, повторно переданные из журнала
+JOURNAL_REPLAY_KEY: Final[str] = "journal_replay"
+
+
+class JournalRecord(NamedTuple):
+    bot_id: int
+    update_id: int
+    payload: bytes
+
+
+class UpdateJournal:
+    """
+    Локальный журнал входящих обновлений (write-ahead log).
+
+    Обновление записывается в журнал до ответа Telegram и отмечается выполненным
+    после обработки, поэтому после аварийного завершения процесса необработанные
+    обновления можно повторить при следующем запуске.
+
+    Журнал состоит из сегментов ``journal-<номер>.log`` с записями вида::
+
+        A <bot_id> <update_id> <размер>\\n<json обновления>\\n
+        D <bot_id> <update_id>\\n
+
+    Запись идет без буферизации Python (данные сразу попадают в ОС и переживают
+    падение процесса), а ``fsync`` выполняется пакетно раз в ``fsync_interval`` секунд.
+    Той же фоновой задачей сегмент, превысивший ``segment_size``, ротируется: незавершенные
+    записи переносятся в новый сегмент в отдельном потоке, а старые сегменты удаляются.
+    """
+
+    path: Path
+    segment_size: int
+    fsync_interval: float
+
+    def __init__(
+        self,
+        path: str | Path,
+        segment_size: int = 16 * 1024 * 1024,
+        fsync_interval: float = 0.05,
+    ) -> None:
+        self.path = Path(path)
+        self.segment_size = segment_size
+        self.fsync_interval = fsync_interval
+        self._file: Optional[BinaryIO] = None
+        self._segment = 0
+        self._size = 0
+        self._dirty = False
+        self._pending: dict[tuple[int, int], bytes] = {}
+        self._flusher: Optional[asyncio.Task[None]] = None
+        self._rotation: Optional[asyncio.Task[None]] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def open(self) -> list[JournalRecord]:
+        """
+        Открывает журнал и возвращает обновления, не отмеченные выполненными
+        при прошлом запуске, в порядке их поступления. Повторный вызов ничего не возвращает.
+        """
+        if self._file is not None:
+            return []
+        self.path.mkdir(parents=True, exist_ok=True)
+        segments = self._segments()
+        for segment in segments:
+            self._load_segment(self._segment_path(segment))
+        self._segment = segments[-1] if segments else 0
+        await self._rotate()
+        self._flusher = asyncio.create_task(self._flush_periodically())
+
+        records = [
+            JournalRecord(bot_id=bot_id, update_id=update_id, payload=payload)
+            for (bot_id, update_id), payload in self._pending.items()
+        ]
+        if records:
+            logger.warning("Update journal contains %d unprocessed updates", len(records))
+        return records
+
+    def append(self, bot_id: int, update_id: int, payload: bytes) -> None:
+        key = (bot_id, update_id)
+        if key in self._pending:
+            return
+        self._pending[key] = payload
+        self._write_append(bot_id=bot_id, update_id=update_id, payload=payload)
+
+    def done(self, bot_id: int, update_id: int) -> None:
+        if self._pending.pop((bot_id, update_id), None) is None:
+            return
+        self._write(b"D %d %d\n" % (bot_id, update_id))
+
+    async def flush(self) -> None:
+        if self._file is None or not self._dirty:
+            return
+        self._dirty = False
+        # fsync выполняется на копии дескриптора: текущий файл может быть закрыт ротацией
+        fd = os.dup(self._file.fileno())
+        try:
+            await asyncio.to_thread(os.fsync, fd)
+        finally:
+            os.close(fd)
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        if self._rotation is not None:
+            # Ротация не прерывается, иначе записи остались бы в двух сегментах
+            await asyncio.gather(self._rotation, return_exceptions=True)
+            self._rotation = None
+        await self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._pending:
+            logger.warning(
+                "Update journal closed with %d unprocessed updates, "
+                "they will be replayed on next start",
+                len(self._pending),
+            )
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.fsync_interval)
+            try:
+                await self.flush()
+            except OSError:
+                logger.exception("Failed to fsync update journal")
+            if self._size < self.segment_size:
+                continue
+            self._rotation = asyncio.create_task(self._rotate())
+            try:
+                await asyncio.shield(self._rotation)
+            except OSError:
+                logger.exception("Failed to rotate update journal")
+
+    def _write(self, data: bytes) -> None:
+        if self._file is None:
+            raise RuntimeError("Update journal is not opened")
+        self._file.write(data)
+        self._size += len(data)
+        self._dirty = True
+
+    def _write_append(self, bot_id: int, update_id: int, payload: bytes) -> None:
+        self._write(_append_record(bot_id=bot_id, update_id=update_id, payload=payload))
+
+    async def _rotate(self) -> None:
+        segment = self._segment + 1
+        pending = dict(self._pending)
+        data = b"".join(
+            _append_record(bot_id=bot_id, update_id=update_id, payload=payload)
+            for (bot_id, update_id), payload in pending.items()
+        )
+        file = await asyncio.to_thread(self._create_segment, self._segment_path(segment), data)
+        # Пока сегмент записывался, обновления продолжали писаться в текущий файл
+        changes = [
+            _append_record(bot_id=bot_id, update_id=update_id, payload=payload)
+            for (bot_id, update_id), payload in self._pending.items()
+            if (bot_id, update_id) not in pending
+        ]
+        changes.extend(
+            b"D %d %d\n" % (bot_id, update_id)
+            for bot_id, update_id in pending
+            if (bot_id, update_id) not in self._pending
+        )
+        previous = self._file
+        self._file = file
+        self._segment = segment
+        self._size = len(data)
+        if changes:
+            self._write(b"".join(changes))
+        # Старые сегменты удаляются только после того, как новый надежно записан
+        await self.flush()
+        if previous is not None:
+            previous.close()
+        await asyncio.to_thread(self._remove_segments, segment)
+
+    @staticmethod
+    def _create_segment(path: Path, data: bytes) -> BinaryIO:
+        file = open(path, "wb", buffering=0)
+        try:
+            file.write(data)
+            os.fsync(file.fileno())
+        except BaseException:
+            file.close()
+            raise
+        return file
+
+    def _remove_segments(self, before: int) -> None:
+        for segment in self._segments():
+            if segment < before:
+                self._segment_path(segment).unlink(missing_ok=True)
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.path / f"{SEGMENT_PREFIX}{segment:08d}{SEGMENT_SUFFIX}"
+
+    def _segments(self) -> list[int]:
+        return sorted(
+            int(file.name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)])
+            for file in self.path.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")
+        )
+
+    def _load_segment(self, path: Path) -> None:
+        for operation, bot_id, update_id, payload in self._read_segment(path):
+            if operation == b"A" and payload is not None:
+                self._pending[(bot_id, update_id)] = payload
+            else:
+                self._pending.pop((bot_id, update_id), None)
+
+    @staticmethod
+    def _read_segment(path: Path) -> Iterator[tuple[bytes, int, int, Optional[bytes]]]:
+        with path.open("rb") as file:
+            while header := file.readline():
+                parts = header.split()
+                # Последняя запись могла быть записана не полностью при падении процесса
+                if not header.endswith(b"\n") or not parts:
+                    break
+                if parts[0] == b"A" and len(parts) == 4:
+                    size = int(parts[3])
+                    payload = file.read(size + 1)
+                    if len(payload) != size + 1:
+                        break
+                    yield parts[0], int(parts[1]), int(parts[2]), payload[:-1]
+                elif parts[0] == b"D" and len(parts) == 3:
+                    yield parts[0], int(parts[1]), int(parts[2]), None
+                else:
+                    logger.warning("Corrupted record in update journal %s, rest skipped", path)
+                    break
+
+
+def _append_record(bot_id: int, update_id: int, payload: bytes) -> bytes:
+    return b"A %d %d %d\n%s\n" % (bot_id, update_id, len(payload), payload)
@@ -1,9 +1,14 @@
-from .db import DBSessionMiddleware
+from .db import DB_INTENT_FLAG, DB_MODE_FLAG, DBSessionMiddleware, DBSessionModeMiddleware
+from .dedup import DeduplicationMiddleware
 from .event_typed import EventTypedMiddleware
 from .user import UserMiddleware
 
 __all__ = [
+    "DB_INTENT_FLAG",
+    "DB_MODE_FLAG",
     "DBSessionMiddleware",
+    "DBSessionModeMiddleware",
+    "DeduplicationMiddleware",
     "EventTypedMiddleware",
     "UserMiddleware",
 ]
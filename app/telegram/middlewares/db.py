@@ -1,14 +1,33 @@
-from typing import Any, Awaitable, Callable
+from typing import Any, Awaitable, Callable, Final, Optional
 
 from aiogram import BaseMiddleware
-from aiogram.types import TelegramObject
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import TelegramObject, Update
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.factory.services import create_services
-from app.services.postgres import SQLSessionContext
+from app.services.postgres import (
+    SessionIntent,
+    SessionMode,
+    SQLSessionContext,
+    connection_holder,
+)
+
+from .event_typed import EventTypedMiddleware
+
+# Флаг обработчика с режимом транзакций, например ``flags={"db_mode": "read_only"}``
+DB_MODE_FLAG: Final[str] = "db_mode"
+# Флаг обработчика, читающего с реплики, например ``flags={"db_intent": "read"}``
+DB_INTENT_FLAG: Final[str] = "db_intent"
 
 
 class DBSessionMiddleware(BaseMiddleware):
+    """
+    Открывает ``SQLSessionContext`` и передает сервисы в обработчики.
+    Соединение из пула берется только при первом запросе к БД.
+    """
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
@@ -16,11 +35,58 @@ class DBSessionMiddleware(BaseMiddleware):
         data: dict[str, Any],
     ) -> Any:
         session_pool: async_sessionmaker[AsyncSession] = data["session_pool"]
-        async with SQLSessionContext(session_pool=session_pool) as repository:
-            services = create_services(
-                repository=repository,
-                config=data["config"],
-            )
-
-            data.update(services)
-            return await handler(event, data)
+        context = SQLSessionContext(
+            session_pool=session_pool,
+            replica_pool=data.get("replica_session_pool"),
+        )
+        # До выбора обработчика соединение держат middleware этого типа обновления
+        holder = event.event_type if isinstance(event, Update) else type(event).__name__
+        token = connection_holder.set(f"update:{holder}")
+        try:
+            async with context as repository:
+                services = create_services(
+                    repository=repository,
+                    config=data["config"],
+                    user_cache=data.get("user_cache"),
+                    admin_cache=data.get("admin_cache"),
+                    user_activity=data.get("user_activity"),
+                    user_count=data.get("user_count"),
+                )
+
+                data.update(services)
+                data["session_context"] = context
+                return await handler(event, data)
+        finally:
+            connection_holder.reset(token)
+
+
+class DBSessionModeMiddleware(EventTypedMiddleware):
+    """
+    Переключает сессию в режим транзакций, объявленный флагом ``db_mode`` обработчика,
+    и на реплику, если обработчик объявил флаг ``db_intent``. Соединение, которое
+    возвращается в пул после обработчика, приписывается ему (``connection_holder``).
+
+    Должен подключаться после ``UserMiddleware``: регистрация нового пользователя
+    фиксируется в обычном режиме на основном сервере, а в объявленном выполняется
+    только сам обработчик.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        mode: Optional[str] = get_flag(data, DB_MODE_FLAG)
+        context: Optional[SQLSessionContext] = data.get("session_context")
+        intent: Optional[str] = get_flag(data, DB_INTENT_FLAG)
+        handler_object: Optional[HandlerObject] = data.get("handler")
+        if handler_object is not None:
+            callback = handler_object.callback
+            connection_holder.set(f"{callback.__module__}.{callback.__qualname__}")
+        if context is not None:
+            if mode is not None:
+                await context.set_mode(SessionMode(mode))
+            if intent is not None:
+                await context.set_intent(SessionIntent(intent))
+        return await handler(event, data)
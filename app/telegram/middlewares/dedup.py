@@ -0,0 +1,38 @@
+import logging
+from typing import Any, Awaitable, Callable, Final
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.types import TelegramObject, Update
+
+from app.telegram.dedup import BotUpdateIdIndex
+
+logger: Final[logging.Logger] = logging.getLogger(name=__name__)
+
+
+class DeduplicationMiddleware(BaseMiddleware):
+    """Отбрасывает повторно доставленные обновления до открытия сессии БД."""
+
+    def __init__(self, index: BotUpdateIdIndex) -> None:
+        self.index = index
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        update_id = event.update_id if isinstance(event, Update) else None
+        if update_id is None:
+            return await handler(event, data)
+        bot: Bot = data["bot"]
+        index = self.index[bot.id]
+        if index.is_duplicate(update_id):
+            logger.warning(
+                "Duplicate update id=%d for bot id=%d dropped (total duplicates: %d)",
+                update_id,
+                bot.id,
+                index.duplicates,
+            )
+            return None
+        index.add(update_id)
+        return await handler(event, data)
@@ -3,11 +3,11 @@ from __future__ import annotations
 import logging
 from typing import Any, Awaitable, Callable, Optional
 
-from aiogram.types import TelegramObject
+from aiogram.types import Message, TelegramObject
 from aiogram.types import User as AiogramUser
 
 from app.const import DEFAULT_LOCALE
-from app.models.dto import UserDto
+from app.services.activity import UserActivityBuffer
 from app.services.user import UserService
 
 from .event_typed import EventTypedMiddleware
@@ -35,27 +35,27 @@ class UserMiddleware(EventTypedMiddleware):
 
         user_service: UserService = data["user_service"]
         config = user_service.config
-        user: Optional[UserDto] = await user_service.get_by_tg_id(telegram_id=aiogram_user.id)
-
-        if user is None:
-            # Определяем язык из доступных locales
-            available_locales = list(config.telegram.locales)
-            language = (
-                aiogram_user.language_code
-                if aiogram_user.language_code in available_locales
-                else DEFAULT_LOCALE
-            )
-
-            user = await user_service.create(
-                aiogram_user=aiogram_user,
-                language=language,
-            )
+        # Язык определяется из доступных locales и сохраняется только для нового пользователя
+        available_locales = list(config.telegram.locales)
+        language = (
+            aiogram_user.language_code
+            if aiogram_user.language_code in available_locales
+            else DEFAULT_LOCALE
+        )
+        user, created = await user_service.upsert_from_telegram(
+            aiogram_user=aiogram_user,
+            language=language,
+        )
+        if created:
             logger.info(
                 "New user in database: %s (%d) %s",
                 aiogram_user.full_name,
                 aiogram_user.id,
                 user.username,
             )
+        user_activity: Optional[UserActivityBuffer] = data.get("user_activity")
+        if user_activity is not None:
+            user_activity.touch(user_id=user.user_id, message=isinstance(event, Message))
 
         data["user"] = user
         return await handler(event, data)
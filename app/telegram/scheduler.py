@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, Final, Iterator, Optional
+
+logger: Final[logging.Logger] = logging.getLogger(name=__name__)
+
+Job = Callable[[], Awaitable[Any]]
+
+
+def get_update_key(data: dict[str, Any]) -> Optional[int]:
+    """
+    Возвращает ключ очередности для сырого (не валидированного) обновления:
+    id чата, а если его нет - id пользователя.
+    """
+    for field, event in data.items():
+        if field == "update_id" or not isinstance(event, dict):
+            continue
+        chat = event.get("chat") or (event.get("message") or {}).get("chat")
+        if chat:
+            return int(chat["id"])
+        user = event.get("from") or event.get("user")
+        if user:
+            return int(user["id"])
+        return None
+    return None
+
+
+class UpdateScheduler:
+    """
+    Планировщик обработки обновлений по шардированным очередям (lanes).
+
+    Обновления с одинаковым ключом (чат или пользователь) всегда попадают в одну
+    очередь и обрабатываются строго последовательно в порядке поступления,
+    а разные очереди обрабатываются параллельно. Обновления без ключа
+    распределяются по очередям по кругу.
+
+    Общая емкость ``queue_size`` делится между очередями поровну: при переполнении
+    ``submit_nowait`` возвращает ``False`` и вызывающая сторона сама решает,
+    как сбросить нагрузку, а ``submit`` ожидает освобождения места.
+    """
+
+    lanes: int
+    queue_size: int
+    _queues: list[asyncio.Queue[Job]]
+    _tasks: list[asyncio.Task[None]]
+    _round_robin: Iterator[int]
+    _active: int
+
+    def __init__(self, lanes: int, queue_size: int, name: str = "updates") -> None:
+        if lanes < 1:
+            raise ValueError("Update scheduler requires at least one lane")
+        self.lanes = lanes
+        self.queue_size = queue_size
+        self.name = name
+        self._queues = []
+        self._tasks = []
+        self._round_robin = itertools.cycle(range(lanes))
+        self._active = 0
+
+    @property
+    def queues(self) -> list[asyncio.Queue[Job]]:
+        # Очереди создаются лениво, чтобы привязаться к запущенному event loop
+        if not self._queues:
+            lane_size = max(1, self.queue_size // self.lanes)
+            self._queues = [asyncio.Queue(maxsize=lane_size) for _ in range(self.lanes)]
+        return self._queues
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def qsize(self) -> int:
+        return sum(queue.qsize() for queue in self.queues)
+
+    @property
+    def unfinished(self) -> int:
+        """Количество задач в очередях и в обработке."""
+        return self.qsize() + self._active
+
+    def lane_for(self, key: Optional[int]) -> int:
+        if key is None:
+            return next(self._round_robin)
+        return key % self.lanes
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(queue), name=f"{self.name}-lane-{index}")
+            for index, queue in enumerate(self.queues)
+        ]
+        logger.info(
+            "Update scheduler '%s' started: lanes=%d, queue_size=%d",
+            self.name,
+            self.lanes,
+            self.queue_size,
+        )
+
+    def submit_nowait(self, job: Job, key: Optional[int] = None) -> bool:
+        try:
+            self.queues[self.lane_for(key)].put_nowait(job)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def submit(self, job: Job, key: Optional[int] = None) -> None:
+        await self.queues[self.lane_for(key)].put(job)
+
+    async def join(self) -> None:
+        await asyncio.gather(*(queue.join() for queue in self.queues))
+
+    async def drain(self, timeout: float) -> int:
+        """
+        Ждет завершения уже поставленных задач не дольше ``timeout`` секунд
+        и останавливает обработчики. Возвращает количество задач, не уложившихся в срок:
+        обрабатываемые в этот момент задачи отменяются, оставшиеся в очередях - отбрасываются.
+        """
+        try:
+            await asyncio.wait_for(self.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        unfinished = self.unfinished
+        await self.stop()
+        return unfinished
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if tasks:
+            logger.info("Update scheduler '%s' stopped", self.name)
+
+    async def _worker(self, queue: asyncio.Queue[Job]) -> None:
+        while True:
+            job = await queue.get()
+            self._active += 1
+            try:
+                await job()
+            except Exception:
+                logger.exception("Unhandled error in update scheduler '%s'", self.name)
+            finally:
+                self._active -= 1
+                queue.task_done()
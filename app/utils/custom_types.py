@@ -1,9 +1,18 @@
 from typing import Annotated, NewType, TypeAlias, Literal
 
-from pydantic import PlainValidator, Field
+from pydantic import PlainValidator, Field, SecretStr
 
 ListStr = NewType("ListStr", list[str])
 StringList: TypeAlias = Annotated[ListStr, PlainValidator(func=lambda x: x.split(","))]
+ListSecretStr = NewType("ListSecretStr", list[SecretStr])
+
+
+def _split_secrets(value: str | list[str | SecretStr]) -> list[SecretStr]:
+    items = value.split(",") if isinstance(value, str) else value
+    return [item if isinstance(item, SecretStr) else SecretStr(item) for item in items if item]
+
+
+SecretStringList: TypeAlias = Annotated[ListSecretStr, PlainValidator(func=_split_secrets)]
 
 Int16: TypeAlias = Annotated[int, 16]
 Int32: TypeAlias = Annotated[int, 32]
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Стоимость DTO пользователя: прежняя модель pydantic (``model_validate`` с
+``from_attributes`` и словарь изменений в ``__setattr__``) против ``UserDto``
+на ``__slots__`` с отслеживанием изменений по исходным значениям.
+
+Измеряются создание из объекта ORM и из строки результата, изменение полей
+с чтением ``model_state`` и копирование. БД не нужна.
+
+Запуск: PYTHONPATH=. uv run python benchmarks/dto.py
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+from app.models.dto import UserDto
+from app.models.sql import User
+
+ITERATIONS = 100_000
+
+
+class PydanticUserDto(BaseModel):
+    """``UserDto`` до перехода на ``__slots__``"""
+
+    model_config = ConfigDict(extra="ignore", from_attributes=True, populate_by_name=True)
+
+    user_id: int
+    telegram_id: int
+    name: str
+    language: str
+    username: Optional[str] = None
+    language_code: Optional[str] = None
+    bot_blocked: bool = False
+    last_seen_at: Optional[datetime] = None
+    message_count: int = 0
+
+    __updated: dict[str, Any] = PrivateAttr(default_factory=dict)
+
+    @property
+    def model_state(self) -> dict[str, Any]:
+        return self.__updated
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        self.__updated[name] = value
+
+
+def measure(operation: Callable[[], Any]) -> float:
+    for _ in range(1000):
+        operation()
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        operation()
+    return (time.perf_counter() - start) / ITERATIONS * 1_000_000
+
+
+def mutate(user: Union[PydanticUserDto, UserDto]) -> dict[str, Any]:
+    user.name = "Renamed"
+    user.language = "ru"
+    user.bot_blocked = True
+    return user.model_state
+
+
+def main() -> None:
+    db_user = User(
+        user_id=1,
+        telegram_id=100,
+        name="Benchmark",
+        username="benchmark",
+        language="en",
+        language_code="en",
+        bot_blocked=False,
+        last_seen_at=datetime.now(tz=timezone.utc),
+        message_count=10,
+    )
+    row = {name: getattr(db_user, name) for name in UserDto.__fields__}
+    old, new = PydanticUserDto.model_validate(db_user), UserDto.from_attributes(db_user)
+
+    cases: list[tuple[str, Callable[[], Any], Callable[[], Any]]] = [
+        (
+            "from ORM object",
+            lambda: PydanticUserDto.model_validate(db_user),
+            lambda: UserDto.from_attributes(db_user),
+        ),
+        (
+            "from result row",
+            lambda: PydanticUserDto.model_validate(row),
+            lambda: UserDto.from_mapping(row),
+        ),
+        ("mutate + model_state", lambda: mutate(old), lambda: mutate(new)),
+        ("model_copy", old.model_copy, new.model_copy),
+    ]
+    print(f"UserDto, {ITERATIONS} operations")
+    for name, before, after in cases:
+        before_us, after_us = measure(before), measure(after)
+        print(
+            f"  {name + ':':22} pydantic {before_us:6.2f} us,"
+            f" slots {after_us:6.2f} us ({after_us / before_us:4.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Стоимость поиска пользователя по telegram_id до DTO в трех вариантах:
+запрос, построенный заново на каждый вызов (как было), заранее построенный
+запрос из кэша компиляции и чтение драйвером сразу в DTO (ALCHEMY_RAW_LOOKUPS).
+
+Нужна БД из настроек POSTGRES_*: пользователь создается и удаляется в транзакции,
+которая откатывается. Кроме времени на запрос выводится процессорное время: сетевой
+обмен с БД одинаков во всех вариантах, различаются накладные расходы Python.
+
+Запуск: PYTHONPATH=. uv run python benchmarks/user_lookup.py
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import select
+
+from app.factory import create_app_config, create_session_pool
+from app.models.dto import UserDto
+from app.models.sql import User
+from app.services.postgres import Repository, SQLSessionContext
+
+ITERATIONS = 3000
+TELEGRAM_ID = 918000001
+
+Lookup = Callable[[Repository], Awaitable[Optional[UserDto]]]
+
+
+async def rebuilt(repository: Repository) -> Optional[UserDto]:
+    query = select(User).where(User.telegram_id == TELEGRAM_ID)
+    user = await repository.session.scalar(query)
+    return None if user is None else user.dto()
+
+
+async def prebuilt(repository: Repository) -> Optional[UserDto]:
+    user = await repository.users.get_by_tg_id(telegram_id=TELEGRAM_ID)
+    return None if user is None else user.dto()
+
+
+async def raw(repository: Repository) -> Optional[UserDto]:
+    return await repository.users.get_dto_by_tg_id(telegram_id=TELEGRAM_ID)
+
+
+async def measure(repository: Repository, lookup: Lookup) -> tuple[float, float]:
+    for _ in range(200):
+        assert await lookup(repository) is not None
+    wall, cpu = time.perf_counter(), time.process_time()
+    for _ in range(ITERATIONS):
+        await lookup(repository)
+    return (
+        (time.perf_counter() - wall) / ITERATIONS * 1_000_000,
+        (time.process_time() - cpu) / ITERATIONS * 1_000_000,
+    )
+
+
+async def main() -> None:
+    config = create_app_config()
+    session_pool = create_session_pool(config=config)
+    print(f"User lookup by telegram_id, {ITERATIONS} lookups")
+    async with SQLSessionContext(session_pool=session_pool) as repository:
+        repository.session.add(User(telegram_id=TELEGRAM_ID, name="Benchmark", language="en"))
+        await repository.session.flush()
+        results = {}
+        for name, lookup in (
+            ("rebuilt ORM query", rebuilt),
+            ("prebuilt ORM query", prebuilt),
+            ("raw asyncpg to DTO", raw),
+        ):
+            results[name] = await measure(repository, lookup)
+        await repository.session.rollback()
+
+    baseline_cpu = results["rebuilt ORM query"][1]
+    for name, (wall, cpu) in results.items():
+        print(
+            f"  {name + ':':20} {wall:7.1f} us/lookup, {cpu:7.1f} us CPU"
+            f" ({cpu / baseline_cpu:4.0%} of rebuilt)"
+        )
+    await session_pool.kw["bind"].dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Накладные расходы на прием webhook запроса до и после обхода стека middleware.
+
+Запросы подаются напрямую в ASGI приложение (без сети и без БД): "before" -
+маршрут FastAPI за DBSessionMiddleware, SessionMiddleware и CORSMiddleware,
+"after" - тот же маршрут с TelegramWebhookMiddleware снаружи.
+
+Запуск: PYTHONPATH=. uv run python benchmarks/webhook_ingress.py
+"""
+
+import asyncio
+import time
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from fastapi import FastAPI
+from starlette.types import Message
+
+from app.endpoints.telegram import TelegramRequestHandler, TelegramWebhookMiddleware
+from app.factory import create_app_config
+from app.factory.telegram import create_bot, create_dispatcher, setup_fastapi
+from app.models.config import AppConfig
+from app.telegram.scheduler import UpdateScheduler
+
+ITERATIONS = 5000
+WEBHOOK_PATH = "/telegram"
+SECRET = "benchmark-secret"
+UPDATE_BODY = (
+    b'{"update_id": 1, "message": {"message_id": 10, "date": 1700000000,'
+    b' "chat": {"id": 42, "type": "private"},'
+    b' "from": {"id": 42, "is_bot": false, "first_name": "Test"}, "text": "/start"}}'
+)
+
+
+def build_app(dispatcher: Dispatcher, bot: Bot, config: AppConfig, bypass: bool) -> FastAPI:
+    app = FastAPI()
+    setup_fastapi(app=app, dispatcher=dispatcher, bots=[bot], config=config)
+    # Планировщик не запускается: измеряется только прием запроса
+    handler = TelegramRequestHandler(
+        dispatcher=dispatcher,
+        bots=[bot],
+        path=WEBHOOK_PATH,
+        scheduler=UpdateScheduler(lanes=1, queue_size=ITERATIONS * 2),
+        secret_token=SECRET,
+    )
+    app.include_router(handler.router)
+    if bypass:
+        app.add_middleware(TelegramWebhookMiddleware, handler=handler)
+    return app
+
+
+async def call(app: FastAPI) -> int:
+    scope: dict[str, Any] = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "https",
+        "path": WEBHOOK_PATH,
+        "raw_path": WEBHOOK_PATH.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"bot.example.com"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(UPDATE_BODY)).encode()),
+            (b"x-telegram-bot-api-secret-token", SECRET.encode()),
+        ],
+        "client": ("149.154.167.197", 443),
+        "server": ("bot.example.com", 443),
+    }
+    status: int = 0
+    received = False
+
+    async def receive() -> Message:
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": UPDATE_BODY, "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def measure(app: FastAPI) -> float:
+    for _ in range(100):
+        await call(app)
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        status = await call(app)
+        assert status == 200, status
+    return (time.perf_counter() - start) / ITERATIONS * 1_000_000
+
+
+async def main() -> None:
+    config = create_app_config()
+    config.telegram.use_webhook = True
+    bot = create_bot(config=config)
+    dispatcher = create_dispatcher(bot=bot, config=config)
+
+    before = await measure(build_app(dispatcher, bot, config, bypass=False))
+    after = await measure(build_app(dispatcher, bot, config, bypass=True))
+
+    print(f"Webhook ingress, {ITERATIONS} requests")
+    print(f"  before (full middleware stack): {before:8.1f} us/request")
+    print(f"  after  (pure ASGI ingress):     {after:8.1f} us/request")
+    print(f"  saved:                          {before - after:8.1f} us/request")
+    await bot.session.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,36 @@
+"""add user activity
+
+Revision ID: 5b0e7c2d41a9
+Revises: 89022f1cb3df
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from typing import Optional, Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b0e7c2d41a9"
+down_revision: Optional[str] = "89022f1cb3df"
+branch_labels: Optional[Sequence[str]] = None
+depends_on: Optional[Sequence[str]] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "user",
+        sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=True),
+        schema="users",
+    )
+    op.add_column(
+        "user",
+        sa.Column("message_count", sa.Integer(), server_default="0", nullable=False),
+        schema="users",
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("user", "message_count", schema="users")
+    op.drop_column("user", "last_seen_at", schema="users")
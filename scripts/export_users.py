@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Выгрузка пользователей бота в CSV или NDJSON (по одному JSON-объекту в строке)
+через COPY, без загрузки таблицы в память.
+
+    python scripts/export_users.py users.csv --active
+"""
+
+import argparse
+import asyncio
+import sys
+from typing import BinaryIO, get_args
+
+from app.factory import create_app_config, create_replica_session_pool, create_session_pool
+from app.services.postgres import SessionMode, SQLSessionContext
+from app.services.user import UserService
+from app.utils.custom_types import AllowedLanguages
+
+# Прогресс выводится не чаще, чем раз на столько байт
+PROGRESS_STEP = 1 << 20
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Выгрузка пользователей бота")
+    parser.add_argument("path", nargs="?", default="-", help="Путь к файлу, по умолчанию stdout")
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="По расширению файла")
+    parser.add_argument(
+        "--active",
+        action="store_true",
+        help="Только пользователи, не заблокировавшие бота",
+    )
+    parser.add_argument("--language", choices=get_args(AllowedLanguages))
+    parser.add_argument("--quiet", action="store_true", help="Не выводить прогресс")
+    return parser.parse_args()
+
+
+class ProgressWriter:
+    """Пишет данные COPY в файл и выводит объем выгруженного"""
+
+    def __init__(self, target: BinaryIO, quiet: bool) -> None:
+        self.target = target
+        self.quiet = quiet
+        self.written = 0
+        self.reported = 0
+
+    async def __call__(self, chunk: bytes) -> None:
+        self.target.write(chunk)
+        self.written += len(chunk)
+        if not self.quiet and self.written - self.reported >= PROGRESS_STEP:
+            self.reported = self.written
+            size = self.written / (1 << 20)
+            print(f"\rВыгружено: {size:.1f} МБ", end="", file=sys.stderr, flush=True)
+
+
+async def main() -> None:
+    args = parse_args()
+    fmt = args.format
+    if fmt is None:
+        fmt = "ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv"
+
+    config = create_app_config()
+    # Выгрузка читает с реплики, если она задана
+    session_pool = create_replica_session_pool(config=config) or create_session_pool(config=config)
+    target = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+    # Прогресс и сводка выводятся в stderr, чтобы не смешиваться с данными в stdout
+    writer = ProgressWriter(target, quiet=args.quiet)
+    try:
+        context = SQLSessionContext(session_pool=session_pool, mode=SessionMode.READ_ONLY)
+        async with context as repository:
+            user_service = UserService(repository=repository, config=config)
+            count = await user_service.export_users(
+                output=writer,
+                fmt=fmt,
+                bot_blocked=False if args.active else None,
+                language=args.language,
+            )
+        if writer.reported:
+            print(file=sys.stderr)
+        print(f"Выгружено пользователей: {count}", file=sys.stderr)
+    finally:
+        target.flush()
+        if target is not sys.stdout.buffer:
+            target.close()
+        await session_pool.kw["bind"].dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Массовый импорт пользователей бота из CSV или NDJSON (по одному JSON-объекту в строке).
+
+Обязательные поля: telegram_id и name, необязательные: username, language,
+language_code и bot_blocked. Выгрузка scripts/export_users.py подходит для импорта.
+
+    python scripts/import_users.py users.csv --batch-size 10000
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+from typing import Any, Iterator, Optional, TextIO, get_args
+
+from app.factory import create_app_config, create_session_pool
+from app.models.dto import UserImportRecord
+from app.services.postgres import SQLSessionContext
+from app.services.user import UserService
+from app.utils.custom_types import AllowedLanguages
+
+TRUE_VALUES = {"1", "t", "true", "y", "yes"}
+
+
+def optional(row: dict[str, Any], key: str) -> Optional[str]:
+    value = row.get(key)
+    return None if value is None or value == "" else str(value)
+
+
+def parse_record(row: dict[str, Any], default_language: str) -> UserImportRecord:
+    language = optional(row, "language") or default_language
+    if language not in get_args(AllowedLanguages):
+        language = default_language
+    bot_blocked = row.get("bot_blocked") or False
+    if isinstance(bot_blocked, str):
+        bot_blocked = bot_blocked.strip().lower() in TRUE_VALUES
+    return UserImportRecord(
+        telegram_id=int(row["telegram_id"]),
+        name=str(row["name"]),
+        language=language,
+        username=optional(row, "username"),
+        language_code=optional(row, "language_code"),
+        bot_blocked=bool(bot_blocked),
+    )
+
+
+def read_records(source: TextIO, fmt: str, default_language: str) -> Iterator[UserImportRecord]:
+    rows: Iterator[dict[str, Any]]
+    if fmt == "ndjson":
+        rows = (json.loads(line) for line in source if line.strip())
+    else:
+        rows = csv.DictReader(source)
+    for number, row in enumerate(rows, start=1):
+        try:
+            yield parse_record(row, default_language=default_language)
+        except (KeyError, TypeError, ValueError) as e:
+            raise SystemExit(f"Ошибка в записи {number}: {e!r}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Импорт пользователей бота")
+    parser.add_argument("path", help="Путь к файлу или - для stdin")
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="По расширению файла")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Записей в транзакции")
+    parser.add_argument(
+        "--language",
+        default="en",
+        choices=get_args(AllowedLanguages),
+        help="Язык пользователей, для которых он не указан",
+    )
+    parser.add_argument("--quiet", action="store_true", help="Не выводить прогресс")
+    return parser.parse_args()
+
+
+def report_progress(created: int, updated: int) -> None:
+    print(f"\rСоздано: {created}, обновлено: {updated}", end="", file=sys.stderr, flush=True)
+
+
+async def main() -> None:
+    args = parse_args()
+    fmt = args.format
+    if fmt is None:
+        fmt = "ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv"
+
+    config = create_app_config()
+    session_pool = create_session_pool(config=config)
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8", newline="")
+    try:
+        async with SQLSessionContext(session_pool=session_pool) as repository:
+            user_service = UserService(repository=repository, config=config)
+            created, updated = await user_service.import_users(
+                read_records(source, fmt=fmt, default_language=args.language),
+                batch_size=args.batch_size,
+                on_progress=None if args.quiet else report_progress,
+            )
+        if not args.quiet and created + updated:
+            print(file=sys.stderr)
+        print(f"Импорт завершен. Создано: {created}, обновлено: {updated}")
+    finally:
+        source.close()
+        await session_pool.kw["bind"].dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,13 +1,35 @@
-from typing import Any, Callable, Coroutine
+from typing import Any, AsyncGenerator, Callable, Coroutine
 
+import pytest
 import pytest_asyncio
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from app.factory.session_pool import create_session_pool
 from app.models.config import AppConfig
 from app.models.sql import User
 from app.services.postgres import Repository
 from app.services.user import UserService
 
 
+@pytest_asyncio.fixture
+async def session_pool(
+    request: pytest.FixtureRequest,
+    app_config: AppConfig,
+) -> AsyncGenerator[async_sessionmaker[AsyncSession], None]:
+    """
+    Пул сессий для тестов, фиксирующих транзакции. После теста удаляет пользователей
+    с ``telegram_id`` из ``TELEGRAM_IDS`` модуля теста.
+    """
+    session_pool = create_session_pool(config=app_config)
+    yield session_pool
+    telegram_ids = getattr(request.module, "TELEGRAM_IDS", ())
+    async with session_pool() as session:
+        await session.execute(delete(User).where(User.telegram_id.in_(telegram_ids)))
+        await session.commit()
+    await session_pool.kw["bind"].dispose()
+
+
 @pytest_asyncio.fixture
 async def user_service(
     repository: Repository,
@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.services.postgres import AdvisoryLock
+
+LOCK_KEY = 424242
+
+
+@pytest.mark.asyncio
+class TestAdvisoryLock:
+    """Тесты advisory блокировки для выбора ведущей реплики."""
+
+    async def test_lock_held_by_single_owner(self, async_engine: AsyncEngine):
+        """Тест получения блокировки только одним владельцем до ее освобождения."""
+        leader = AdvisoryLock(engine=async_engine, key=LOCK_KEY)
+        standby = AdvisoryLock(engine=async_engine, key=LOCK_KEY)
+
+        assert await leader.acquire()
+        assert not await standby.acquire()
+
+        await leader.release()
+        assert await standby.acquire()
+        await standby.release()
+
+    async def test_lost_connection_releases_lock(self, async_engine: AsyncEngine):
+        """Тест потери блокировки при разрыве соединения ведущей реплики."""
+        leader = AdvisoryLock(engine=async_engine, key=LOCK_KEY)
+        standby = AdvisoryLock(engine=async_engine, key=LOCK_KEY)
+        assert await leader.acquire()
+
+        async with async_engine.connect() as connection:
+            await connection.execute(
+                text(
+                    "SELECT pg_terminate_backend(pid) FROM pg_locks "
+                    "WHERE locktype = 'advisory' AND objid = :key"
+                ),
+                {"key": LOCK_KEY},
+            )
+        assert not await leader.check(timeout=1.0)
+        assert not leader.held
+        assert await standby.acquire()
+        await standby.release()
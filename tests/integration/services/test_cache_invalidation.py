@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from app.models.config.env import PostgresConfig
+from app.services.cache import LRUCache
+from app.services.postgres import CacheInvalidationBus, notify_invalidation
+
+
+async def wait_evicted(cache: LRUCache, key: int, timeout: float = 2.0) -> bool:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        if cache.get(key) is None:
+            return True
+        await asyncio.sleep(0.02)
+    return False
+
+
+@pytest.mark.asyncio
+class TestCacheInvalidationBus:
+    """Тесты инвалидации кэшей через LISTEN/NOTIFY."""
+
+    async def test_committed_change_evicts_entry(
+        self, async_engine: AsyncEngine, postgres_config: PostgresConfig
+    ):
+        """Тест удаления записи после фиксации и сохранения при откате."""
+        cache: LRUCache[int, str] = LRUCache(capacity=10, ttl=60)
+        bus = CacheInvalidationBus(url=postgres_config.build_url())
+        bus.register("user", cache)
+        await bus.start()
+        session_pool = async_sessionmaker(async_engine)
+        try:
+            assert bus.connected
+            cache.set(1, "stale")
+            cache.set(2, "kept")
+
+            async with session_pool() as session:
+                await notify_invalidation(session, cache="user", keys=[2])
+                await session.rollback()
+            async with session_pool() as session:
+                await notify_invalidation(session, cache="user", keys=[1])
+                await session.commit()
+
+            assert await wait_evicted(cache, key=1)
+            assert cache.get(2) == "kept"
+        finally:
+            await bus.stop()
@@ -0,0 +1,76 @@
+from typing import AsyncGenerator
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.models.config.env import PostgresConfig
+from app.services.postgres import (
+    MonitoredQueuePool,
+    PoolMonitor,
+    SQLSessionContext,
+    connection_holder,
+    setup_pool_monitor,
+)
+
+
+@pytest_asyncio.fixture
+async def engine(postgres_config: PostgresConfig) -> AsyncGenerator[AsyncEngine, None]:
+    engine = create_async_engine(
+        postgres_config.build_url(),
+        poolclass=MonitoredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+class TestPoolMonitor:
+    """Тесты статистики пула соединений."""
+
+    async def test_hold_is_attributed_to_holder(self, engine: AsyncEngine):
+        """Тест учета ожидания и удержания соединения тем, кто его вернул в пул."""
+        monitor: PoolMonitor = setup_pool_monitor(engine)
+        session_pool = async_sessionmaker(engine, expire_on_commit=False)
+
+        token = connection_holder.set("update:message")
+        try:
+            async with SQLSessionContext(session_pool=session_pool) as repository:
+                await repository.session.execute(text("SELECT 1"))
+                connection_holder.set("handlers.start")
+        finally:
+            connection_holder.reset(token)
+
+        stats = monitor.snapshot(engine.sync_engine.pool)
+        assert stats["wait"]["count"] == 1
+        assert stats["hold"]["count"] == 1
+        assert stats["hold"]["buckets"]["+Inf"] == 1
+        assert stats["pool"]["peak_checked_out"] == 1
+        assert stats["pool"]["checked_out"] == 0
+        assert list(stats["holders"]) == ["handlers.start"]
+        assert stats["slowest"][0]["acquired_by"] == "update:message"
+        assert stats["slowest"][0]["released_by"] == "handlers.start"
+
+    async def test_exhausted_pool(self, engine: AsyncEngine, caplog):
+        """Тест учета таймаута пула и вывода занявших его владельцев в лог."""
+        monitor: PoolMonitor = setup_pool_monitor(engine)
+        token = connection_holder.set("slow handler")
+        try:
+            async with engine.connect():
+                with pytest.raises(exc.TimeoutError):
+                    async with engine.connect():
+                        pass
+                assert monitor.current_holders()[0]["holder"] == "slow handler"
+        finally:
+            connection_holder.reset(token)
+
+        assert monitor.timeouts == 1
+        assert monitor.wait.count == 2
+        assert "slow handler" in caplog.text
+
+        monitor.reset()
+        assert monitor.snapshot(engine.sync_engine.pool)["hold"]["count"] == 0
@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.services.postgres import SessionIntent, SQLSessionContext
+
+
+@pytest.mark.asyncio
+class TestSQLSessionContext:
+    """Тесты контекста сессии БД."""
+
+    async def test_untouched_session_skips_database(self, async_engine: AsyncEngine):
+        """Тест отсутствия обращений к БД, если сессия не использовалась."""
+        checkouts: list[object] = []
+        event.listen(async_engine.sync_engine.pool, "checkout", lambda *args: checkouts.append(1))
+        session_pool = async_sessionmaker(async_engine, expire_on_commit=False)
+
+        async with SQLSessionContext(session_pool=session_pool):
+            pass
+        assert checkouts == []
+
+        async with SQLSessionContext(session_pool=session_pool) as repository:
+            await repository.users.get_by_tg_id(telegram_id=1)
+        assert len(checkouts) == 1
+
+    async def test_replica_routing(self, async_engine: AsyncEngine, postgres_config):
+        """Тест выбора реплики для чтения и переключения на основной сервер."""
+        replica_engine = create_async_engine(postgres_config.build_url())
+        session_pool = async_sessionmaker(async_engine, expire_on_commit=False)
+        replica_pool = async_sessionmaker(replica_engine, expire_on_commit=False)
+        checkouts: list[str] = []
+        for name, engine in (("primary", async_engine), ("replica", replica_engine)):
+            event.listen(
+                engine.sync_engine.pool,
+                "checkout",
+                lambda *args, name=name: checkouts.append(name),
+            )
+        try:
+            async with SQLSessionContext(
+                session_pool=session_pool, replica_pool=replica_pool
+            ) as repository:
+                await repository.users.get_by_tg_id(telegram_id=1)
+            assert checkouts == ["primary"]
+
+            context = SQLSessionContext(
+                session_pool=session_pool,
+                replica_pool=replica_pool,
+                intent=SessionIntent.READ,
+            )
+            async with context as repository:
+                assert context.on_replica
+                await repository.users.get_by_tg_id(telegram_id=1)
+                await context.set_intent(SessionIntent.WRITE)
+                assert not context.on_replica
+                await repository.users.get_by_tg_id(telegram_id=1)
+            assert checkouts == ["primary", "replica", "primary"]
+        finally:
+            await replica_engine.dispose()
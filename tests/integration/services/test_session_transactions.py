@@ -0,0 +1,108 @@
+from typing import Any, Iterator
+
+import pytest
+from aiogram.types import User as AiogramUser
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.sql import User
+from app.services.postgres import SessionMode, SQLSessionContext, notify_invalidation
+
+TELEGRAM_ID = 913000001
+TELEGRAM_IDS = (TELEGRAM_ID,)
+
+
+@pytest.fixture
+def statements(session_pool: async_sessionmaker[AsyncSession]) -> Iterator[list[str]]:
+    """Начала и завершения транзакций на соединениях пула."""
+    sent: list[str] = []
+    engine = session_pool.kw["bind"].sync_engine
+
+    def _record(name: str) -> Any:
+        def listener(*args: Any) -> None:
+            sent.append(name)
+
+        return listener
+
+    listeners = {name: _record(name) for name in ("begin", "commit", "rollback")}
+    for name, listener in listeners.items():
+        event.listen(engine, name, listener)
+    yield sent
+    for name, listener in listeners.items():
+        event.remove(engine, name, listener)
+
+
+def new_user() -> User:
+    return User(telegram_id=TELEGRAM_ID, name="Lazy", language="en")
+
+
+@pytest.mark.asyncio
+class TestSessionTransactions:
+    """Тесты фиксации транзакций сессии."""
+
+    async def test_read_skips_commit(self, session_pool, statements: list[str]):
+        """Тест завершения читающей транзакции без COMMIT."""
+        async with SQLSessionContext(session_pool=session_pool) as repository:
+            assert await repository.users.get_by_tg_id(telegram_id=TELEGRAM_ID) is None
+        assert statements == ["begin", "rollback"]
+
+    async def test_write_commits(self, session_pool, statements: list[str]):
+        """Тест фиксации транзакции с записью."""
+        async with SQLSessionContext(session_pool=session_pool) as repository:
+            await repository.users.get_by_tg_id(telegram_id=TELEGRAM_ID)
+            repository.session.add(new_user())
+        assert statements == ["begin", "commit"]
+
+        async with SQLSessionContext(session_pool=session_pool) as repository:
+            assert await repository.users.get_by_tg_id(telegram_id=TELEGRAM_ID) is not None
+
+    async def test_select_with_side_effects_commits(self, session_pool, statements: list[str]):
+        """Тест фиксации SELECT с побочными эффектами: INSERT в CTE и pg_notify."""
+        aiogram_user = AiogramUser(id=TELEGRAM_ID, is_bot=False, first_name="Lazy")
+        async with SQLSessionContext(session_pool=session_pool) as repository:
+            _, created = await repository.users.upsert_from_telegram(
+                aiogram_user=aiogram_user, language="en"
+            )
+        assert created
+        assert statements == ["begin", "commit"]
+
+        statements.clear()
+        async with SQLSessionContext(session_pool=session_pool) as repository:
+            await notify_invalidation(repository.session, cache="users", keys=[TELEGRAM_ID])
+        assert statements == ["begin", "commit"]
+
+    async def test_error_rolls_back(self, session_pool, statements: list[str]):
+        """Тест отката записанного при ошибке обработки."""
+        with pytest.raises(RuntimeError):
+            async with SQLSessionContext(session_pool=session_pool) as repository:
+                repository.session.add(new_user())
+                await repository.session.flush()
+                raise RuntimeError
+        assert statements == ["begin", "rollback"]
+
+        async with SQLSessionContext(session_pool=session_pool) as repository:
+            assert await repository.users.get_by_tg_id(telegram_id=TELEGRAM_ID) is None
+
+    async def test_read_only_mode_rejects_writes(self, session_pool):
+        """Тест режима только для чтения."""
+        context = SQLSessionContext(session_pool=session_pool, mode=SessionMode.READ_ONLY)
+        async with context as repository:
+            await repository.users.get_by_tg_id(telegram_id=TELEGRAM_ID)
+            repository.session.add(new_user())
+            with pytest.raises(Exception, match="read-only transaction"):
+                await repository.session.flush()
+            await repository.session.rollback()
+
+    async def test_autocommit_mode(self, session_pool):
+        """Тест записи без транзакции после переключения в режим autocommit."""
+        context = SQLSessionContext(session_pool=session_pool)
+        with pytest.raises(RuntimeError):
+            async with context as repository:
+                await repository.users.get_by_tg_id(telegram_id=TELEGRAM_ID)
+                await context.set_mode(SessionMode.AUTOCOMMIT)
+                repository.session.add(new_user())
+                await repository.session.flush()
+                raise RuntimeError
+
+        async with SQLSessionContext(session_pool=session_pool) as repository:
+            assert await repository.users.get_by_tg_id(telegram_id=TELEGRAM_ID) is not None
@@ -1,6 +1,10 @@
 import pytest
+from aiogram.types import User as AiogramUser
+from sqlalchemy import event
 
 from app.models.sql import User
+from app.services.activity import UserActivityBuffer
+from app.services.cache import UserCache
 from app.services.postgres import Repository
 from app.services.user import UserService
 
@@ -60,6 +64,15 @@ class TestUserService:
         assert getattr(updated_user, field) == value
         assert f"User: {test_user.user_id} was updated" in caplog.messages
 
+    @pytest.mark.asyncio
+    async def test_raw_lookups(self, repository: Repository, test_user: User):
+        """Тест чтения пользователя драйвером сразу в DTO."""
+        expected = test_user.dto()
+
+        assert await repository.users.get_dto_by_tg_id(test_user.telegram_id) == expected
+        assert await repository.users.get_dto(test_user.user_id) == expected
+        assert await repository.users.get_dto_by_tg_id(1) is None
+
     @pytest.mark.asyncio
     async def test_get_all_users(self, test_user: User, user_service: UserService):
         """Тест получения всех пользователей."""
@@ -69,6 +82,23 @@ class TestUserService:
         assert len(users) >= 1
         assert any(u.user_id == test_user.user_id for u in users)
 
+    @pytest.mark.asyncio
+    async def test_iter_all_users(self, create_test_user, user_service: UserService):
+        """Тест постраничного перебора пользователей с фильтрами."""
+        created = [
+            await create_test_user(telegram_id=777000000 + i, name=f"Iter {i}", bot_blocked=i == 1)
+            for i in range(3)
+        ]
+
+        users = [user async for user in user_service.iter_all(chunk_size=1)]
+        ids = [user.user_id for user in users]
+        assert ids == sorted(ids)
+        assert {user.user_id for user in created} <= set(ids)
+
+        active = [user async for user in user_service.iter_all(chunk_size=2, bot_blocked=False)]
+        assert all(not user.bot_blocked for user in active)
+        assert created[1].user_id not in {user.user_id for user in active}
+
     @pytest.mark.asyncio
     async def test_count_users(self, test_user: User, user_service: UserService):
         """Тест подсчёта пользователей."""
@@ -98,3 +128,92 @@ class TestUserService:
         # Проверяем, что пользователь удалён
         deleted_user = await user_service.get(user_to_delete.user_id)
         assert deleted_user is None
+
+    @pytest.mark.asyncio
+    async def test_upsert_from_telegram(self, user_service: UserService):
+        """Тест регистрации и обновления профиля пользователя одним запросом."""
+        aiogram_user = AiogramUser(id=888888888, is_bot=False, first_name="Upsert", username="old")
+
+        user, created = await user_service.upsert_from_telegram(aiogram_user, language="ru")
+        assert created is True
+        assert user.name == "Upsert"
+        assert user.language == "ru"
+
+        same, created = await user_service.upsert_from_telegram(aiogram_user, language="en")
+        assert created is False
+        assert same.user_id == user.user_id
+
+        renamed = aiogram_user.model_copy(update={"username": "new"})
+        updated, created = await user_service.upsert_from_telegram(renamed, language="en")
+        assert created is False
+        assert updated.user_id == user.user_id
+        assert updated.username == "new"
+        assert updated.language == "ru"
+
+
+class TestCachedUserService:
+    """Тесты сервиса пользователей с кэшем."""
+
+    @pytest.mark.asyncio
+    async def test_cached_user_skips_database(
+        self, repository: Repository, test_user: User, app_config
+    ):
+        """Тест чтения известного пользователя из кэша и сброса записи при изменении."""
+        user_cache = UserCache(capacity=10, ttl=60)
+        user_service = UserService(repository=repository, config=app_config, user_cache=user_cache)
+        statements: list[str] = []
+        engine = repository.session.bind
+
+        def listener(conn, cursor, statement, *args) -> None:
+            statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            user = await user_service.get_by_tg_id(test_user.telegram_id)
+            assert user is not None
+            user.name = "Changed locally"
+            cached = await user_service.get_by_tg_id(test_user.telegram_id)
+            assert len(statements) == 1
+            assert cached is not None
+            assert cached.name == "TestUser"
+            assert cached.model_state == {}
+
+            await user_service.update(cached, name="Renamed")
+            assert len(user_cache) == 0
+            renamed = await user_service.get_by_tg_id(test_user.telegram_id)
+            assert renamed is not None
+            assert renamed.name == "Renamed"
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", listener)
+
+    @pytest.mark.asyncio
+    async def test_cached_profile_change_is_buffered(
+        self, repository: Repository, test_user: User, app_config
+    ):
+        """Тест отложенной записи изменившегося профиля пользователя из кэша."""
+        user_activity = UserActivityBuffer(session_pool=None, flush_interval=60, batch_size=10)
+        user_service = UserService(
+            repository=repository,
+            config=app_config,
+            user_cache=UserCache(capacity=10, ttl=60),
+            user_activity=user_activity,
+        )
+        aiogram_user = AiogramUser(
+            id=test_user.telegram_id,
+            is_bot=False,
+            first_name="TestUser",
+            username="test_user",
+            language_code="ru",
+        )
+        await user_service.upsert_from_telegram(aiogram_user, language="ru")
+
+        renamed = aiogram_user.model_copy(update={"first_name": "Renamed"})
+        user, created = await user_service.upsert_from_telegram(renamed, language="ru")
+        assert not created
+        assert user.name == "Renamed"
+        assert user.model_state == {}
+        assert len(user_activity) == 1
+
+        cached = await user_service.get_by_tg_id(test_user.telegram_id)
+        assert cached is not None
+        assert cached.name == "Renamed"
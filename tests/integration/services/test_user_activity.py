@@ -0,0 +1,68 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.sql import User
+from app.services.activity import UserActivityBuffer
+from app.services.postgres import SQLSessionContext
+
+TELEGRAM_IDS = (914000001, 914000002)
+
+
+@pytest_asyncio.fixture
+async def users(session_pool: async_sessionmaker[AsyncSession]) -> list[User]:
+    async with SQLSessionContext(session_pool=session_pool) as repository:
+        users = [
+            User(telegram_id=telegram_id, name="Activity", language="en")
+            for telegram_id in TELEGRAM_IDS
+        ]
+        repository.session.add_all(users)
+    return users
+
+
+@pytest.mark.asyncio
+class TestUserActivityBuffer:
+    """Тесты отложенной записи активности пользователей."""
+
+    async def test_flush(self, session_pool, users: list[User]):
+        """Тест записи накопленной активности и профиля пачками."""
+        first, second = users
+        buffer = UserActivityBuffer(session_pool=session_pool, flush_interval=60, batch_size=1)
+        buffer.touch(user_id=first.user_id, message=True)
+        buffer.touch(user_id=first.user_id, message=True)
+        buffer.update_profile(
+            user_id=first.user_id,
+            name="Renamed",
+            username="renamed",
+            language_code="ru",
+        )
+        buffer.touch(user_id=second.user_id)
+
+        assert await buffer.flush()
+        assert len(buffer) == 0
+
+        async with SQLSessionContext(session_pool=session_pool) as repository:
+            first_db = await repository.users.get(first.user_id)
+            second_db = await repository.users.get(second.user_id)
+
+        assert first_db.message_count == 2
+        assert first_db.last_seen_at is not None
+        assert (first_db.name, first_db.username, first_db.language_code) == (
+            "Renamed",
+            "renamed",
+            "ru",
+        )
+        assert second_db.message_count == 0
+        assert second_db.last_seen_at is not None
+        assert second_db.name == "Activity"
+
+    async def test_stop_flushes_pending(self, session_pool, users: list[User]):
+        """Тест записи накопленного при остановке."""
+        buffer = UserActivityBuffer(session_pool=session_pool, flush_interval=60, batch_size=10)
+        buffer.start()
+        buffer.touch(user_id=users[0].user_id, message=True)
+        await buffer.stop()
+
+        async with SQLSessionContext(session_pool=session_pool) as repository:
+            user = await repository.users.get(users[0].user_id)
+        assert user.message_count == 1
@@ -0,0 +1,113 @@
+import pytest
+from sqlalchemy import event
+
+from app.models.dto import UserImportRecord
+from app.services.activity import UserActivity
+from app.services.cache import UserCache
+from app.services.postgres import Repository
+from app.services.postgres.repositories.base import MAX_PARAMETERS
+from app.services.user import UserService
+from app.utils.time import datetime_now
+
+
+@pytest.mark.asyncio
+class TestUserBulk:
+    """Тесты массовых операций с пользователями."""
+
+    async def test_get_many_by_tg_ids(
+        self, repository: Repository, create_test_user, user_service: UserService, monkeypatch
+    ):
+        """Тест выборки по списку telegram_id одним запросом на пачку."""
+        monkeypatch.setattr("app.services.postgres.repositories.base.ANY_CHUNK_SIZE", 2)
+        created = [await create_test_user(telegram_id=916000000 + i) for i in range(3)]
+        statements: list[str] = []
+        engine = repository.session.bind
+
+        def listener(conn, cursor, statement, *args) -> None:
+            statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            users = await user_service.get_many_by_tg_ids(
+                [user.telegram_id for user in created] + [1]
+            )
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", listener)
+
+        assert {user.user_id for user in users} == {user.user_id for user in created}
+        assert len(statements) == 2
+        assert all("= ANY (" in statement for statement in statements)
+
+    async def test_bulk_update(self, repository: Repository, create_test_user, app_config):
+        """Тест массового изменения с удалением пользователей из кэша."""
+        user_cache = UserCache(capacity=10, ttl=60)
+        user_service = UserService(repository=repository, config=app_config, user_cache=user_cache)
+        created = [await create_test_user(telegram_id=916100000 + i) for i in range(3)]
+        await user_service.get_by_tg_id(created[0].telegram_id)
+        assert len(user_cache) == 1
+
+        updated = await user_service.bulk_update(
+            [user.user_id for user in created[:2]], bot_blocked=True
+        )
+
+        assert {user.user_id for user in updated} == {user.user_id for user in created[:2]}
+        assert all(user.bot_blocked for user in updated)
+        assert len(user_cache) == 0
+        untouched = await user_service.get(created[2].user_id)
+        assert untouched is not None
+        assert not untouched.bot_blocked
+
+    async def test_bulk_upsert(self, create_test_user, user_service: UserService):
+        """Тест массового создания и обновления: неизмененные пользователи не возвращаются."""
+        existing = await create_test_user(telegram_id=916200000, name="Same", language="en")
+        renamed = await create_test_user(telegram_id=916200001, name="Old", language="en")
+        records = [
+            UserImportRecord(telegram_id=existing.telegram_id, name="Same", language="en"),
+            UserImportRecord(telegram_id=renamed.telegram_id, name="Renamed", language="en"),
+            UserImportRecord(telegram_id=916200002, name="New", language="ru"),
+            UserImportRecord(telegram_id=916200002, name="New twice", language="ru"),
+        ]
+
+        changed = await user_service.bulk_upsert(records)
+
+        assert {user.telegram_id: user.name for user in changed} == {
+            renamed.telegram_id: "Renamed",
+            916200002: "New twice",
+        }
+        assert renamed.name == "Renamed"
+
+    async def test_bulk_delete(self, create_test_user, user_service: UserService):
+        """Тест массового удаления."""
+        created = [await create_test_user(telegram_id=916300000 + i) for i in range(2)]
+        ids = [user.user_id for user in created]
+
+        deleted = await user_service.bulk_delete(ids)
+
+        assert {user.user_id for user in deleted} == set(ids)
+        assert await user_service.get_many_by_tg_ids([user.telegram_id for user in created]) == []
+
+    async def test_apply_activity_at_parameter_limit(
+        self, repository: Repository, create_test_user
+    ):
+        """Тест пачки активности, заполняющей предел параметров вместе с часовым поясом."""
+        user = await create_test_user(telegram_id=916400000)
+        activity = []
+        for _ in range(MAX_PARAMETERS // 7):
+            item = UserActivity(user_id=user.user_id, last_seen_at=datetime_now())
+            item.profile = ("Renamed", "renamed", "en")
+            activity.append(item)
+        statements: list[str] = []
+        engine = repository.session.bind
+
+        def listener(conn, cursor, statement, *args) -> None:
+            statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            await repository.users.apply_activity(activity)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", listener)
+
+        assert len(statements) == 2
+        await repository.session.refresh(user)
+        assert user.name == "Renamed"
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.sql import User
+from app.services.counter import CachedCount
+from app.services.postgres import CountMode, SQLSessionContext
+
+TELEGRAM_IDS = tuple(range(916000001, 916000021))
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def users(session_pool: async_sessionmaker[AsyncSession]) -> None:
+    async with SQLSessionContext(session_pool=session_pool) as repository:
+        repository.session.add_all(
+            User(telegram_id=telegram_id, name="Counted", language="en", bot_blocked=i % 2 == 0)
+            for i, telegram_id in enumerate(TELEGRAM_IDS)
+        )
+
+
+@pytest.mark.asyncio
+class TestUserCount:
+    """Тесты подсчета пользователей."""
+
+    async def test_estimate(self, session_pool):
+        """Тест оценки числа пользователей по статистике и по плану запроса."""
+        async with SQLSessionContext(session_pool=session_pool) as repository:
+            await repository.session.execute(text('ANALYZE users."user"'))
+            exact = await repository.users.count()
+            assert exact >= len(TELEGRAM_IDS)
+            assert await repository.users.count(mode=CountMode.ESTIMATE) == exact
+
+            active = await repository.users.count(bot_blocked=False)
+            estimate = await repository.users.count(mode=CountMode.ESTIMATE, bot_blocked=False)
+            assert 0 < estimate <= exact
+            assert active <= exact
+
+    async def test_cached_count(self, session_pool):
+        """Тест отдачи устаревшего значения и пересчета в фоне по истечении TTL."""
+        now = [0.0]
+        counted: list[int] = []
+
+        async def count(repository) -> int:
+            counted.append(1)
+            return len(counted)
+
+        user_count = CachedCount(
+            session_pool=session_pool,
+            count=count,
+            ttl=10,
+            clock=lambda: now[0],
+        )
+        assert await user_count.get() == 1
+        assert await user_count.get() == 1
+
+        now[0] = 10
+        assert await user_count.get() == 1
+        for _ in range(100):
+            if await user_count.get() == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert await user_count.get() == 2
+        assert len(counted) == 2
+        await user_count.stop()
@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+
+import pytest
+
+from app.models.config import AppConfig
+from app.models.dto import UserImportRecord
+from app.services.postgres import SQLSessionContext
+from app.services.user import UserService
+
+TELEGRAM_IDS = (915000001, 915000002, 915000003)
+
+
+@pytest.mark.asyncio
+class TestUserTransfer:
+    """Тесты массового импорта и выгрузки пользователей."""
+
+    async def test_import(self, session_pool, app_config: AppConfig):
+        """Тест импорта пачками: повторы схлопываются, неизмененные не перезаписываются."""
+        first, second, third = TELEGRAM_IDS
+        records = [
+            UserImportRecord(telegram_id=first, name="First", language="en"),
+            UserImportRecord(telegram_id=second, name="Second", language="ru"),
+            UserImportRecord(telegram_id=second, name="Second renamed", language="ru"),
+        ]
+        progress: list[tuple[int, int]] = []
+        async with SQLSessionContext(session_pool=session_pool) as repository:
+            user_service = UserService(repository=repository, config=app_config)
+            result = await user_service.import_users(
+                records,
+                batch_size=2,
+                on_progress=lambda *counts: progress.append(counts),
+            )
+        # Повтор second попал в следующую пачку и обновил созданного пользователя
+        assert result == (2, 1)
+        assert progress == [(2, 0), (2, 1)]
+
+        records = [
+            UserImportRecord(telegram_id=first, name="First", language="en"),
+            UserImportRecord(telegram_id=second, name="Second", language="ru", bot_blocked=True),
+            UserImportRecord(telegram_id=third, name="Third", language="en"),
+        ]
+        async with SQLSessionContext(session_pool=session_pool) as repository:
+            user_service = UserService(repository=repository, config=app_config)
+            assert await user_service.import_users(records) == (1, 1)
+            user = await user_service.get_by_tg_id(second)
+        assert user is not None
+        assert user.name == "Second"
+        assert user.bot_blocked
+
+    async def test_export(self, session_pool, app_config: AppConfig):
+        """Тест выгрузки в CSV и NDJSON."""
+        name = 'Exported, "quoted"'
+        records = [
+            UserImportRecord(telegram_id=TELEGRAM_IDS[0], name=name, language="en"),
+            UserImportRecord(
+                telegram_id=TELEGRAM_IDS[1],
+                name="Blocked",
+                language="en",
+                bot_blocked=True,
+            ),
+        ]
+        async with SQLSessionContext(session_pool=session_pool) as repository:
+            user_service = UserService(repository=repository, config=app_config)
+            await user_service.import_users(records)
+
+            output = io.BytesIO()
+            count = await user_service.export_users(output, fmt="csv", bot_blocked=False)
+            rows = list(csv.DictReader(io.StringIO(output.getvalue().decode())))
+            assert count == len(rows)
+            exported = {int(row["telegram_id"]): row for row in rows}
+            assert exported[TELEGRAM_IDS[0]]["name"] == name
+            assert TELEGRAM_IDS[1] not in exported
+
+            output = io.BytesIO()
+            count = await user_service.export_users(output, fmt="ndjson")
+            lines = output.getvalue().decode().splitlines()
+            assert count == len(lines)
+            exported = {user["telegram_id"]: user for user in map(json.loads, lines)}
+            assert exported[TELEGRAM_IDS[0]]["name"] == name
+            assert exported[TELEGRAM_IDS[1]]["bot_blocked"] is True
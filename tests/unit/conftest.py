@@ -0,0 +1,12 @@
+import pytest
+from aiogram import Bot, Dispatcher
+
+
+@pytest.fixture
+def bot() -> Bot:
+    return Bot(token="42:ABC")
+
+
+@pytest.fixture
+def dispatcher() -> Dispatcher:
+    return Dispatcher(name="test_dispatcher")
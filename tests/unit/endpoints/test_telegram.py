@@ -0,0 +1,293 @@
+import asyncio
+from pathlib import Path
+from typing import Any, AsyncIterator
+from unittest.mock import AsyncMock, Mock
+
+import msgspec
+import pytest
+import pytest_asyncio
+from aiogram import Bot, Dispatcher
+from aiogram.methods import SendMessage
+from aiogram.types import Update
+from starlette.requests import Request
+
+from app.endpoints.telegram import TelegramRequestHandler, TelegramWebhookMiddleware
+from app.telegram.dedup import BotUpdateIdIndex
+from app.telegram.journal import UpdateJournal
+from app.telegram.scheduler import UpdateScheduler
+
+
+def make_update_body(update_id: int) -> bytes:
+    return (
+        b'{"update_id": %d, "message": {"message_id": 10, "date": 1700000000,'
+        b' "chat": {"id": 42, "type": "private"},'
+        b' "from": {"id": 42, "is_bot": false, "first_name": "Test"}, "text": "/start"}}'
+    ) % update_id
+
+
+UPDATE_BODY = make_update_body(update_id=1)
+
+
+@pytest_asyncio.fixture
+async def handler(dispatcher: Dispatcher, bot: Bot) -> AsyncIterator[TelegramRequestHandler]:
+    """Обработчик webhook с замоканным feed_update."""
+    dispatcher.feed_update = AsyncMock(return_value=None)  # type: ignore[method-assign]
+    handler = TelegramRequestHandler(
+        dispatcher=dispatcher,
+        bots=[bot],
+        path="/telegram",
+        scheduler=UpdateScheduler(lanes=1, queue_size=1),
+        secret_token="secret",
+        update_index=BotUpdateIdIndex(capacity=10),
+    )
+    handler.scheduler.start()
+    yield handler
+    await handler.scheduler.stop()
+
+
+def make_request(body: bytes, path: str = "/telegram") -> Mock:
+    request = Mock(spec=Request)
+    request.body = AsyncMock(return_value=body)
+    request.url.path = path
+    return request
+
+
+@pytest.mark.asyncio
+class TestTelegramRequestHandler:
+    """Тесты приема webhook запросов."""
+
+    async def test_invalid_secret_rejected(self, handler: TelegramRequestHandler):
+        """Тест отклонения запроса с неверным секретом."""
+        response = await handler.handle(make_request(UPDATE_BODY), "wrong")
+
+        assert response.status_code == 401
+        handler.dispatcher.feed_update.assert_not_called()
+
+    async def test_update_decoded_in_background(self, handler: TelegramRequestHandler):
+        """Тест отложенного декодирования тела запроса."""
+        await handler.handle(make_request(UPDATE_BODY), "secret")
+        await handler.scheduler.join()
+
+        handler.dispatcher.feed_update.assert_awaited_once()
+        update = handler.dispatcher.feed_update.call_args.kwargs["update"]
+        assert isinstance(update, Update)
+        assert update.update_id == 1
+        assert update.message.chat.id == 42
+
+    async def test_duplicate_update_dropped(self, handler: TelegramRequestHandler):
+        """Тест отбрасывания повторной доставки обновления."""
+        await handler.handle(make_request(UPDATE_BODY), "secret")
+        await handler.handle(make_request(UPDATE_BODY), "secret")
+        await handler.scheduler.join()
+
+        handler.dispatcher.feed_update.assert_awaited_once()
+        assert handler.update_index.duplicates == 1
+
+    async def test_malformed_body_rejected(self, handler: TelegramRequestHandler):
+        """Тест отклонения некорректного тела запроса."""
+        response = await handler.handle(make_request(b"{not json"), "secret")
+
+        assert response.status_code == 400
+        handler.dispatcher.feed_update.assert_not_called()
+
+    async def test_full_queue_sheds_load(self, handler: TelegramRequestHandler):
+        """Тест ответа 503 при переполненной очереди."""
+        await handler.scheduler.stop()
+
+        await handler.handle(make_request(make_update_body(update_id=1)), "secret")
+        response = await handler.handle(make_request(make_update_body(update_id=2)), "secret")
+
+        assert response.status_code == 503
+        assert 2 not in handler.update_index[handler.bot.id]
+        assert handler.scheduler.qsize() == 1
+        assert handler.update_index.duplicates == 0
+
+
+@pytest.mark.asyncio
+class TestTelegramRequestHandlerReply:
+    """Тесты ответа методом в теле webhook запроса."""
+
+    @pytest_asyncio.fixture
+    async def reply_handler(
+        self,
+        handler: TelegramRequestHandler,
+    ) -> TelegramRequestHandler:
+        handler.reply_timeout = 0.2
+        handler.dispatcher.silent_call_request = AsyncMock()  # type: ignore[method-assign]
+        return handler
+
+    async def test_method_returned_in_response(self, reply_handler: TelegramRequestHandler):
+        """Тест возврата метода в теле ответа, если обработчик уложился в дедлайн."""
+        reply_handler.dispatcher.feed_update.return_value = SendMessage(chat_id=42, text="Hi")
+
+        response = await reply_handler.handle(make_request(UPDATE_BODY), "secret")
+
+        payload = msgspec.json.decode(response.body)
+        assert payload["method"] == "sendMessage"
+        assert payload["chat_id"] == 42
+        assert payload["text"] == "Hi"
+        reply_handler.dispatcher.silent_call_request.assert_not_called()
+
+    async def test_slow_handler_falls_back_to_api_call(
+        self,
+        reply_handler: TelegramRequestHandler,
+    ):
+        """Тест отправки метода отдельным запросом, если обработчик не уложился в дедлайн."""
+
+        async def slow_feed_update(**_: Any) -> SendMessage:
+            await asyncio.sleep(0.5)
+            return SendMessage(chat_id=42, text="Hi")
+
+        reply_handler.dispatcher.feed_update.side_effect = slow_feed_update
+
+        response = await reply_handler.handle(make_request(UPDATE_BODY), "secret")
+        await reply_handler.scheduler.join()
+
+        assert response.body == b""
+        reply_handler.dispatcher.silent_call_request.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+class TestTelegramRequestHandlerMultiBot:
+    """Тесты обслуживания нескольких ботов одним обработчиком."""
+
+    @pytest_asyncio.fixture
+    async def multi_handler(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+    ) -> AsyncIterator[TelegramRequestHandler]:
+        dispatcher.feed_update = AsyncMock(return_value=None)  # type: ignore[method-assign]
+        handler = TelegramRequestHandler(
+            dispatcher=dispatcher,
+            bots=[bot, Bot(token="43:DEF", session=bot.session)],
+            path="/telegram",
+            scheduler=UpdateScheduler(lanes=1, queue_size=10),
+            secret_token="secret",
+            update_index=BotUpdateIdIndex(capacity=10),
+        )
+        handler.scheduler.start()
+        yield handler
+        await handler.scheduler.stop()
+
+    async def test_update_routed_by_bot_path(self, multi_handler: TelegramRequestHandler):
+        """Тест выбора бота по пути webhook и раздельной дедупликации по ботам."""
+        await multi_handler.handle(make_request(UPDATE_BODY, path="/telegram/42"), "secret")
+        await multi_handler.handle(make_request(UPDATE_BODY, path="/telegram/43"), "secret")
+        await multi_handler.scheduler.join()
+
+        bot_ids = [
+            call.kwargs["bot"].id for call in multi_handler.dispatcher.feed_update.call_args_list
+        ]
+        assert bot_ids == [42, 43]
+        assert multi_handler.update_index.duplicates == 0
+
+    async def test_unknown_path_rejected(self, multi_handler: TelegramRequestHandler):
+        """Тест отклонения запроса на путь неизвестного бота."""
+        assert multi_handler.resolve_bot("/telegram") is None
+
+        response = await multi_handler.handle(make_request(UPDATE_BODY, "/telegram/1"), "secret")
+
+        assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+class TestTelegramRequestHandlerJournal:
+    """Тесты записи обновлений в журнал."""
+
+    @pytest_asyncio.fixture
+    async def journal(
+        self,
+        handler: TelegramRequestHandler,
+        tmp_path: Path,
+    ) -> AsyncIterator[UpdateJournal]:
+        handler.journal = UpdateJournal(path=tmp_path)
+        await handler.journal.open()
+        yield handler.journal
+        await handler.journal.close()
+
+    async def test_update_journaled_until_processed(
+        self,
+        handler: TelegramRequestHandler,
+        journal: UpdateJournal,
+    ):
+        """Тест записи обновления до ответа и отметки о выполнении после обработки."""
+        await handler.scheduler.stop()
+
+        await handler.handle(make_request(UPDATE_BODY), "secret")
+        assert journal.pending == 1
+
+        handler.scheduler.start()
+        await handler.scheduler.join()
+        assert journal.pending == 0
+
+    async def test_replayed_update_processed(
+        self,
+        handler: TelegramRequestHandler,
+        journal: UpdateJournal,
+        tmp_path: Path,
+    ):
+        """Тест повторной обработки обновления из журнала прошлого запуска."""
+        previous = UpdateJournal(path=tmp_path / "previous")
+        await previous.open()
+        previous.append(bot_id=handler.bot.id, update_id=1, payload=UPDATE_BODY)
+        await previous.close()
+
+        await handler.replay(await UpdateJournal(path=tmp_path / "previous").open())
+        await handler.scheduler.join()
+
+        handler.dispatcher.feed_update.assert_awaited_once()
+        assert 1 in handler.update_index[handler.bot.id]
+
+
+@pytest.mark.asyncio
+class TestTelegramWebhookMiddleware:
+    """Тесты приема webhook запросов в обход стека middleware."""
+
+    @staticmethod
+    async def call(
+        middleware: TelegramWebhookMiddleware,
+        path: str,
+        body: bytes,
+    ) -> list[dict[str, Any]]:
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": path,
+            "headers": [(b"x-telegram-bot-api-secret-token", b"secret")],
+        }
+        chunks = [
+            {"type": "http.request", "body": body[:10], "more_body": True},
+            {"type": "http.request", "body": body[10:], "more_body": False},
+        ]
+        messages: list[dict[str, Any]] = []
+
+        async def receive() -> dict[str, Any]:
+            return chunks.pop(0)
+
+        async def send(message: dict[str, Any]) -> None:
+            messages.append(message)
+
+        await middleware(scope, receive, send)
+        return messages
+
+    async def test_webhook_handled_without_inner_app(self, handler: TelegramRequestHandler):
+        """Тест обработки webhook запроса без вызова остального приложения."""
+        inner_app = AsyncMock()
+        middleware = TelegramWebhookMiddleware(inner_app, handler=handler)
+
+        messages = await self.call(middleware, "/telegram", UPDATE_BODY)
+        await handler.scheduler.join()
+
+        assert messages[0]["status"] == 200
+        inner_app.assert_not_called()
+        handler.dispatcher.feed_update.assert_awaited_once()
+
+    async def test_other_paths_passed_through(self, handler: TelegramRequestHandler):
+        """Тест передачи остальных запросов в приложение."""
+        inner_app = AsyncMock()
+        middleware = TelegramWebhookMiddleware(inner_app, handler=handler)
+
+        await self.call(middleware, "/admin", UPDATE_BODY)
+
+        inner_app.assert_awaited_once()
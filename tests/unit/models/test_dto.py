@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from app.models.dto import AdminUserDto, UserDto
+
+
+def make_user() -> UserDto:
+    return UserDto(user_id=1, telegram_id=100, name="Name", language="en")
+
+
+class TestActiveRecordModel:
+    """Тесты отслеживания изменений в DTO."""
+
+    def test_model_state_contains_changed_fields(self):
+        """Тест: в состоянии только поля, значение которых изменилось."""
+        user = make_user()
+        assert user.model_state == {}
+
+        user.name = "Renamed"
+        user.language = "en"
+        user.bot_blocked = True
+        assert user.model_state == {"name": "Renamed", "bot_blocked": True}
+
+        user.name = "Name"
+        assert user.model_state == {"bot_blocked": True}
+
+    def test_model_copy(self):
+        """Тест копии: изменения оригинала сохраняются, поля из update - нет."""
+        user = make_user()
+        user.name = "Renamed"
+
+        copied = user.model_copy(update={"username": "copied"})
+        assert copied.username == "copied"
+        assert copied.model_state == {"name": "Renamed"}
+
+        copied.language = "ru"
+        assert user.language == "en"
+        assert user.model_state == {"name": "Renamed"}
+
+    def test_from_attributes_uses_aliases(self):
+        """Тест создания DTO из атрибутов модели с другим именем поля."""
+        admin = AdminUserDto.from_attributes(
+            SimpleNamespace(
+                user_id=1,
+                name="Admin",
+                username="admin",
+                password="hash",
+                is_blocked=False,
+                is_super_admin=True,
+            )
+        )
+        assert admin.password_hash == "hash"
+        assert admin.model_dump(by_alias=True)["password"] == "hash"
+        assert admin.model_state == {}
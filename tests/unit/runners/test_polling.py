@@ -0,0 +1,122 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from app.runners.polling import poll_as_leader
+
+
+class FakeDispatcher:
+    def __init__(self) -> None:
+        self._running_lock = asyncio.Lock()
+        self._stop = asyncio.Event()
+        self.started = 0
+
+    async def start_polling(self, *_: Any, **__: Any) -> None:
+        async with self._running_lock:
+            self.started += 1
+            await self._stop.wait()
+            self._stop.clear()
+
+    async def stop_polling(self) -> None:
+        self._stop.set()
+
+
+class FakeLock:
+    def __init__(self, acquire: list[bool | Exception], check: list[bool]) -> None:
+        self._acquire = acquire
+        self._check = check
+        self.held = False
+
+    async def acquire(self) -> bool:
+        result = self._acquire.pop(0) if self._acquire else True
+        if isinstance(result, Exception):
+            raise result
+        self.held = result
+        return self.held
+
+    async def check(self, timeout: float) -> bool:
+        self.held = self._check.pop(0) if self._check else True
+        return self.held
+
+    async def release(self) -> None:
+        self.held = False
+
+
+@pytest.mark.asyncio
+class TestPollAsLeader:
+    """Тесты polling с выбором ведущей реплики."""
+
+    async def test_polling_restarted_after_leadership_regained(self):
+        """Тест остановки polling при потере блокировки и запуска после ее получения."""
+        dispatcher = FakeDispatcher()
+        lock = FakeLock(acquire=[False, True, True], check=[False])
+        running = True
+        task = asyncio.create_task(
+            poll_as_leader(
+                dispatcher=dispatcher,
+                bots=[],
+                lock=lock,
+                interval=0.01,
+                is_running=lambda: running,
+            )
+        )
+
+        while dispatcher.started < 2:
+            await asyncio.sleep(0.01)
+        running = False
+        await dispatcher.stop_polling()
+        await asyncio.wait_for(task, timeout=1)
+
+        assert dispatcher.started == 2
+        assert not lock.held
+
+    async def test_acquire_error_keeps_standby(self):
+        """Тест повторной попытки получить блокировку после ошибки соединения с БД."""
+        dispatcher = FakeDispatcher()
+        lock = FakeLock(acquire=[OSError("connection refused"), True], check=[])
+        running = True
+        task = asyncio.create_task(
+            poll_as_leader(
+                dispatcher=dispatcher,
+                bots=[],
+                lock=lock,
+                interval=0.01,
+                is_running=lambda: running,
+            )
+        )
+
+        while dispatcher.started < 1:
+            await asyncio.sleep(0.01)
+        assert not task.done()
+        running = False
+        await dispatcher.stop_polling()
+        await asyncio.wait_for(task, timeout=1)
+
+        assert not lock.held
+
+    async def test_polling_restarted_after_unexpected_stop(self):
+        """Тест возврата в резерв и повторного запуска polling, остановившегося не при выходе."""
+        dispatcher = FakeDispatcher()
+        lock = FakeLock(acquire=[], check=[])
+        running = True
+        task = asyncio.create_task(
+            poll_as_leader(
+                dispatcher=dispatcher,
+                bots=[],
+                lock=lock,
+                interval=0.01,
+                is_running=lambda: running,
+            )
+        )
+
+        while dispatcher.started < 1:
+            await asyncio.sleep(0.01)
+        await dispatcher.stop_polling()
+        while dispatcher.started < 2:
+            await asyncio.sleep(0.01)
+        running = False
+        await dispatcher.stop_polling()
+        await asyncio.wait_for(task, timeout=1)
+
+        assert dispatcher.started == 2
@@ -0,0 +1,24 @@
+from pathlib import Path
+
+import pytest
+
+from app.runners import workers
+
+
+class TestClaimJournalSlot:
+    """Тесты выбора каталога журнала процессом-воркером."""
+
+    def test_each_worker_gets_own_slot(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        """Тест выдачи разных каталогов и ошибки при отсутствии свободных."""
+        monkeypatch.setattr(workers, "_journal_lock", None)
+        first = workers.claim_journal_slot(path=tmp_path, workers=2)
+        first_lock = workers._journal_lock
+        second = workers.claim_journal_slot(path=tmp_path, workers=2)
+
+        assert first == tmp_path / "worker-0"
+        assert second == tmp_path / "worker-1"
+        with pytest.raises(RuntimeError):
+            workers.claim_journal_slot(path=tmp_path, workers=2)
+        assert first_lock is not None
+        first_lock.close()
+        workers._journal_lock.close()
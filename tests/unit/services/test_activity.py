@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from app.services.activity import UserActivity, UserActivityBuffer
+from app.utils.time import datetime_now
+
+
+class TestUserActivity:
+    """Тесты объединения активности пользователя."""
+
+    def test_merge(self):
+        """Тест объединения: последнее обращение, сумма сообщений, новый профиль."""
+        now = datetime_now()
+        activity = UserActivity(user_id=1, last_seen_at=now)
+        activity.messages = 2
+        activity.profile = ("Old", None, "en")
+
+        other = UserActivity(user_id=1, last_seen_at=now - timedelta(seconds=5))
+        other.messages = 1
+        other.profile = ("New", "new", "ru")
+        activity.merge(other)
+
+        assert activity.last_seen_at == now
+        assert activity.messages == 3
+        assert activity.profile == ("New", "new", "ru")
+
+    def test_buffer_coalesces_by_user(self):
+        """Тест накопления изменений по одному пользователю в одной записи."""
+        buffer = UserActivityBuffer(session_pool=None, flush_interval=60, batch_size=10)
+        buffer.touch(user_id=1, message=True)
+        buffer.touch(user_id=1, message=True)
+        buffer.touch(user_id=1)
+        buffer.update_profile(user_id=1, name="Name", username=None, language_code="en")
+        buffer.touch(user_id=2)
+
+        assert len(buffer) == 2
@@ -0,0 +1,55 @@
+from app.services.cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLRUCache:
+    """Тесты кэша с вытеснением по LRU и TTL."""
+
+    def test_hits_and_misses_counted(self):
+        """Тест подсчета попаданий и промахов."""
+        cache: LRUCache[int, str] = LRUCache(capacity=10, ttl=60)
+        cache.set(1, "a")
+
+        assert cache.get(1) == "a"
+        assert cache.get(2) is None
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert cache.hit_ratio == 0.5
+
+    def test_least_recently_used_evicted(self):
+        """Тест вытеснения давно не использованной записи."""
+        cache: LRUCache[int, str] = LRUCache(capacity=2, ttl=60)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        cache.get(1)
+        cache.set(3, "c")
+
+        assert cache.get(2) is None
+        assert cache.get(1) == "a"
+        assert cache.get(3) == "c"
+        assert cache.evictions == 1
+
+    def test_expired_entry_dropped(self):
+        """Тест истечения времени жизни записи."""
+        clock = FakeClock()
+        cache: LRUCache[int, str] = LRUCache(capacity=10, ttl=5, clock=clock)
+        cache.set(1, "a")
+        clock.now = 5
+
+        assert cache.get(1) is None
+        assert len(cache) == 0
+
+    def test_invalidate(self):
+        """Тест удаления записи."""
+        cache: LRUCache[int, str] = LRUCache(capacity=10, ttl=60)
+        cache.set(1, "a")
+        cache.invalidate(1)
+        cache.invalidate(2)
+
+        assert cache.get(1) is None
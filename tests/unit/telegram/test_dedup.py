@@ -0,0 +1,26 @@
+from app.telegram.dedup import UpdateIdIndex
+
+
+class TestUpdateIdIndex:
+    """Тесты индекса полученных обновлений."""
+
+    def test_duplicate_detected_and_counted(self):
+        """Тест обнаружения и подсчета повторных доставок."""
+        index = UpdateIdIndex(capacity=10)
+        index.add(1)
+
+        assert index.is_duplicate(1)
+        assert index.is_duplicate(1)
+        assert not index.is_duplicate(2)
+        assert index.duplicates == 2
+
+    def test_capacity_bounded(self):
+        """Тест вытеснения самых старых идентификаторов."""
+        index = UpdateIdIndex(capacity=3)
+        for update_id in range(5):
+            index.add(update_id)
+
+        assert len(index) == 3
+        assert 0 not in index
+        assert 1 not in index
+        assert all(update_id in index for update_id in (2, 3, 4))
@@ -0,0 +1,67 @@
+from datetime import UTC, datetime
+from typing import Any, AsyncIterator
+
+import pytest
+import pytest_asyncio
+from aiogram import Bot, Router
+from aiogram.filters import ExceptionTypeFilter
+from aiogram.fsm.context import FSMContext
+from aiogram.types import Chat, ErrorEvent, Message, Update, User
+
+from app.telegram.dispatcher import SchedulingDispatcher
+from app.telegram.journal import UpdateJournal
+from app.telegram.scheduler import UpdateScheduler
+
+
+@pytest_asyncio.fixture
+async def scheduler() -> AsyncIterator[UpdateScheduler]:
+    scheduler = UpdateScheduler(lanes=2, queue_size=10)
+    scheduler.start()
+    yield scheduler
+    await scheduler.stop()
+
+
+def make_update(update_id: int, text: str = "hello") -> Update:
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id,
+            date=datetime.now(UTC),
+            chat=Chat(id=7, type="private"),
+            from_user=User(id=7, is_bot=False, first_name="Test"),
+            text=text,
+        ),
+    )
+
+
+@pytest.mark.asyncio
+class TestSchedulingDispatcher:
+    """Тесты обработки обновлений polling в очередях планировщика."""
+
+    async def test_errors_router_fires(self, scheduler: UpdateScheduler, tmp_path):
+        """Тест срабатывания роутера ошибок и FSM для обновления из очереди."""
+        journal = UpdateJournal(path=tmp_path)
+        await journal.open()
+        dispatcher = SchedulingDispatcher(update_scheduler=scheduler, update_journal=journal)
+        router = Router()
+        errors: list[Any] = []
+
+        @router.message()
+        async def handler(message: Message, state: FSMContext) -> None:
+            await state.set_state("failing")
+            raise ValueError(message.text)
+
+        @router.errors(ExceptionTypeFilter(ValueError))
+        async def on_error(event: ErrorEvent) -> None:
+            errors.append(event.exception)
+
+        dispatcher.include_router(router)
+        bot = Bot(token="42:TEST")
+
+        assert await dispatcher._process_update(bot=bot, update=make_update(1))
+        await scheduler.join()
+
+        assert [str(error) for error in errors] == ["hello"]
+        assert journal.pending == 0
+        await journal.close()
+        await bot.session.close()
@@ -0,0 +1,75 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.telegram.journal import JournalRecord, UpdateJournal
+
+
+@pytest.mark.asyncio
+class TestUpdateJournal:
+    """Тесты журнала обновлений."""
+
+    async def test_unfinished_updates_replayed(self, tmp_path: Path):
+        """Тест возврата необработанных обновлений после перезапуска."""
+        journal = UpdateJournal(path=tmp_path)
+        assert await journal.open() == []
+        journal.append(bot_id=42, update_id=1, payload=b'{"update_id": 1}')
+        journal.append(bot_id=42, update_id=2, payload=b'{"update_id": 2}')
+        journal.done(bot_id=42, update_id=1)
+        await journal.close()
+
+        records = await UpdateJournal(path=tmp_path).open()
+
+        assert records == [JournalRecord(bot_id=42, update_id=2, payload=b'{"update_id": 2}')]
+
+    async def test_truncated_record_ignored(self, tmp_path: Path):
+        """Тест пропуска не дописанной при падении записи."""
+        journal = UpdateJournal(path=tmp_path)
+        await journal.open()
+        journal.append(bot_id=42, update_id=1, payload=b'{"update_id": 1}')
+        await journal.close()
+        with next(tmp_path.iterdir()).open("ab") as file:
+            file.write(b'A 42 2 100\n{"update_id": 2')
+
+        records = await UpdateJournal(path=tmp_path).open()
+
+        assert [record.update_id for record in records] == [1]
+
+    async def test_rotation_compacts_segments(self, tmp_path: Path):
+        """Тест переноса незавершенных записей и удаления старых сегментов при ротации."""
+        journal = UpdateJournal(path=tmp_path, segment_size=256, fsync_interval=0.01)
+        await journal.open()
+        journal.append(bot_id=42, update_id=0, payload=b"{}")
+        for update_id in range(1, 50):
+            journal.append(bot_id=42, update_id=update_id, payload=b'{"update_id": 0}')
+            journal.done(bot_id=42, update_id=update_id)
+        # Ротацию выполняет фоновая задача, а не append
+        assert len(list(tmp_path.iterdir())) == 1
+        while journal._segment < 2:
+            await asyncio.sleep(0.01)
+        await journal.close()
+
+        segments = list(tmp_path.iterdir())
+        assert [segment.name for segment in segments] == ["journal-00000002.log"]
+        assert segments[0].stat().st_size < 256
+        records = await UpdateJournal(path=tmp_path).open()
+        assert [record.update_id for record in records] == [0]
+
+    async def test_writes_during_rotation_kept(self, tmp_path: Path):
+        """Тест переноса записей, сделанных пока новый сегмент записывался в потоке."""
+        journal = UpdateJournal(path=tmp_path)
+        await journal.open()
+        journal.append(bot_id=42, update_id=1, payload=b'{"update_id": 1}')
+        journal.append(bot_id=42, update_id=2, payload=b'{"update_id": 2}')
+
+        rotation = asyncio.create_task(journal._rotate())
+        await asyncio.sleep(0)
+        journal.append(bot_id=42, update_id=3, payload=b'{"update_id": 3}')
+        journal.done(bot_id=42, update_id=1)
+        await rotation
+        await journal.close()
+
+        assert len(list(tmp_path.iterdir())) == 1
+        records = await UpdateJournal(path=tmp_path).open()
+        assert [record.update_id for record in records] == [2, 3]
@@ -0,0 +1,108 @@
+import asyncio
+from typing import Any, AsyncIterator
+
+import pytest
+import pytest_asyncio
+
+from app.telegram.scheduler import UpdateScheduler, get_update_key
+
+
+@pytest_asyncio.fixture
+async def scheduler() -> AsyncIterator[UpdateScheduler]:
+    scheduler = UpdateScheduler(lanes=4, queue_size=100)
+    scheduler.start()
+    yield scheduler
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+class TestUpdateScheduler:
+    """Тесты планировщика обработки обновлений."""
+
+    async def test_same_key_processed_in_order(self, scheduler: UpdateScheduler):
+        """Тест последовательной обработки обновлений одного чата."""
+        processed: list[int] = []
+
+        def make_job(index: int) -> Any:
+            async def job() -> None:
+                # Более ранние задачи выполняются дольше поздних
+                await asyncio.sleep(0.01 * (5 - index))
+                processed.append(index)
+
+            return job
+
+        for index in range(5):
+            await scheduler.submit(make_job(index), key=42)
+        await scheduler.join()
+
+        assert processed == [0, 1, 2, 3, 4]
+
+    async def test_different_keys_processed_in_parallel(self, scheduler: UpdateScheduler):
+        """Тест параллельной обработки разных чатов."""
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def blocking_job() -> None:
+            started.set()
+            await release.wait()
+
+        async def other_job() -> None:
+            release.set()
+
+        await scheduler.submit(blocking_job, key=0)
+        await started.wait()
+        await scheduler.submit(other_job, key=1)
+
+        await asyncio.wait_for(scheduler.join(), timeout=1)
+
+    async def test_drain_reports_unfinished(self, scheduler: UpdateScheduler):
+        """Тест ожидания принятых задач при завершении работы."""
+        processed: list[str] = []
+
+        async def fast_job() -> None:
+            await asyncio.sleep(0.01)
+            processed.append("fast")
+
+        async def slow_job() -> None:
+            await asyncio.sleep(10)
+            processed.append("slow")
+
+        await scheduler.submit(fast_job, key=0)
+        await scheduler.submit(slow_job, key=1)
+        unfinished = await scheduler.drain(timeout=0.2)
+
+        assert processed == ["fast"]
+        assert unfinished == 1
+        assert not scheduler.running
+
+    async def test_full_lane_rejected(self):
+        """Тест отказа при переполнении очереди."""
+        scheduler = UpdateScheduler(lanes=2, queue_size=2)
+
+        async def job() -> None:
+            pass
+
+        assert scheduler.submit_nowait(job, key=0)
+        assert not scheduler.submit_nowait(job, key=2)
+        assert scheduler.submit_nowait(job, key=1)
+
+
+@pytest.mark.parametrize(
+    "data, key",
+    [
+        ({"update_id": 1, "message": {"chat": {"id": -100}, "from": {"id": 7}}}, -100),
+        (
+            {
+                "update_id": 1,
+                "callback_query": {"from": {"id": 7}, "message": {"chat": {"id": 5}}},
+            },
+            5,
+        ),
+        ({"update_id": 1, "inline_query": {"from": {"id": 7}}}, 7),
+        ({"update_id": 1, "poll_answer": {"user": {"id": 8}}}, 8),
+        ({"update_id": 1, "poll": {"id": "abc"}}, None),
+    ],
+)
+def test_get_update_key(data: dict[str, Any], key: int | None):
+    """Тест определения ключа очередности по сырому обновлению."""
+    assert get_update_key(data) == key
@@ -0,0 +1,49 @@
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.filters import CommandStart
+from aiogram.types import Message, Update
+
+from app.telegram.middlewares import UserMiddleware
+
+
+def make_update(text: str) -> Update:
+    return Update.model_validate(
+        {
+            "update_id": 1,
+            "message": {
+                "message_id": 10,
+                "date": 1700000000,
+                "chat": {"id": 42, "type": "private"},
+                "from": {"id": 42, "is_bot": False, "first_name": "Test"},
+                "text": text,
+            },
+        }
+    )
+
+
+@pytest.mark.asyncio
+class TestUserMiddleware:
+    """Тесты загрузки пользователя только для обрабатываемых событий."""
+
+    async def test_user_loaded_only_for_matched_handler(self, dispatcher: Dispatcher, bot: Bot):
+        """Тест пропуска обращения к БД, если ни один обработчик не подошел."""
+        router = Router()
+
+        @router.message(CommandStart())
+        async def handle_start(message: Message, user: Mock) -> None:
+            pass
+
+        dispatcher.include_router(router)
+        UserMiddleware().setup_inner(router=dispatcher)
+        user_service = Mock(
+            config=Mock(telegram=Mock(locales=["en"])),
+            upsert_from_telegram=AsyncMock(return_value=(Mock(), False)),
+        )
+
+        await dispatcher.feed_update(bot, make_update("hello"), user_service=user_service)
+        user_service.upsert_from_telegram.assert_not_called()
+
+        await dispatcher.feed_update(bot, make_update("/start"), user_service=user_service)
+        user_service.upsert_from_telegram.assert_awaited_once()